@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Address Pool (EXPERIMENTAL)
+#
+# Pre-derives mint destinations so a mint does not wait on three
+# getnewaddress calls before it can build its sendmany:
+#
+# - One pool of unused addresses per (wallet, label), e.g.
+#   (CP1, CP1_PRINCIPAL), (REDEMPTION_POOL, REDEMPTION_POOL),
+#   (YIELD_POOL, YIELD_POOL), kept in data/address_pool.json
+# - take() hands out addresses from the pools; a pool that runs
+#   short is refilled on the spot (one JSON-RPC batch per wallet),
+#   one that drops below LOW_WATER is refilled in the background
+# - An address is removed from the pool file before it is handed
+#   out, and then logged in data/address_pool_issued.jsonl, so it
+#   is never handed out twice, across threads and processes
+# - Before the first take from a wallet, each process checks (one
+#   batch of getaddressinfo per wallet) that the pooled addresses
+#   still belong to that wallet, and that the node is on regtest;
+#   addresses of a reset wallet / chain are dropped
+#
+# Usage:
+#   python src/coordinator/address_pool.py status
+#   python src/coordinator/address_pool.py fill [CP_WALLET_NAME ...]
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from bitcoinrpc.authproxy import JSONRPCException
+import datetime
+import json
+import os
+import sys
+import threading
+
+from ledger import REPO_ROOT, LedgerLock, encode_event
+from rpc import REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME, batch_wallets, check_regtest
+
+ADDRESS_POOL_PATH = REPO_ROOT / "data" / "address_pool.json"
+ADDRESS_POOL_LOCK_PATH = REPO_ROOT / "data" / "address_pool.lock"
+ISSUED_LOG_PATH = REPO_ROOT / "data" / "address_pool_issued.jsonl"
+
+# Addresses derived per pool on a refill
+REFILL_BATCH = 20
+
+# Refill in the background once a pool has fewer addresses left
+LOW_WATER = 5
+
+ADDRESS_TYPE = "bech32"
+
+# Bitcoin Core: invalid address
+RPC_INVALID_ADDRESS_OR_KEY = -5
+
+
+def mint_labels(cp_wallet_name: str):
+    """
+    (wallet, label) of the three destinations of one mint.
+    """
+    return [
+        (cp_wallet_name, f"{cp_wallet_name}_PRINCIPAL"),
+        (REDEMPTION_WALLET_NAME, "REDEMPTION_POOL"),
+        (YIELD_WALLET_NAME, "YIELD_POOL"),
+    ]
+
+
+# --- STATE -----------------------------------------------------------------
+
+def pool_key(wallet_name: str, label: str) -> str:
+    return f"{wallet_name}:{label}"
+
+
+def load_address_pools():
+    """
+    Returns {pool_key: {"wallet", "label", "available": [...],
+    "issued": count}}.
+    """
+    if not ADDRESS_POOL_PATH.exists():
+        return {}
+    try:
+        with ADDRESS_POOL_PATH.open("r", encoding="utf-8") as f:
+            return json.load(f)["pools"]
+    except (ValueError, KeyError):
+        return {}
+
+
+def save_address_pools(pools) -> None:
+    """
+    Persist the pools atomically.
+    """
+    ADDRESS_POOL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = ADDRESS_POOL_PATH.with_name(f"{ADDRESS_POOL_PATH.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"pools": pools}, f, sort_keys=True, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, ADDRESS_POOL_PATH)
+
+
+def _pool(pools, wallet_name: str, label: str):
+    return pools.setdefault(pool_key(wallet_name, label), {
+        "wallet": wallet_name,
+        "label": label,
+        "available": [],
+        "issued": 0,
+    })
+
+
+def log_issued(records) -> None:
+    """
+    Append handed-out addresses to the issued log.
+    """
+    ISSUED_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with ISSUED_LOG_PATH.open("ab") as f:
+        for record in records:
+            f.write(encode_event(record))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# --- POOL ------------------------------------------------------------------
+
+class AddressPool:
+    """
+    Pre-derived addresses per (wallet, label); safe to share between
+    threads and processes.
+    """
+
+    def __init__(self, refill_batch: int = REFILL_BATCH, low_water: int = LOW_WATER, background: bool = True):
+        if refill_batch < 1 or not 0 <= low_water < refill_batch:
+            raise ValueError("need refill_batch ≥ 1 and 0 ≤ low_water < refill_batch")
+        self.refill_batch = refill_batch
+        self.low_water = low_water
+        self.background = background
+        self._verified = set()
+        self._verify_lock = threading.Lock()
+        self._refilling = set()
+        self._refilling_lock = threading.Lock()
+        self.refills = 0
+
+    def take(self, requests):
+        """
+        Hand out one address per (wallet, label) in `requests`, in
+        order. Marks them issued before returning.
+        """
+        requests = list(requests)
+        self.verify({wallet_name for wallet_name, _ in requests})
+
+        need = {}
+        for wallet_name, label in requests:
+            need[(wallet_name, label)] = need.get((wallet_name, label), 0) + 1
+
+        while True:
+            with LedgerLock(ADDRESS_POOL_LOCK_PATH):
+                pools = load_address_pools()
+                short = {
+                    key: count - len(_pool(pools, *key)["available"]) + self.refill_batch
+                    for key, count in need.items()
+                    if len(_pool(pools, *key)["available"]) < count
+                }
+                if not short:
+                    addresses = [_pool(pools, *key)["available"].pop(0) for key in requests]
+                    for key, count in need.items():
+                        _pool(pools, *key)["issued"] += count
+                    save_address_pools(pools)
+                    low = [key for key in need if len(_pool(pools, *key)["available"]) < self.low_water]
+                    break
+            # Derive outside the lock: other takers are not held up
+            self.refill(short)
+
+        issued_at = datetime.datetime.utcnow().isoformat() + "Z"
+        log_issued(
+            {"wallet": wallet_name, "label": label, "address": address, "issued_at": issued_at}
+            for (wallet_name, label), address in zip(requests, addresses)
+        )
+        if low:
+            self._refill_later(low)
+        return addresses
+
+    def refill(self, counts) -> None:
+        """
+        Derive {(wallet, label): count} new addresses, one JSON-RPC
+        batch per wallet, and add them to the pools.
+        """
+        calls = {}
+        for (wallet_name, label), count in counts.items():
+            calls.setdefault(wallet_name, []).extend([("getnewaddress", label, ADDRESS_TYPE)] * count)
+        results = {wallet_name: iter(addresses) for wallet_name, addresses in batch_wallets(calls).items()}
+
+        with LedgerLock(ADDRESS_POOL_LOCK_PATH):
+            pools = load_address_pools()
+            for (wallet_name, label), count in counts.items():
+                _pool(pools, wallet_name, label)["available"].extend(
+                    next(results[wallet_name]) for _ in range(count)
+                )
+            save_address_pools(pools)
+        self.refills += 1
+
+    def _refill_later(self, keys) -> None:
+        with self._refilling_lock:
+            keys = [key for key in keys if key not in self._refilling]
+            self._refilling.update(keys)
+        if not keys:
+            return
+
+        def run():
+            try:
+                self.refill({key: self.refill_batch for key in keys})
+            except Exception as e:
+                # The next take() refills synchronously instead
+                print(f"[WARN] Address pool refill failed: {e}", file=sys.stderr)
+            finally:
+                with self._refilling_lock:
+                    self._refilling.difference_update(keys)
+
+        if self.background:
+            threading.Thread(target=run, name="address-pool-refill", daemon=True).start()
+        else:
+            run()
+
+    def verify(self, wallet_names) -> None:
+        """
+        Once per process and wallet: drop pooled addresses the wallet
+        does not own (wallet or chain was reset), and check that the
+        node is on regtest.
+        """
+        with self._verify_lock:
+            wallet_names = sorted(set(wallet_names) - self._verified)
+            if not wallet_names:
+                return
+
+            pools = load_address_pools()
+            pooled = {
+                wallet_name: [address for pool in pools.values() if pool["wallet"] == wallet_name
+                              for address in pool["available"]]
+                for wallet_name in wallet_names
+            }
+            calls = {wallet_name: [("getaddressinfo", address) for address in pooled[wallet_name]]
+                     for wallet_name in wallet_names}
+            calls[wallet_names[0]] = [("getblockchaininfo",)] + calls[wallet_names[0]]
+
+            try:
+                results = batch_wallets(calls)
+                check_regtest(results[wallet_names[0]].pop(0))
+                foreign = {
+                    address
+                    for wallet_name in wallet_names
+                    for address, info in zip(pooled[wallet_name], results[wallet_name])
+                    if not info.get("ismine")
+                }
+            except JSONRPCException as e:
+                if e.error.get("code") != RPC_INVALID_ADDRESS_OR_KEY:
+                    raise
+                # Not even a valid address on this chain: start over
+                foreign = {address for addresses in pooled.values() for address in addresses}
+
+            if foreign:
+                with LedgerLock(ADDRESS_POOL_LOCK_PATH):
+                    pools = load_address_pools()
+                    for pool in pools.values():
+                        pool["available"] = [a for a in pool["available"] if a not in foreign]
+                    save_address_pools(pools)
+                print(f"[WARN] Dropped {len(foreign)} pooled address(es) not owned by "
+                      f"{', '.join(wallet_names)}.", file=sys.stderr)
+            self._verified.update(wallet_names)
+
+    def fill(self, requests) -> None:
+        """
+        Top up each (wallet, label) pool to refill_batch addresses.
+        """
+        requests = list(dict.fromkeys(requests))
+        self.verify({wallet_name for wallet_name, _ in requests})
+        pools = load_address_pools()
+        counts = {}
+        for key in requests:
+            missing = self.refill_batch - len(pools.get(pool_key(*key), {}).get("available", []))
+            if missing > 0:
+                counts[key] = missing
+        if counts:
+            self.refill(counts)
+
+_address_pool = None
+_address_pool_lock = threading.Lock()
+
+
+def get_address_pool() -> AddressPool:
+    """
+    Return the shared address pool, creating it on first use.
+    """
+    global _address_pool
+    with _address_pool_lock:
+        if _address_pool is None:
+            _address_pool = AddressPool()
+        return _address_pool
+
+
+# --- MAIN ------------------------------------------------------------------
+
+USAGE = """Usage:
+  python src/coordinator/address_pool.py status
+  python src/coordinator/address_pool.py fill [CP_WALLET_NAME ...]"""
+
+
+def cmd_status() -> None:
+    pools = load_address_pools()
+    print(f"\n=== cBTC Address Pool ({len(pools)} pools) ===")
+    for key in sorted(pools):
+        pool = pools[key]
+        print(f"{pool['wallet']:<18} {pool['label']:<22} {len(pool['available']):>5} available"
+              f"  {pool['issued']:>7} issued")
+    print()
+
+
+def cmd_fill(cp_wallets) -> None:
+    requests = []
+    for cp_wallet_name in cp_wallets or ["CP1"]:
+        requests.extend(mint_labels(cp_wallet_name))
+    try:
+        AddressPool().fill(requests)
+    except (JSONRPCException, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    cmd_status()
+
+
+def main():
+    args = sys.argv[1:]
+    if args == ["status"]:
+        cmd_status()
+    elif args and args[0] == "fill":
+        cmd_fill(args[1:])
+    else:
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[ERROR] {e}")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – asyncio Coordinator (EXPERIMENTAL)
+#
+# Runs many mints and redemptions concurrently on one event loop,
+# using the asyncio RPC clients from async_rpc.py:
+#
+# - Mint preparation (chain check, CP balance, three fresh
+#   addresses) only touches the CP's own wallet and address
+#   derivation, so it overlaps freely across CPs and with
+#   redemptions
+# - Everything that moves Redemption Pool BTC or cBTC supply runs in
+#   one async critical section (pool_lock, plus the cross-process
+#   ledger writer lock while inside it), one job at a time:
+#     - mint:   sendmany (funds the pool) + ledger append
+#     - redeem: ledger totals + pool balance (balance tracker,
+#               pool_balance.py) → quote → sendtoaddress + ledger
+#               append
+#   so each redemption is quoted against a pool and supply that
+#   include every earlier mint and redemption, and the coverage
+#   rules in core.quote_redemption() hold as if the jobs had run
+#   one after another
+#
+# Same mint / redeem rules, ledger events and messages as
+# open_mint_channel.py and redeem_cbtc.py (shared helpers).
+#
+# Usage:
+#   python src/coordinator/async_coordinator.py [--rpc-host H] [--rpc-port P] JOB...
+#
+#   JOB is one of:
+#     mint:<deposit_btc>[:<CP_WALLET_NAME>]     (default wallet CP1)
+#     redeem:<cbtc_amount>:<btc_address>
+#
+# Example:
+#   python src/coordinator/async_coordinator.py mint:1.0:CP1 mint:0.5:CP2 \
+#       mint:2.0:CP3 redeem:250.5:bcrt1q...
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal, getcontext
+from bitcoinrpc.authproxy import JSONRPCException
+import argparse
+import asyncio
+import contextlib
+import functools
+import sys
+
+from async_rpc import batch_wallets, close_all, ensure_regtest, get_async_wallet_client
+from core import MILLI, cbtc_to_mC, format_cbtc_from_mC, parse_amount, quote_redemption
+from ledger import LedgerLock, append_ledger_event, ledger_head
+from open_mint_channel import build_mint_event, build_mint_plan, mint_outputs, mint_prepare_calls, validate_deposit
+from pool_balance import get_pool_tracker
+from redeem_cbtc import build_redeem_event
+import rpc
+
+getcontext().prec = 18
+
+DEFAULT_CP_WALLET = "CP1"
+
+
+# --- COORDINATOR -----------------------------------------------------------
+
+def _release_if_acquired(lock, acquiring) -> None:
+    """
+    Done-callback for a lock acquisition nobody is waiting for anymore.
+    """
+    if not acquiring.cancelled() and acquiring.exception() is None:
+        lock.release()
+
+
+class AsyncCoordinator:
+    """
+    Concurrent mint / redeem jobs with a single pool critical section.
+    Must be created inside the running event loop.
+    """
+
+    def __init__(self):
+        self.pool_lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def critical_section(self):
+        """
+        pool_lock for this loop's jobs, then the ledger writer lock
+        against other processes (acquired off the event loop).
+        """
+        async with self.pool_lock:
+            lock = LedgerLock()
+            # The worker thread takes the flock even if this task is
+            # cancelled while waiting, so the wait is shielded and a lock
+            # taken after a cancellation is released straight away.
+            acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+            try:
+                await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                acquiring.add_done_callback(functools.partial(_release_if_acquired, lock))
+                raise
+            try:
+                yield
+            finally:
+                lock.release()
+
+    async def mint(self, deposit_btc: Decimal, cp_wallet_name: str = DEFAULT_CP_WALLET):
+        """
+        Open a minting channel. Returns the "mint" ledger event.
+        Raises ValueError (rejected) or JSONRPCException (RPC failure).
+        """
+        validate_deposit(deposit_btc)
+
+        # Independent RPCs: overlap with every other job
+        cp_client = get_async_wallet_client(cp_wallet_name)
+        await ensure_regtest(cp_client)
+        results = await batch_wallets(mint_prepare_calls(cp_wallet_name))
+        plan = build_mint_plan(deposit_btc, cp_wallet_name, results)
+
+        async with self.critical_section():
+            txid = await cp_client.sendmany(
+                "",              # empty string means: use default account (descriptor wallet)
+                mint_outputs(plan),
+                0,               # minconf
+                "cBTC Minting Channel"
+            )
+            event = build_mint_event(plan, txid)
+            await asyncio.to_thread(append_ledger_event, event, None, True)
+        return event
+
+    async def redeem(self, requested_mC: int, recv_addr: str):
+        """
+        Quote and pay a redemption. Returns the "redeem" ledger event.
+        Raises ValueError (not quotable) or JSONRPCException (RPC failure).
+        """
+        if not recv_addr:
+            raise ValueError("No address provided.")
+
+        red_client = get_async_wallet_client(rpc.REDEMPTION_WALLET_NAME)
+        async with self.critical_section():
+            seq, total_minted_mC, total_redeemed_mC = await asyncio.to_thread(ledger_head)
+            outstanding_mC = total_minted_mC - total_redeemed_mC
+            if outstanding_mC <= 0:
+                raise ValueError("No outstanding cBTC to redeem.")
+
+            pool_sats = await asyncio.to_thread(get_pool_tracker().trusted_sats)
+            quote = quote_redemption(outstanding_mC, pool_sats, requested_mC)
+            if quote.btc_paid_sats <= 0:
+                raise ValueError("Redemption would pay 0 BTC.")
+
+            txid = await red_client.sendtoaddress(recv_addr, float(quote.btc_paid))
+            get_pool_tracker().invalidate()
+            event = build_redeem_event(quote, txid)
+            await asyncio.to_thread(append_ledger_event, event, seq, True)
+        return event
+
+
+# --- JOBS ------------------------------------------------------------------
+
+def parse_job(raw: str):
+    """
+    "mint:<deposit_btc>[:<CP>]" or "redeem:<cbtc>:<address>" →
+    (kind, args). Raises ValueError for malformed jobs.
+    """
+    parts = raw.split(":")
+    kind = parts[0]
+
+    if kind == "mint" and len(parts) in (2, 3):
+        deposit_btc = parse_amount(parts[1], "deposit amount", places=8)
+        cp_wallet_name = parts[2] if len(parts) == 3 and parts[2] else DEFAULT_CP_WALLET
+        return "mint", (deposit_btc, cp_wallet_name)
+
+    if kind == "redeem" and len(parts) == 3:
+        requested_cbtc = parse_amount(parts[1], "cBTC amount", places=3)
+        if requested_cbtc <= 0:
+            raise ValueError("Redemption amount must be > 0.")
+        return "redeem", (cbtc_to_mC(requested_cbtc.quantize(MILLI)), parts[2].strip())
+
+    raise ValueError(f"Invalid job: {raw}")
+
+
+async def run_jobs(jobs):
+    """
+    Run parsed jobs concurrently. Returns one event or exception per
+    job, in job order.
+    """
+    coordinator = AsyncCoordinator()
+    try:
+        return await asyncio.gather(
+            *(getattr(coordinator, kind)(*args) for kind, args in jobs),
+            return_exceptions=True,
+        )
+    finally:
+        await close_all()
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC asyncio coordinator (regtest MVP)")
+    parser.add_argument("--rpc-host", default=rpc.RPC_HOST)
+    parser.add_argument("--rpc-port", type=int, default=rpc.RPC_PORT)
+    parser.add_argument("jobs", nargs="+", metavar="JOB")
+    args = parser.parse_args()
+
+    rpc.RPC_HOST = args.rpc_host
+    rpc.RPC_PORT = args.rpc_port
+
+    try:
+        jobs = [parse_job(raw) for raw in args.jobs]
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    results = asyncio.run(run_jobs(jobs))
+
+    print("\n=== cBTC asyncio Coordinator (Regtest MVP) ===")
+    failed = 0
+    for raw, result in zip(args.jobs, results):
+        if isinstance(result, (ValueError, JSONRPCException)):
+            failed += 1
+            print(f"[ERROR] {raw}: {result}")
+        elif isinstance(result, BaseException):
+            failed += 1
+            print(f"[ERROR] {raw}: {type(result).__name__}: {result}")
+        elif result["type"] == "mint":
+            print(f"[RESULT] {raw}: minted {result['minted_cbtc']} cBTC ({result['cp_wallet']}), txid {result['txid']}")
+        else:
+            print(f"[RESULT] {raw}: burned {format_cbtc_from_mC(result['burned_mC'])} cBTC "
+                  f"→ {result['btc_paid']} BTC ({result['tier']}), txid {result['txid']}")
+
+    print(f"\n[NOTE] {len(results) - failed} of {len(results)} jobs appended to data/ledger.jsonl")
+    print("==============================================\n")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Async Coordinator RPC Layer (EXPERIMENTAL)
+#
+# asyncio counterpart of rpc.py for the asyncio coordinator:
+#
+# - One client per wallet (get_async_wallet_client), each with a
+#   small pool of HTTP/1.1 keep-alive connections opened with
+#   asyncio streams, so many coroutines can have RPCs in flight
+#   at once without threads
+# - Same call / batch interface as rpc.WalletClient, as coroutines:
+#     balance = await client.getbalance()
+#     results = await client.batch([("getbalance",), ...])
+# - batch_wallets() awaits one JSON-RPC batch per wallet concurrently
+# - Same retry rule: a stale pooled connection is re-opened and the
+#   request re-sent once, never for spending RPCs
+#
+# Uses the RPC config from rpc.py and only the standard library
+# (plus JSONRPCException from python-bitcoinrpc).
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from bitcoinrpc.authproxy import JSONRPCException
+import asyncio
+import base64
+import decimal
+import json
+
+import rpc
+from rpc import MAX_IDLE_CONNECTIONS, NON_RETRYABLE_METHODS, encode_decimal, rpc_result
+
+# Errors raised when a pooled keep-alive connection was closed by the
+# node while idle.
+_STALE_CONNECTION_ERRORS = (
+    asyncio.IncompleteReadError,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class _StaleConnection(Exception):
+    pass
+
+
+# --- CLIENT ----------------------------------------------------------------
+
+class AsyncWalletClient:
+    """
+    Keep-alive asyncio JSON-RPC client bound to one wallet.
+    """
+
+    def __init__(self, wallet_name: str, host: str = None, port: int = None,
+                 user: str = None, password: str = None, timeout: float = rpc.HTTP_TIMEOUT):
+        user = rpc.RPC_USER if user is None else user
+        password = rpc.RPC_PASSWORD if password is None else password
+
+        self.wallet_name = wallet_name
+        self.host = rpc.RPC_HOST if host is None else host
+        self.port = rpc.RPC_PORT if port is None else port
+        self.timeout = timeout
+        self.path = f"/wallet/{wallet_name}"
+        self._auth_header = "Basic " + base64.b64encode(f"{user}:{password}".encode("utf8")).decode("ascii")
+        self._idle = []
+        self._next_id = 0
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+
+        async def method(*params):
+            return await self.call(name, *params)
+        return method
+
+    def __repr__(self):
+        return f"AsyncWalletClient({self.wallet_name!r}, {self.host}:{self.port})"
+
+    # --- Connection pool ---------------------------------------------------
+
+    async def _acquire(self):
+        """
+        Returns ((reader, writer), reused).
+        """
+        if self._idle:
+            return self._idle.pop(), True
+        conn = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        return conn, False
+
+    def _release(self, conn) -> None:
+        if len(self._idle) < MAX_IDLE_CONNECTIONS:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _ids(self, count: int):
+        first = self._next_id + 1
+        self._next_id += count
+        return range(first, first + count)
+
+    async def _exchange(self, conn, body: bytes):
+        """
+        Send one POST on `conn` and read the response.
+        Returns (status, content_type, data, keep_alive).
+        """
+        reader, writer = conn
+        head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"Authorization: {self._auth_header}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("ascii") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnection()
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+
+        return status, headers.get("content-type"), data, keep_alive
+
+    async def _post(self, payload, retryable: bool):
+        """
+        POST a JSON-RPC payload and return the decoded response body.
+        """
+        body = json.dumps(payload, default=encode_decimal).encode("utf8")
+
+        while True:
+            conn, reused = await self._acquire()
+            try:
+                status, content_type, data, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, body), self.timeout
+                )
+            except (_StaleConnection,) + _STALE_CONNECTION_ERRORS:
+                conn[1].close()
+                if reused and retryable:
+                    continue
+                raise ConnectionResetError(f"RPC connection to {self.host}:{self.port} closed") from None
+            except BaseException:
+                conn[1].close()
+                raise
+
+            if keep_alive:
+                self._release(conn)
+            else:
+                conn[1].close()
+            break
+
+        if content_type != "application/json":
+            raise JSONRPCException({
+                "code": -342,
+                "message": f"non-JSON HTTP response with '{status}' from server",
+            })
+        return json.loads(data.decode("utf8"), parse_float=decimal.Decimal)
+
+    # --- Calls -------------------------------------------------------------
+
+    async def call(self, method: str, *params):
+        """
+        Single JSON-RPC call; returns its result or raises JSONRPCException.
+        """
+        (request_id,) = self._ids(1)
+        payload = {"version": "1.1", "method": method, "params": list(params), "id": request_id}
+        response = await self._post(payload, method not in NON_RETRYABLE_METHODS)
+        return rpc_result(response)
+
+    async def batch(self, calls):
+        """
+        JSON-RPC batch: several calls in one HTTP round trip.
+        Returns the results in the same order as the calls.
+        """
+        calls = [tuple(c) for c in calls]
+        if not calls:
+            return []
+
+        ids = self._ids(len(calls))
+        payload = [
+            {"jsonrpc": "2.0", "method": method, "params": list(params), "id": request_id}
+            for request_id, (method, *params) in zip(ids, calls)
+        ]
+        retryable = all(c[0] not in NON_RETRYABLE_METHODS for c in calls)
+        responses = await self._post(payload, retryable)
+
+        if not isinstance(responses, list):
+            rpc_result(responses)
+            raise JSONRPCException({"code": -343, "message": "unexpected batch response"})
+
+        by_id = {r.get("id"): r for r in responses}
+        results = []
+        for request_id in ids:
+            if request_id not in by_id:
+                raise JSONRPCException({"code": -343, "message": "missing JSON-RPC batch response"})
+            results.append(rpc_result(by_id[request_id]))
+        return results
+
+
+# --- CLIENT REGISTRY -------------------------------------------------------
+# Clients hold asyncio streams, so they belong to the event loop that
+# created them; close_all() before the loop ends.
+
+_clients = {}
+
+
+def get_async_wallet_client(wallet_name: str) -> AsyncWalletClient:
+    """
+    Return the shared async client for a wallet, creating it on first use.
+    """
+    client = _clients.get(wallet_name)
+    if client is None:
+        client = AsyncWalletClient(wallet_name)
+        _clients[wallet_name] = client
+    return client
+
+
+async def close_all() -> None:
+    """
+    Close every shared client and forget it.
+    """
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+
+
+async def batch_wallets(calls_by_wallet):
+    """
+    Await one JSON-RPC batch per wallet, all wallets concurrently.
+
+    calls_by_wallet: {wallet_name: [(method, *params), ...]}
+    Returns {wallet_name: [results...]}.
+    """
+    names = list(calls_by_wallet)
+    results = await asyncio.gather(*(
+        get_async_wallet_client(name).batch(calls_by_wallet[name]) for name in names
+    ))
+    return dict(zip(names, results))
+
+
+async def ensure_regtest(client) -> None:
+    """
+    Async rpc.ensure_regtest(): check the node is on regtest, once per
+    process, before anything is derived or spent.
+    """
+    if not rpc.regtest_confirmed(client):
+        rpc.confirm_regtest(client, await client.getblockchaininfo())
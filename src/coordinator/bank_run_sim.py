@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Monte Carlo Bank-Run Simulator (EXPERIMENTAL)
+#
+# Simulates thousands of randomized redemption sequences against
+# the Redemption Pool, interleaved with new mints, using the exact
+# Tier 1/2/3 payout rules (batch_quote.quote_redemption_batch(),
+# identical to core.quote_redemption()).
+#
+# Each step, every run independently:
+#   - redeems with probability redeem_prob, raised by `panic` as
+#     coverage falls below baseline (run-on-the-pool feedback);
+#     size: exponential fraction of outstanding (mean redeem_frac),
+#     or a whale_frac redemption with probability whale_prob
+#   - otherwise mints with probability mint_prob (0.05–5 BTC deposit,
+#     20% to the pool, 30,000 cBTC per BTC); halted in Tier 3 when
+#     halt_mints is set ("issuance halt", docs/threat-model.md)
+#   - pays fee_sats per redemption from the pool, and loses
+#     shock_frac of the pool with probability shock_prob (Redemption
+#     Pool depletion, threat model 3.3)
+#
+# Tier 1/2 haircuts keep coverage ≥ 50% by themselves, so Tier 3 is
+# only reached through fees and pool shocks.
+#
+# Per run: minimum / final coverage, first step in Tier 3, steps per
+# tier, and payout fairness (BTC paid per cBTC relative to the
+# floor, first- vs last-quarter redeemers, Gini of payout rates).
+#
+# Runs are vectorized (NumPy arrays over runs, one loop over steps),
+# split into fixed-size chunks seeded from one SeedSequence and
+# spread over worker processes: the same --seed gives the same
+# results for any --workers.
+#
+# Usage:
+#   python src/coordinator/bank_run_sim.py [--scenario steady|run|drain]
+#       [--runs N] [--steps N] [--seed S] [--workers N]
+#       [--outstanding-cbtc X] [--coverage C] [--redeem-prob P]
+#       [--redeem-frac F] [--panic K] [--mint-prob P] [--fee-sats N]
+#       [--shock-prob P] [--shock-frac F] [--json]
+#
+# Dependencies:
+#   pip install numpy
+#
+# ⚠️ For reasoning and testing only. Not production code.
+# ------------------------------------------------------------
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from batch_quote import _round_half_even, quote_redemption_batch
+from core import BASELINE_COVERAGE, MC_PER_CBTC, SATS_PER_BTC, TIER_PROTECTION
+
+# --- PARAMETERS ------------------------------------------------------------
+
+# Runs per chunk (the unit of seeding and of work per process)
+CHUNK_RUNS = 512
+
+# Floor payout: 0.00001 BTC per cBTC
+FLOOR_SATS_PER_CBTC = SATS_PER_BTC // 100_000
+
+MIN_DEPOSIT_SATS = 5_000_000       # 0.05 BTC
+MAX_DEPOSIT_SATS = 500_000_000     # 5 BTC
+
+BASELINE = float(BASELINE_COVERAGE)
+
+SCENARIOS = {
+    # Ordinary churn: balanced mints and small redemptions
+    "steady": {
+        "redeem_prob": 0.30, "redeem_frac": 0.002, "whale_prob": 0.0, "whale_frac": 0.0,
+        "panic": 0.0, "mint_prob": 0.40, "halt_mints": True,
+        "fee_sats": 1_000, "shock_prob": 0.0, "shock_frac": 0.0,
+    },
+    # Run on the pool: redemptions dominate and accelerate as coverage falls
+    "run": {
+        "redeem_prob": 0.60, "redeem_frac": 0.01, "whale_prob": 0.01, "whale_frac": 0.10,
+        "panic": 1.5, "mint_prob": 0.10, "halt_mints": True,
+        "fee_sats": 1_000, "shock_prob": 0.0, "shock_frac": 0.0,
+    },
+    # Redemption Pool depletion: a run plus repeated pool losses
+    "drain": {
+        "redeem_prob": 0.60, "redeem_frac": 0.01, "whale_prob": 0.01, "whale_frac": 0.10,
+        "panic": 1.5, "mint_prob": 0.10, "halt_mints": True,
+        "fee_sats": 1_000, "shock_prob": 0.01, "shock_frac": 0.05,
+    },
+}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# --- SIMULATION ------------------------------------------------------------
+
+def simulate_chunk(params, n_runs: int, seed_seq):
+    """
+    Simulate n_runs independent runs of params["steps"] steps.
+    Returns {stat_name: array over runs}.
+    """
+    rng = np.random.default_rng(seed_seq)
+    steps = params["steps"]
+
+    O = np.full(n_runs, params["outstanding_mC"], dtype=np.int64)
+    P = np.full(n_runs, params["pool_sats"], dtype=np.int64)
+
+    min_coverage = P / O
+    tier3_step = np.full(n_runs, -1, dtype=np.int64)
+    steps_in_tier = np.zeros((3, n_runs), dtype=np.int64)
+    redeemed_mC = np.zeros(n_runs, dtype=np.int64)
+    paid_sats = np.zeros(n_runs, dtype=np.int64)
+    fees_sats = np.zeros(n_runs, dtype=np.int64)
+    shocks_sats = np.zeros(n_runs, dtype=np.int64)
+    rates = np.full((n_runs, steps), np.nan)   # BTC paid per cBTC / floor, per redemption
+
+    for step in range(steps):
+        live = O > 0
+        coverage = np.where(live, P / np.maximum(O, 1), 0.0)
+        in_tier3 = live & (2 * P < O)
+
+        # --- Redemptions ---------------------------------------------------
+        stress = np.clip((BASELINE - coverage) / BASELINE, 0.0, 1.0)
+        redeem_prob = np.clip(params["redeem_prob"] * (1.0 + params["panic"] * stress), 0.0, 1.0)
+        redeem = live & (rng.random(n_runs) < redeem_prob)
+
+        frac = rng.exponential(params["redeem_frac"], n_runs)
+        whale = rng.random(n_runs) < params["whale_prob"]
+        frac = np.where(whale, params["whale_frac"], frac)
+
+        idx = np.flatnonzero(redeem)
+        if idx.size:
+            R = np.clip(np.ceil(frac[idx] * O[idx]).astype(np.int64), 1, O[idx])
+            quote = quote_redemption_batch(O[idx], P[idx], R)
+            paid = quote.btc_paid_sats
+            rates[idx, step] = paid * MC_PER_CBTC / (R * FLOOR_SATS_PER_CBTC)
+            redeemed_mC[idx] += R
+            paid_sats[idx] += paid
+            O[idx] -= R
+            P[idx] = quote.pool_after_sats
+
+            fee = np.minimum(params["fee_sats"], P[idx])
+            P[idx] -= fee
+            fees_sats[idx] += fee
+
+        # --- Mints ---------------------------------------------------------
+        mint = ~redeem & (rng.random(n_runs) < params["mint_prob"])
+        if params["halt_mints"]:
+            mint &= ~in_tier3
+        deposit = rng.integers(MIN_DEPOSIT_SATS, MAX_DEPOSIT_SATS + 1, n_runs)
+        # Same rounding as open_mint_channel.split_deposit(), in sats / mC
+        P += np.where(mint, _round_half_even(2 * deposit, 10), 0)
+        O += np.where(mint, _round_half_even(3 * deposit, 10), 0)
+
+        # --- Pool shocks ---------------------------------------------------
+        shock = rng.random(n_runs) < params["shock_prob"]
+        loss = np.where(shock, (P * params["shock_frac"]).astype(np.int64), 0)
+        P -= loss
+        shocks_sats += loss
+
+        # --- End-of-step state ---------------------------------------------
+        live = O > 0
+        coverage = np.where(live, P / np.maximum(O, 1), np.inf)
+        np.minimum(min_coverage, coverage, out=min_coverage)
+
+        t1 = live & (5 * P >= 3 * O)
+        t3 = live & (2 * P < O)
+        steps_in_tier[0] += t1
+        steps_in_tier[1] += live & ~t1 & ~t3
+        steps_in_tier[2] += t3
+        tier3_step[(tier3_step < 0) & t3] = step + 1
+
+    final_coverage = np.where(O > 0, P / np.maximum(O, 1), np.nan)
+    stats = {
+        "min_coverage": np.where(np.isfinite(min_coverage), min_coverage, np.nan),
+        "final_coverage": final_coverage,
+        "tier3_step": tier3_step,
+        "steps_tier1": steps_in_tier[0],
+        "steps_tier2": steps_in_tier[1],
+        "steps_tier3": steps_in_tier[2],
+        "redeemed_mC": redeemed_mC,
+        "paid_sats": paid_sats,
+        "fees_sats": fees_sats,
+        "shocks_sats": shocks_sats,
+    }
+    stats.update(fairness(rates))
+    return stats
+
+
+def fairness(rates):
+    """
+    Per-run payout fairness from the (runs × steps) matrix of payout
+    rates relative to the floor (NaN where a run did not redeem).
+    """
+    valid = ~np.isnan(rates)
+    count = valid.sum(axis=1)
+    values = np.where(valid, rates, 0.0)
+
+    # First / last quarter of each run's redemptions, in time order
+    rank = np.cumsum(valid, axis=1)
+    quarter = np.maximum((count + 3) // 4, 1)[:, None]
+    first = valid & (rank <= quarter)
+    last = valid & (rank > count[:, None] - quarter)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_rate = (values * first).sum(axis=1) / first.sum(axis=1)
+        last_rate = (values * last).sum(axis=1) / last.sum(axis=1)
+
+        # Gini of per-redemption rates: 0 = everyone paid the same rate
+        ordered = np.sort(rates, axis=1)           # NaN sort last
+        ordered = np.where(np.isnan(ordered), 0.0, ordered)
+        i = np.arange(1, rates.shape[1] + 1)
+        total = ordered.sum(axis=1)
+        gini = (2.0 * (ordered * i).sum(axis=1) / (count * total)) - (count + 1.0) / count
+
+    below_floor = (valid & (rates < 1.0 - 1e-12)).sum(axis=1)
+    return {
+        "redemptions": count,
+        "redemptions_below_floor": below_floor,
+        "first_quarter_rate": first_rate,
+        "last_quarter_rate": last_rate,
+        "rate_gini": np.where(count > 1, gini, np.nan),
+    }
+
+
+def _simulate_job(job):
+    params, n_runs, seed_seq = job
+    return simulate_chunk(params, n_runs, seed_seq)
+
+
+def run_simulation(params, runs: int, seed: int, workers: int = 1):
+    """
+    Simulate `runs` runs in CHUNK_RUNS chunks. Returns {stat_name:
+    array over all runs}, in the same order for any worker count.
+    """
+    sizes = [CHUNK_RUNS] * (runs // CHUNK_RUNS)
+    if runs % CHUNK_RUNS:
+        sizes.append(runs % CHUNK_RUNS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(params, n_runs, seed_seq) for n_runs, seed_seq in zip(sizes, seeds)]
+
+    if workers <= 1 or len(jobs) == 1:
+        results = [_simulate_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_simulate_job, jobs))
+
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+
+# --- SUMMARY ---------------------------------------------------------------
+
+def _percentiles(values):
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def summarize(stats, steps: int):
+    runs = stats["tier3_step"].size
+    hit = stats["tier3_step"] > 0
+    redeemed = stats["redeemed_mC"].sum()
+    total_steps = runs * steps
+
+    return {
+        "runs": int(runs),
+        "steps": steps,
+        "min_coverage": _percentiles(stats["min_coverage"]),
+        "final_coverage": _percentiles(stats["final_coverage"]),
+        "tier3_share": float(hit.mean()),
+        "tier3_step": _percentiles(stats["tier3_step"][hit].astype(float)),
+        "tier_share": {
+            f"tier{t}": float(stats[f"steps_tier{t}"].sum() / total_steps) for t in (1, 2, 3)
+        },
+        "redemptions": int(stats["redemptions"].sum()),
+        "redemptions_below_floor_share": (
+            float(stats["redemptions_below_floor"].sum() / stats["redemptions"].sum())
+            if stats["redemptions"].sum() else None
+        ),
+        "paid_vs_floor": (
+            float(stats["paid_sats"].sum() * MC_PER_CBTC / (redeemed * FLOOR_SATS_PER_CBTC)) if redeemed else None
+        ),
+        "first_quarter_rate": _percentiles(stats["first_quarter_rate"]),
+        "last_quarter_rate": _percentiles(stats["last_quarter_rate"]),
+        "rate_gini": _percentiles(stats["rate_gini"]),
+        "fees_btc": float(stats["fees_sats"].sum() / SATS_PER_BTC / runs),
+        "shocks_btc": float(stats["shocks_sats"].sum() / SATS_PER_BTC / runs),
+    }
+
+
+def _fmt(dist, pct: bool = True) -> str:
+    if dist is None:
+        return "n/a"
+    scale, unit = (100.0, "%") if pct else (1.0, "")
+    return "  ".join(f"{name} {value * scale:.2f}{unit}" for name, value in dist.items())
+
+
+def print_summary(summary, scenario: str) -> None:
+    print("\n=== cBTC Bank-Run Simulation (Monte Carlo) ===")
+    print(f"Scenario:              {scenario}")
+    print(f"Runs × steps:          {summary['runs']} × {summary['steps']}")
+    print("----------------------------------------------")
+    print(f"Min coverage:          {_fmt(summary['min_coverage'])}")
+    print(f"Final coverage:        {_fmt(summary['final_coverage'])}")
+    print(f"Step share by tier:    " + "  ".join(
+        f"Tier {t} {summary['tier_share'][f'tier{t}'] * 100:.2f}%" for t in (1, 2, 3)))
+    print(f"Runs reaching Tier 3:  {summary['tier3_share'] * 100:.2f}%")
+    print(f"Time to Tier 3 (step): {_fmt(summary['tier3_step'], pct=False)}")
+    print("----------------------------------------------")
+    print(f"Redemptions:           {summary['redemptions']}")
+    if summary["paid_vs_floor"] is not None:
+        print(f"Paid vs floor value:   {summary['paid_vs_floor'] * 100:.4f}%")
+        print(f"Paid below floor:      {summary['redemptions_below_floor_share'] * 100:.2f}% of redemptions")
+    print(f"First-quarter rate:    {_fmt(summary['first_quarter_rate'])}  (of floor)")
+    print(f"Last-quarter rate:     {_fmt(summary['last_quarter_rate'])}  (of floor)")
+    print(f"Payout-rate Gini:      {_fmt(summary['rate_gini'], pct=False)}")
+    print(f"Fees / shocks per run: {summary['fees_btc']:.8f} / {summary['shocks_btc']:.8f} BTC")
+    print("==============================================\n")
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC Monte Carlo bank-run simulator")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="run")
+    parser.add_argument("--runs", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--outstanding-cbtc", type=float, default=1_000_000.0)
+    parser.add_argument("--coverage", type=float, default=BASELINE,
+                        help="initial absolute coverage (default: baseline 66.67%%)")
+    for name in ("redeem_prob", "redeem_frac", "whale_prob", "whale_frac", "panic",
+                 "mint_prob", "shock_prob", "shock_frac"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, dest=name)
+    parser.add_argument("--fee-sats", type=int, dest="fee_sats")
+    parser.add_argument("--no-mint-halt", action="store_true", help="keep minting in Tier 3")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    params = dict(SCENARIOS[args.scenario])
+    for name in params:
+        value = getattr(args, name, None)
+        if value is not None:
+            params[name] = value
+    if args.no_mint_halt:
+        params["halt_mints"] = False
+
+    outstanding_mC = int(round(args.outstanding_cbtc * MC_PER_CBTC))
+    params.update({
+        "steps": args.steps,
+        "outstanding_mC": outstanding_mC,
+        # Floor liability in sats == outstanding mC
+        "pool_sats": int(round(args.coverage * outstanding_mC)),
+    })
+
+    if args.runs <= 0 or args.steps <= 0 or outstanding_mC <= 0 or params["pool_sats"] < 0:
+        print("[ERROR] runs, steps and outstanding cBTC must be > 0, coverage ≥ 0.")
+        sys.exit(1)
+    if not all(0.0 <= params[name] <= 1.0 for name in ("redeem_prob", "whale_prob", "whale_frac",
+                                                         "mint_prob", "shock_prob", "shock_frac")):
+        print("[ERROR] Probabilities and fractions must be between 0 and 1.")
+        sys.exit(1)
+    if params["redeem_frac"] < 0 or params["panic"] < 0 or params["fee_sats"] < 0:
+        print("[ERROR] --redeem-frac, --panic and --fee-sats must be ≥ 0.")
+        sys.exit(1)
+
+    stats = run_simulation(params, args.runs, args.seed, args.workers)
+    summary = summarize(stats, args.steps)
+
+    if args.json:
+        print(json.dumps({"scenario": args.scenario, "params": params, "summary": summary}, indent=2, sort_keys=True))
+    else:
+        print_summary(summary, args.scenario)
+
+
+if __name__ == "__main__":
+    main()
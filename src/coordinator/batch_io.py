@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Scripted Request I/O (EXPERIMENTAL)
+#
+# Non-interactive input and JSON output shared by redeem_cbtc.py
+# and calc_redemption_rate.py, so they can be driven by load tests
+# and job runners instead of input():
+#
+# - Mode from the command line:
+#     (no arguments)        interactive, as before
+#     <value> ...           one request from the arguments
+#     --json                requests from stdin
+#     --file PATH           requests from PATH
+# - Requests: a JSON object, a JSON array of objects, or JSON Lines
+#   (one object per line)
+# - Results: JSON Lines on stdout, one per request and in request
+#   order, with "index" (0-based), the request's "id" if it had one,
+#   and "ok"; failures carry "error" and do not stop the batch (a
+#   JSON Lines line that is not a JSON object is one such failure)
+# - JSON numbers are read as Decimal, so "amount": 0.1 is exactly
+#   0.1 (quoting them as strings works too); amounts too large to
+#   convert to mC / sats are rejected per request, like any other
+#   invalid field
+#
+# Standard library and core.py only (json is imported on first use).
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+import sys
+
+from core import parse_amount
+
+
+class UsageError(Exception):
+    pass
+
+
+def parse_batch_args(argv, flags=()):
+    """
+    Split a script's arguments into (source, positionals, set flags).
+    source is None (interactive or argument mode), "-" (stdin) or a
+    file path.
+    """
+    source = None
+    positionals = []
+    set_flags = set()
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--json":
+            source = "-"
+        elif arg == "--file":
+            if not args:
+                raise UsageError("--file needs a path")
+            source = args.pop(0)
+        elif arg.startswith("--file="):
+            source = arg[len("--file="):]
+        elif arg.startswith("--") and arg[2:] in flags:
+            set_flags.add(arg[2:])
+        elif arg.startswith("--"):
+            raise UsageError(f"unknown option {arg}")
+        else:
+            positionals.append(arg)
+    if source is not None and positionals:
+        raise UsageError("give requests either as arguments or with --json / --file, not both")
+    return source, positionals, set_flags
+
+
+class InvalidRequest:
+    """
+    Stands in for an input line that could not be parsed, so it is
+    reported as a failed result in its place.
+    """
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def read_requests(source: str):
+    """
+    Load the requests from stdin ("-") or a file. Returns a list with
+    one entry per request; a JSON Lines line that is not valid JSON
+    becomes an InvalidRequest. Raises ValueError if a JSON array or
+    object input is not valid JSON as a whole.
+    """
+    import json
+
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    stripped = text.strip()
+    if not stripped:
+        return []
+    if stripped.startswith("["):
+        return json.loads(stripped, parse_float=Decimal)
+    try:
+        return [json.loads(stripped, parse_float=Decimal)]
+    except ValueError:
+        pass
+
+    requests = []
+    for line_no, line in enumerate(stripped.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            requests.append(json.loads(line, parse_float=Decimal))
+        except ValueError as e:
+            requests.append(InvalidRequest(f"line {line_no}: invalid JSON ({e})"))
+    return requests
+
+
+def require_object(request):
+    """
+    Raise ValueError unless `request` is a JSON object (dict).
+    """
+    if isinstance(request, InvalidRequest):
+        raise ValueError(request.error)
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    return request
+
+
+def request_decimal(request, key: str, places: int = None) -> Decimal:
+    """
+    A field of a request object as a finite Decimal (core.parse_amount(),
+    so `places` bounds it the same way); raises ValueError otherwise.
+    """
+    require_object(request)
+    if request.get(key) is None:
+        raise ValueError(f"missing {key}")
+    return parse_amount(request[key], key, places)
+
+
+def result_for(index: int, request, **fields):
+    """
+    Result object for request #index, echoing its "id".
+    """
+    result = {"index": index}
+    if isinstance(request, dict) and "id" in request:
+        result["id"] = request["id"]
+    result.update(fields)
+    return result
+
+
+def emit(result, out=None) -> None:
+    """
+    Write one result as a JSON line and flush it.
+    """
+    import json
+
+    out = sys.stdout if out is None else out
+    out.write(json.dumps(result, sort_keys=True, default=str) + "\n")
+    out.flush()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Batch Mint (EXPERIMENTAL)
+#
+# Opens many Minting Channels at once from a manifest of
+# (CP wallet, deposit) rows:
+#
+# - Every row is validated before any RPC call: readable deposit,
+#   MIN_DEPOSIT ≤ D ≤ MAX_DEPOSIT, CP wallet named. All problems
+#   are reported together and nothing is sent
+# - Destinations for the whole manifest come from one JSON-RPC batch
+#   per wallet (all wallets concurrently): each CP's chain check,
+#   balance and principal addresses, plus one REDEMPTION_POOL and
+#   one YIELD_POOL address per mint
+# - Each CP's total deposit is checked against its balance, again
+#   before anything is sent
+# - One sendmany per CP pays the principal / redemption / yield
+#   shares of all its mints (three outputs per mint, same split as
+#   open_mint_channel.py)
+# - All mint events are committed in a single ledger append. Each
+#   carries its transaction's txid and "batch_size" (mints paid by
+#   that transaction)
+#
+# If a sendmany fails part-way, the mints already paid are still
+# logged, and the remaining rows are reported as not sent.
+#
+# Manifest: CSV with one "<cp_wallet>,<deposit_btc>" row per mint,
+# an optional "cp_wallet,deposit_btc" header, and # comments, e.g.
+#
+#   cp_wallet,deposit_btc
+#   CP1,1.0
+#   CP1,0.25
+#   CP2,5
+#
+# Usage:
+#   python src/coordinator/batch_mint.py <manifest.csv | -> [--dry-run]
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal, InvalidOperation, getcontext
+import argparse
+import csv
+import sys
+
+from core import format_cbtc_from_mC
+from ledger import LedgerLock, append_ledger_events
+from open_mint_channel import build_mint_event, mint_outputs, split_deposit, validate_deposit
+from rpc import REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME, batch_wallets, ensure_regtest, get_wallet_client
+
+getcontext().prec = 18
+
+MANIFEST_HEADER = ("cp_wallet", "deposit_btc")
+
+
+# --- MANIFEST --------------------------------------------------------------
+
+def parse_manifest(lines):
+    """
+    Read manifest rows. Returns (rows, errors): rows is a list of
+    (line_no, cp_wallet, deposit_btc) in manifest order, errors a list
+    of messages. A row is only returned if it passed validation.
+    """
+    rows = []
+    errors = []
+    for line_no, record in enumerate(csv.reader(lines), start=1):
+        fields = [field.strip() for field in record]
+        if not fields or not any(fields) or fields[0].startswith("#"):
+            continue
+        if line_no == 1 and tuple(f.lower() for f in fields) == MANIFEST_HEADER:
+            continue
+        if len(fields) != 2:
+            errors.append(f"line {line_no}: expected <cp_wallet>,<deposit_btc>")
+            continue
+
+        cp_wallet, raw_deposit = fields
+        if not cp_wallet:
+            errors.append(f"line {line_no}: no CP wallet")
+            continue
+        try:
+            deposit_btc = Decimal(raw_deposit)
+            if not deposit_btc.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            errors.append(f"line {line_no}: invalid deposit amount {raw_deposit!r}")
+            continue
+        try:
+            validate_deposit(deposit_btc)
+        except ValueError as e:
+            errors.append(f"line {line_no}: {e}")
+            continue
+        rows.append((line_no, cp_wallet, deposit_btc))
+    return rows, errors
+
+
+def group_by_cp(items, key):
+    """
+    {cp_wallet: [item, ...]} in order of first appearance.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+# --- PLANNING --------------------------------------------------------------
+
+def batch_prepare_calls(rows):
+    """
+    One JSON-RPC batch per wallet deriving every destination of the
+    manifest: {wallet_name: [(method, *params), ...]}. The chain is
+    checked by prepare_batch() before any of it runs.
+    """
+    calls = {}
+    for cp_wallet, cp_rows in group_by_cp(rows, key=lambda row: row[1]).items():
+        calls[cp_wallet] = [("getbalance",)]
+        calls[cp_wallet] += [("getnewaddress", f"{cp_wallet}_PRINCIPAL", "bech32")] * len(cp_rows)
+    calls[REDEMPTION_WALLET_NAME] = [("getnewaddress", "REDEMPTION_POOL", "bech32")] * len(rows)
+    calls[YIELD_WALLET_NAME] = [("getnewaddress", "YIELD_POOL", "bech32")] * len(rows)
+    return calls
+
+
+def build_batch_plans(rows, results):
+    """
+    Turn the results of batch_prepare_calls() into one mint plan per
+    row (same fields as open_mint_channel.build_mint_plan, without the
+    CP balance). Raises ValueError listing every CP that cannot fund
+    its deposits.
+    """
+    red_addresses = iter(results[REDEMPTION_WALLET_NAME])
+    yld_addresses = iter(results[YIELD_WALLET_NAME])
+    principal_addresses = {}
+    errors = []
+
+    for cp_wallet, cp_rows in group_by_cp(rows, key=lambda row: row[1]).items():
+        raw_cp_balance, *addresses = results[cp_wallet]
+        principal_addresses[cp_wallet] = iter(addresses)
+
+        cp_balance = Decimal(str(raw_cp_balance))
+        total = sum((deposit_btc for _, _, deposit_btc in cp_rows), Decimal(0))
+        if cp_balance < total:
+            errors.append(f"{cp_wallet} balance {cp_balance} BTC is less than its total deposit {total} BTC "
+                          f"({len(cp_rows)} mint(s)).")
+    if errors:
+        raise ValueError(" ".join(errors))
+
+    plans = []
+    for _, cp_wallet, deposit_btc in rows:
+        plan = split_deposit(deposit_btc)
+        plan.update({
+            "deposit_btc": deposit_btc,
+            "cp_wallet": cp_wallet,
+            "principal_address": next(principal_addresses[cp_wallet]),
+            "red_address": next(red_addresses),
+            "yld_address": next(yld_addresses),
+        })
+        plans.append(plan)
+    return plans
+
+
+def prepare_batch(rows):
+    """
+    Check the chain, then derive destinations and check balances for
+    validated manifest rows. Returns the mint plans; nothing is spent yet.
+    """
+    ensure_regtest(get_wallet_client(rows[0][1]))
+    return build_batch_plans(rows, batch_wallets(batch_prepare_calls(rows)))
+
+
+# --- EXECUTION -------------------------------------------------------------
+
+class BatchMintError(Exception):
+    """
+    A sendmany failed part-way; `events` holds the mints that were paid
+    and logged before it.
+    """
+
+    def __init__(self, message: str, events):
+        super().__init__(message)
+        self.events = events
+
+
+def execute_batch(plans):
+    """
+    Pay every CP's mints with one sendmany and log all mint events in
+    one append. Returns the events in ledger order (grouped by CP).
+    """
+    events = []
+    # Same reasoning as execute_mint: no redemption may be quoted
+    # against the larger pool before the new supply is logged.
+    with LedgerLock():
+        try:
+            for cp_wallet, cp_plans in group_by_cp(plans, key=lambda plan: plan["cp_wallet"]).items():
+                outputs = {}
+                for plan in cp_plans:
+                    outputs.update(mint_outputs(plan))
+                txid = get_wallet_client(cp_wallet).sendmany(
+                    "",              # empty string means: use default account (descriptor wallet)
+                    outputs,
+                    0,               # minconf
+                    "cBTC Minting Channel batch"
+                )
+                for plan in cp_plans:
+                    event = build_mint_event(plan, txid)
+                    event["batch_size"] = len(cp_plans)
+                    events.append(event)
+        except Exception as e:
+            # Paid mints must reach the ledger even if a later CP failed,
+            # whatever the failure (RPC error, dropped connection, ...)
+            if events:
+                append_ledger_events(events, lock_held=True)
+            raise BatchMintError(f"sendmany from {cp_wallet} failed: {e}", events) from None
+        append_ledger_events(events, lock_held=True)
+    return events
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC batch mint from a manifest")
+    parser.add_argument("manifest", help="CSV manifest of <cp_wallet>,<deposit_btc> rows ('-' for stdin)")
+    parser.add_argument("--dry-run", action="store_true", help="validate and plan only, send nothing")
+    args = parser.parse_args()
+
+    try:
+        if args.manifest == "-":
+            rows, errors = parse_manifest(sys.stdin)
+        else:
+            with open(args.manifest, "r", encoding="utf-8", newline="") as f:
+                rows, errors = parse_manifest(f)
+    except OSError as e:
+        print(f"[ERROR] Cannot read manifest: {e}")
+        sys.exit(1)
+
+    for error in errors:
+        print(f"[ERROR] {error}")
+    if errors:
+        print(f"[ERROR] {len(errors)} invalid row(s); nothing was sent.")
+        sys.exit(1)
+    if not rows:
+        print("[ERROR] Manifest has no mint rows.")
+        sys.exit(1)
+
+    try:
+        plans = prepare_batch(rows)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    cp_plans = group_by_cp(plans, key=lambda plan: plan["cp_wallet"])
+    total_deposit = sum((plan["deposit_btc"] for plan in plans), Decimal(0))
+    total_minted_mC = sum(plan["minted_mC"] for plan in plans)
+    print(f"[INFO] {len(plans)} mints from {len(cp_plans)} CP wallet(s), {total_deposit} BTC deposited")
+    for cp_wallet, group in cp_plans.items():
+        deposit = sum((plan["deposit_btc"] for plan in group), Decimal(0))
+        print(f"[INFO] {cp_wallet}: {len(group)} mint(s), {deposit} BTC")
+
+    if args.dry_run:
+        print(f"\n[RESULT] Dry run: would mint {format_cbtc_from_mC(total_minted_mC)} cBTC "
+              f"in {len(cp_plans)} transaction(s).")
+        return
+
+    try:
+        events = execute_batch(plans)
+    except BatchMintError as e:
+        print(f"[ERROR] {e}")
+        print(f"[WARN] {len(e.events)} mint(s) were paid and logged before the failure; "
+              f"{len(plans) - len(e.events)} were not sent.")
+        sys.exit(1)
+
+    print("\n[RESULT] Minting Channels opened successfully.")
+    for txid in dict.fromkeys(event["txid"] for event in events):
+        print(f"         Transaction ID: {txid}")
+    print(f"         Mints:          {len(events)}")
+    print(f"         Minted cBTC:    {format_cbtc_from_mC(total_minted_mC)} cBTC")
+
+    print("\n[NOTE] Events appended to data/ledger.jsonl in one append")
+    print("       (off-chain cBTC accounting for regtest simulations).")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[ERROR] {e}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Batch Redemption Quotes (EXPERIMENTAL)
+#
+# Vectorized version of core.quote_redemption() for stress
+# analysis over large grids of
+#   (outstanding milli-cBTC, Redemption Pool sats, request milli-cBTC)
+#
+# Applies the same Tier 1/2/3 rules with NumPy int64 masks per tier
+# and returns arrays of:
+#   - tier code (1, 2, 3)
+#   - BTC paid (sats)
+#   - redemption rate (sats per cBTC)
+#   - pool and floor liability after redemption (sats), from which
+#     post-redemption coverage follows
+#
+# Results match the scalar engine exactly. Rows the int64 path cannot
+# settle exactly (near-tie pro-rata payouts, products that would
+# overflow int64, amounts outside core's exact domain) are quoted one
+# by one with core.quote_redemption().
+#
+# Dependencies:
+#   pip install numpy
+#
+# ⚠️ For reasoning and testing only. Not production code.
+# ------------------------------------------------------------
+
+import numpy as np
+
+from core import (
+    DECIMAL_PRECISION,
+    EXACT_MAX_MC,
+    EXACT_MAX_SATS,
+    MC_PER_CBTC,
+    TIER_FULL_FLOOR,
+    TIER_HAIRCUT,
+    TIER_PROTECTION,
+    quote_redemption,
+)
+
+INT64_MAX = np.iinfo(np.int64).max
+_TIER3_ERROR_SCALE = 10**(DECIMAL_PRECISION - 1)
+
+
+class BatchRedemptionQuote:
+    """
+    Arrays of redemption quotes, one entry per input triple.
+    Integer fields are int64 (tier is int8).
+    """
+
+    __slots__ = (
+        "tier",
+        "btc_paid_sats",
+        "rate_sats_per_cbtc",
+        "pool_after_sats",
+        "liability_after_sats",
+    )
+
+    def __init__(self, tier, btc_paid_sats, rate_sats_per_cbtc, pool_after_sats, liability_after_sats):
+        self.tier = tier
+        self.btc_paid_sats = btc_paid_sats
+        self.rate_sats_per_cbtc = rate_sats_per_cbtc
+        self.pool_after_sats = pool_after_sats
+        self.liability_after_sats = liability_after_sats
+
+    def __len__(self):
+        return self.tier.size
+
+    @property
+    def coverage_after(self):
+        """
+        Post-redemption absolute coverage as float64 (NaN where nothing
+        remains outstanding). Exact value: pool_after / liability_after.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = self.pool_after_sats / self.liability_after_sats
+        return np.where(self.liability_after_sats > 0, coverage, np.nan)
+
+
+def _round_half_even(num, den):
+    """
+    Elementwise num / den rounded half-to-even (num >= 0, den > 0).
+    """
+    q, r = np.divmod(num, den)
+    r2 = r + r
+    return q + ((r2 > den) | ((r2 == den) & ((q & 1) == 1)))
+
+
+def quote_redemption_batch(outstanding_mC, pool_sats, request_mC) -> BatchRedemptionQuote:
+    """
+    Quote every (outstanding_mC, pool_sats, request_mC) triple.
+
+    Inputs are array-likes of integers and are broadcast against each
+    other. Raises ValueError if any row is not quotable (same rules as
+    core.quote_redemption()).
+    """
+    O, P, R = np.broadcast_arrays(
+        np.asarray(outstanding_mC, dtype=np.int64),
+        np.asarray(pool_sats, dtype=np.int64),
+        np.asarray(request_mC, dtype=np.int64),
+    )
+    shape = O.shape
+    O = O.ravel()
+    P = P.ravel()
+    R = R.ravel()
+
+    # --- Validation (same rules and messages as the scalar engine) --------
+    invalid = ~((R > 0) & (R <= O) & (P >= 0))
+    if invalid.any():
+        i = int(np.flatnonzero(invalid)[0])
+        try:
+            quote_redemption(int(O[i]), int(P[i]), int(R[i]))
+        except ValueError as e:
+            raise ValueError(f"row {i}: {e}") from None
+
+    n = O.size
+    tier = np.empty(n, dtype=np.int8)
+    btc_paid = np.zeros(n, dtype=np.int64)
+    rate = np.zeros(n, dtype=np.int64)
+
+    # Rows left for the scalar engine
+    scalar = (O > EXACT_MAX_MC) | (P > EXACT_MAX_SATS)
+    exact = ~scalar
+
+    L_before = O
+    L_after = O - R
+
+    # --- Tier classification by absolute coverage P / L_before ------------
+    t1 = exact & (5 * P >= 3 * L_before)
+    t2 = exact & ~t1 & (2 * P >= L_before)
+    t3 = exact & ~t1 & ~t2
+    tier[t1] = TIER_FULL_FLOOR
+    tier[t2] = TIER_HAIRCUT
+    tier[t3] = TIER_PROTECTION
+
+    # --- Tier 1 & Tier 2 ---------------------------------------------------
+    floor_tiers = t1 | t2
+
+    # Redeeming all outstanding cBTC: pay up to full floor, capped by pool
+    all_out = floor_tiers & (L_after == 0)
+    btc_paid[all_out] = np.minimum(R[all_out], P[all_out])
+
+    # Full floor keeps coverage ≥ 50%
+    full = floor_tiers & ~all_out & (P >= R) & (2 * (P - R) >= L_after)
+    btc_paid[full] = R[full]
+
+    # Haircut so that coverage_after = 50%: btc_paid = P - L_after / 2
+    haircut = floor_tiers & ~all_out & ~full
+    twice = 2 * P[haircut] - L_after[haircut]
+    candidate = np.where(twice > 0, _round_half_even(np.maximum(twice, 0), 2), 0)
+    btc_paid[haircut] = np.minimum(np.minimum(candidate, R[haircut]), P[haircut])
+
+    # --- Tier 3: strictly pro-rata -----------------------------------------
+    # btc_paid = P × R / O, half-even. Same near-tie test as the scalar
+    # engine; rows that fail it (or whose P × R would overflow int64) are
+    # quoted by core.quote_redemption().
+    fits = np.zeros(n, dtype=bool)
+    fits[t3] = P[t3] <= INT64_MAX // R[t3]
+    pro_rata = t3 & fits
+    scalar |= t3 & ~fits
+
+    num = P[pro_rata] * R[pro_rata]
+    den = O[pro_rata]
+    q, rem = np.divmod(num, den)
+    distance = np.abs(rem + rem - den)
+    safe = distance > (3 * (num // _TIER3_ERROR_SCALE) + 3)
+    q = q + ((rem + rem) > den)
+
+    rows = np.flatnonzero(pro_rata)
+    btc_paid[rows[safe]] = np.minimum(q[safe], P[rows[safe]])
+    scalar[rows[~safe]] = True
+
+    # --- Rates -------------------------------------------------------------
+    vector = exact & ~scalar
+    rate[vector] = _round_half_even(btc_paid[vector] * MC_PER_CBTC, R[vector])
+
+    # --- Scalar fallback ---------------------------------------------------
+    for i in np.flatnonzero(scalar):
+        quote = quote_redemption(int(O[i]), int(P[i]), int(R[i]))
+        tier[i] = quote.tier
+        btc_paid[i] = quote.btc_paid_sats
+        rate[i] = quote.rate_sats_per_cbtc
+
+    return BatchRedemptionQuote(
+        tier.reshape(shape),
+        btc_paid.reshape(shape),
+        rate.reshape(shape),
+        (P - btc_paid).reshape(shape),
+        L_after.reshape(shape),
+    )
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Coordinator Benchmark Suite (EXPERIMENTAL)
+#
+# Reproducible throughput / latency numbers for the coordinator's
+# hot paths, compared against a stored baseline:
+#
+#   ledger – on synthetic ledgers of each --sizes (10^3 … 10^7
+#            events):
+#              load_ledger() from data/ledger.jsonl and from a
+#              legacy data/ledger.json, sum_minted_and_redeemed_mC()
+#              over the loaded events and streamed from the log,
+#              load_supply_totals() cold (no checkpoint) and warm,
+#              append_ledger_event() (fsync'd, onto the full log)
+#   quote  – quote_redemption() (integer engine) and
+#            quote_redemption_decimal() over random inputs in all
+#            three tiers
+#   rpc    – against stub_node.py with each --rpc-latency-ms added
+#            per request: a mint with fresh addresses, a mint from
+#            the address pool, a redemption quote and a redemption
+#            (redeem_with_retry)
+#
+# Synthetic ledgers are generated from --seed, so every run and
+# every machine benchmarks the same events. --legacy-fraction of
+# them (the oldest, as after a migration) use the legacy format
+# (minted_cbtc / burned_cbtc only, no seq); the rest carry
+# minted_mC / burned_mC like events written today. Generated files
+# are cached under data/bench/ and reused.
+#
+# All benchmarks run against data/bench/, never the real ledger:
+# the ledger and its writer lock, the pool tracker and the address
+# pool are pointed there for the duration of the run, so a
+# benchmark never contends with a live coordinator.
+#
+# Each result has ops/s (from the median sample) and p50 / p99 of
+# the per-sample latency (one call; QUOTE_BATCH calls for quotes).
+#
+# Baseline (data/bench_baseline.json, not committed):
+#   - each machine records its own: run once with --save-baseline,
+#     and again to refresh it after an intended performance change
+#   - every result present in both runs is compared; lower ops/s or
+#     higher p99 beyond the tolerances is a regression (exit 1)
+#   - a baseline recorded in another environment is flagged
+#
+# load_ledger() keeps every event in memory, so it is skipped above
+# LOAD_LEDGER_MAX_EVENTS; the streamed scans cover those sizes.
+# save_ledger() no longer exists (the ledger is append-only);
+# append_ledger_event() is its replacement and is measured instead.
+#
+# Usage:
+#   python src/coordinator/bench_coordinator.py
+#       [--groups ledger,quote,rpc] [--sizes 1000,10000,100000]
+#       [--legacy-fraction 0.5] [--seed 1]
+#       [--rpc-latency-ms 0,1] [--rpc-ops 30] [--quotes 20000]
+#       [--baseline PATH] [--save-baseline]
+#       [--tolerance 0.25] [--p99-tolerance 0.5] [--json]
+#
+#   e.g. the full ledger range (about 3 GB of synthetic data):
+#   python src/coordinator/bench_coordinator.py --groups ledger
+#       --sizes 1000,10000,100000,1000000,10000000
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import time
+
+from core import quote_redemption, quote_redemption_decimal
+from ledger import REPO_ROOT, encode_event
+import address_pool as address_pool_mod
+import ledger as ledger_mod
+import pool_balance as pool_balance_mod
+import rpc
+
+BENCH_DIR = REPO_ROOT / "data" / "bench"
+BASELINE_PATH = REPO_ROOT / "data" / "bench_baseline.json"
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_LEGACY_FRACTION = 0.5
+DEFAULT_SEED = 1
+DEFAULT_RPC_LATENCIES_MS = (0, 1)
+DEFAULT_RPC_OPS = 30
+DEFAULT_QUOTES = 20000
+
+# Regression thresholds (relative to the baseline)
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_P99_TOLERANCE = 0.5
+# p99 changes smaller than this are noise, whatever the ratio
+MIN_P99_DELTA_MS = 0.05
+
+# load_ledger() holds every event in memory (~1 KB each)
+LOAD_LEDGER_MAX_EVENTS = 10 ** 6
+
+# Appends measured per ledger size
+APPEND_OPS = 50
+
+# Quotes per timed sample (a single quote is close to the clock's
+# resolution)
+QUOTE_BATCH = 100
+
+# Synthetic ledgers are written in chunks of this many events
+GENERATE_CHUNK = 10000
+
+SATS_PER_BTC = 100_000_000
+SYNTHETIC_EPOCH = datetime.datetime(2026, 1, 1)
+SYNTHETIC_CP_WALLETS = ("CP1", "CP2", "CP3")
+
+
+# --- SYNTHETIC LEDGERS -----------------------------------------------------
+
+def _btc(sats: int) -> str:
+    return f"{sats // SATS_PER_BTC}.{sats % SATS_PER_BTC:08d}"
+
+
+def _cbtc(mC: int) -> str:
+    return f"{mC // 1000}.{mC % 1000:03d}"
+
+
+def generate_events(n: int, legacy_fraction: float = DEFAULT_LEGACY_FRACTION, seed: int = DEFAULT_SEED):
+    """
+    Yield n deterministic ledger events (about 4 mints per redemption),
+    the first legacy_fraction of them in the legacy format. Supply and
+    pool never go negative, and redemptions pay the full floor.
+    """
+    rng = random.Random(seed)
+    legacy_count = int(n * legacy_fraction)
+    outstanding_mC = 0
+    pool_sats = 0
+
+    for i in range(n):
+        legacy = i < legacy_count
+        timestamp = (SYNTHETIC_EPOCH + datetime.timedelta(seconds=i)).isoformat() + ".000000Z"
+        txid = f"{rng.getrandbits(256):064x}"
+
+        if outstanding_mC > 0 and rng.random() < 0.2:
+            burned_mC = rng.randint(1, max(1, outstanding_mC // 20))
+            before_pct = pool_sats * 100 / outstanding_mC
+            outstanding_mC -= burned_mC
+            pool_sats -= burned_mC          # full floor: 1 mC → 1 sat
+            after = f"{pool_sats * 100 / outstanding_mC:.4f}%" if outstanding_mC else "N/A"
+            if legacy:
+                event = {
+                    "type": "redeem",
+                    "timestamp": timestamp,
+                    "burned_cbtc": _cbtc(burned_mC),
+                    "redeemed_cbtc": _cbtc(burned_mC),
+                    "btc_paid": _btc(burned_mC),
+                    "rate_btc_per_cbtc": "0.00001",
+                    "tier": "Tier 1 – Full floor",
+                    "txid": txid,
+                }
+            else:
+                event = {
+                    "type": "redeem",
+                    "timestamp": timestamp,
+                    "burned_cbtc": _cbtc(burned_mC),
+                    "burned_mC": burned_mC,
+                    "btc_paid": _btc(burned_mC),
+                    "redemption_rate": "0.00001000",
+                    "tier": "Tier 1 – Full floor",
+                    "txid": txid,
+                    "coverage_before": f"{before_pct:.4f}%",
+                    "coverage_after": after,
+                }
+        else:
+            # Deposit in whole 10-sat steps, so every share is exact
+            deposit_sats = rng.randrange(5_000_000, 500_000_001, 10)
+            minted_mC = deposit_sats * 3 // 10
+            redemption_sats = deposit_sats // 5
+            outstanding_mC += minted_mC
+            pool_sats += redemption_sats
+            event = {
+                "type": "mint",
+                "timestamp": timestamp,
+                "cp_wallet": rng.choice(SYNTHETIC_CP_WALLETS),
+                "deposit_btc": _btc(deposit_sats),
+                "principal_btc": _btc(deposit_sats * 7 // 10),
+                "redemption_btc": _btc(redemption_sats),
+                "yield_btc": _btc(deposit_sats // 10),
+                "minted_cbtc": _cbtc(minted_mC),
+                "txid": txid,
+            }
+            if not legacy:
+                event["minted_mC"] = minted_mC
+
+        if not legacy:
+            event["seq"] = i + 1
+        yield event
+
+
+def synthetic_ledger(n: int, legacy_fraction: float, seed: int):
+    """
+    Directory holding the synthetic ledger of n events, generated on
+    first use: log/ledger.jsonl and, up to LOAD_LEDGER_MAX_EVENTS,
+    legacy/ledger.json with the same events.
+    """
+    directory = BENCH_DIR / f"ledger-{n}-{legacy_fraction:g}-{seed}"
+    done_marker = directory / "complete"
+    if done_marker.exists():
+        return directory
+
+    shutil.rmtree(directory, ignore_errors=True)
+    (directory / "log").mkdir(parents=True)
+    (directory / "legacy").mkdir()
+    legacy_path = directory / "legacy" / "ledger.json"
+
+    with (directory / "log" / "ledger.jsonl").open("wb") as log, \
+            (legacy_path.open("wb") if n <= LOAD_LEDGER_MAX_EVENTS else open(os.devnull, "wb")) as legacy:
+        def flush(lines, first: bool) -> None:
+            log.write(b"".join(lines))
+            legacy.write((b"" if first else b",\n") + b",\n".join(line.rstrip(b"\n") for line in lines))
+
+        legacy.write(b'{\n  "events": [\n')
+        chunk = []
+        for i, event in enumerate(generate_events(n, legacy_fraction, seed)):
+            chunk.append(encode_event(event))
+            if len(chunk) == GENERATE_CHUNK:
+                flush(chunk, first=i < GENERATE_CHUNK)
+                chunk = []
+        if chunk:
+            flush(chunk, first=n <= GENERATE_CHUNK)
+        legacy.write(b'\n  ]\n}\n')
+
+    done_marker.write_text(f"{n}\n", encoding="utf-8")
+    return directory
+
+
+@contextmanager
+def isolated_data_dir(directory):
+    """
+    Point the ledger (JSONL backend) and its writer lock, pool tracker
+    and address pool at `directory` and drop their per-process caches;
+    restored on exit.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    patches = [
+        (ledger_mod, "LEDGER_PATH", directory / "ledger.jsonl"),
+        (ledger_mod, "LEGACY_LEDGER_PATH", directory / "ledger.json"),
+        (ledger_mod, "CHECKPOINT_PATH", directory / "ledger.checkpoint.json"),
+        (ledger_mod, "LOCK_PATH", directory / "ledger.lock"),
+        (ledger_mod, "LEDGER_BACKEND", "jsonl"),
+        (ledger_mod, "_process_totals", None),
+        (pool_balance_mod, "POOL_BALANCE_PATH", directory / "pool_balance.json"),
+        (pool_balance_mod, "_tracker", None),
+        (address_pool_mod, "ADDRESS_POOL_PATH", directory / "address_pool.json"),
+        (address_pool_mod, "ADDRESS_POOL_LOCK_PATH", directory / "address_pool.lock"),
+        (address_pool_mod, "ISSUED_LOG_PATH", directory / "address_pool_issued.jsonl"),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        yield directory
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+# --- MEASUREMENT -----------------------------------------------------------
+
+def percentile(sorted_values, fraction: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, ops_per_sample: int = 1):
+    """
+    Result dict for per-sample durations (seconds), each covering
+    ops_per_sample operations.
+    """
+    samples = sorted(samples)
+    median = statistics.median(samples)
+    return {
+        "samples": len(samples),
+        "ops_per_sample": ops_per_sample,
+        "ops_per_s": ops_per_sample / median if median > 0 else float("inf"),
+        "p50_ms": median * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+    }
+
+
+def measure(fn, repeat: int, ops_per_sample: int = 1, warmup: int = 1, setup=None):
+    """
+    Time `repeat` calls of fn() (after `warmup` untimed ones); setup(),
+    if given, runs untimed before every call.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarize(samples, ops_per_sample)
+
+
+def repeats_for(n: int) -> int:
+    """
+    Samples for a whole-ledger operation: more for small ledgers.
+    """
+    return max(3, min(30, 300000 // max(n, 1)))
+
+
+def warmups_for(n: int) -> int:
+    """
+    Untimed runs before a whole-ledger operation; none for ledgers
+    big enough that one run takes many seconds.
+    """
+    return 1 if n < LOAD_LEDGER_MAX_EVENTS else 0
+
+
+# --- LEDGER ----------------------------------------------------------------
+
+def bench_ledger(sizes, legacy_fraction: float, seed: int, report):
+    for n in sizes:
+        started = time.perf_counter()
+        directory = synthetic_ledger(n, legacy_fraction, seed)
+        generated = time.perf_counter() - started
+        if generated > 1:
+            print(f"[INFO] Synthetic ledger of {n} events ready ({generated:.1f} s)", file=sys.stderr)
+        repeat = repeats_for(n)
+        warmup = warmups_for(n)
+
+        with isolated_data_dir(directory / "legacy"):
+            if n <= LOAD_LEDGER_MAX_EVENTS:
+                report(f"ledger.load_ledger.legacy[n={n}]",
+                       measure(ledger_mod.load_ledger, repeat, ops_per_sample=n, warmup=warmup))
+
+        with isolated_data_dir(directory / "log"):
+            checkpoint_path = ledger_mod.CHECKPOINT_PATH
+
+            def drop_checkpoint():
+                checkpoint_path.unlink(missing_ok=True)
+
+            if n <= LOAD_LEDGER_MAX_EVENTS:
+                report(f"ledger.load_ledger[n={n}]",
+                       measure(ledger_mod.load_ledger, repeat, ops_per_sample=n, warmup=warmup))
+                events = ledger_mod.load_ledger()["events"]
+                report(f"ledger.sum_minted_and_redeemed_mC[n={n}]",
+                       measure(lambda: ledger_mod.sum_minted_and_redeemed_mC(events), repeat, ops_per_sample=n,
+                               warmup=warmup))
+                del events
+
+            report(f"ledger.sum_minted_and_redeemed_mC.stream[n={n}]",
+                   measure(lambda: ledger_mod.sum_minted_and_redeemed_mC(ledger_mod.iter_events()),
+                           repeat, ops_per_sample=n, warmup=warmup))
+            report(f"ledger.load_supply_totals.cold[n={n}]",
+                   measure(ledger_mod.load_supply_totals, repeat, ops_per_sample=n, warmup=warmup,
+                           setup=drop_checkpoint))
+            report(f"ledger.load_supply_totals.warm[n={n}]",
+                   measure(ledger_mod.load_supply_totals, 200))
+
+            log_path = ledger_mod.LEDGER_PATH
+            size = log_path.stat().st_size
+            try:
+                report(f"ledger.append_ledger_event[n={n}]",
+                       measure(lambda: ledger_mod.append_ledger_event(
+                           {"type": "bench", "timestamp": SYNTHETIC_EPOCH.isoformat() + "Z"}), APPEND_OPS))
+            finally:
+                # Keep the cached synthetic ledger as generated
+                os.truncate(log_path, size)
+                drop_checkpoint()
+
+
+# --- QUOTES ----------------------------------------------------------------
+
+def quote_inputs(count: int, seed: int):
+    """
+    Deterministic (outstanding_mC, pool_sats, request_mC) triples spread
+    over the three tiers.
+    """
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        outstanding_mC = rng.randint(1_000, 10 ** 12)
+        coverage = rng.choice((0.3, 0.45, 0.55, 0.65, 1.2)) * rng.uniform(0.9, 1.1)
+        pool_sats = int(outstanding_mC * coverage)
+        request_mC = rng.randint(1, outstanding_mC)
+        inputs.append((outstanding_mC, pool_sats, request_mC))
+    return inputs
+
+
+def bench_quotes(count: int, seed: int, report):
+    inputs = quote_inputs(count, seed)
+    batches = [inputs[i:i + QUOTE_BATCH] for i in range(0, len(inputs) - QUOTE_BATCH + 1, QUOTE_BATCH)]
+    for name, engine in (("quote.quote_redemption", quote_redemption),
+                         ("quote.quote_redemption_decimal", quote_redemption_decimal)):
+        for args in batches[0]:
+            engine(*args)
+        samples = []
+        clock = time.perf_counter
+        for batch in batches:
+            start = clock()
+            for args in batch:
+                engine(*args)
+            samples.append(clock() - start)
+        report(name, summarize(samples, QUOTE_BATCH))
+
+
+# --- RPC -------------------------------------------------------------------
+
+def bench_rpc(latencies_ms, ops: int, report):
+    # Imported here: the ledger / quote groups need no RPC stack
+    from address_pool import LOW_WATER, AddressPool, mint_labels
+    from open_mint_channel import execute_mint, prepare_mint
+    from redeem_cbtc import quote_current_redemption, redeem_with_retry
+    from stub_node import start_stub_node
+
+    server, node = start_stub_node()
+    saved_port = rpc.RPC_PORT
+    rpc.RPC_PORT = server.server_address[1]
+    try:
+        for latency_ms in latencies_ms:
+            node.latency = latency_ms / 1000
+            directory = BENCH_DIR / "rpc"
+            shutil.rmtree(directory, ignore_errors=True)
+            with isolated_data_dir(directory):
+                deposit = Decimal("0.1")
+                report(f"rpc.mint[latency_ms={latency_ms:g}]",
+                       measure(lambda: execute_mint(prepare_mint(deposit, "CP1")), ops))
+
+                # Large enough that no refill happens while measuring
+                pool = AddressPool(refill_batch=ops + LOW_WATER + 2, background=False)
+                pool.fill(mint_labels("CP2"))
+                report(f"rpc.mint.address_pool[latency_ms={latency_ms:g}]",
+                       measure(lambda: execute_mint(prepare_mint(deposit, "CP2", address_pool=pool)), ops))
+
+                report(f"rpc.quote_current_redemption[latency_ms={latency_ms:g}]",
+                       measure(lambda: quote_current_redemption(1000), ops))
+
+                address = rpc.get_wallet_client("CP3").getnewaddress("BENCH", "bech32")
+                report(f"rpc.redeem[latency_ms={latency_ms:g}]",
+                       measure(lambda: redeem_with_retry(1000, address), ops))
+            shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        rpc.close_all()
+        rpc.RPC_PORT = saved_port
+        server.shutdown()
+        server.server_close()
+
+
+# --- BASELINE --------------------------------------------------------------
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, config) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+            "environment": environment(),
+            "config": config,
+            "results": results,
+        }, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compare(results, baseline_results, tolerance: float, p99_tolerance: float):
+    """
+    Returns [(name, message)] for every result that regressed against
+    the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline_results.get(name)
+        if base is None:
+            continue
+        if result["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            regressions.append((name, f"throughput {result['ops_per_s']:.1f}/s vs baseline "
+                                      f"{base['ops_per_s']:.1f}/s"))
+        if (result["p99_ms"] > base["p99_ms"] * (1 + p99_tolerance)
+                and result["p99_ms"] - base["p99_ms"] > MIN_P99_DELTA_MS):
+            regressions.append((name, f"p99 {result['p99_ms']:.3f} ms vs baseline {base['p99_ms']:.3f} ms"))
+    return regressions
+
+
+# --- MAIN ------------------------------------------------------------------
+
+GROUPS = ("ledger", "quote", "rpc")
+
+
+def parse_list(raw: str, cast):
+    try:
+        values = [cast(item) for item in raw.split(",") if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid list: {raw}") from None
+    if not values:
+        raise argparse.ArgumentTypeError("empty list")
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC coordinator benchmark suite")
+    parser.add_argument("--groups", type=lambda raw: parse_list(raw, str), default=list(GROUPS),
+                        help="comma-separated: ledger, quote, rpc")
+    parser.add_argument("--sizes", type=lambda raw: parse_list(raw, lambda v: int(float(v))),
+                        default=list(DEFAULT_SIZES), help="synthetic ledger sizes (events)")
+    parser.add_argument("--legacy-fraction", type=float, default=DEFAULT_LEGACY_FRACTION)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--rpc-latency-ms", type=lambda raw: parse_list(raw, float),
+                        default=list(DEFAULT_RPC_LATENCIES_MS), help="stub node latency per request")
+    parser.add_argument("--rpc-ops", type=int, default=DEFAULT_RPC_OPS, help="operations per RPC benchmark")
+    parser.add_argument("--quotes", type=int, default=DEFAULT_QUOTES, help="quotes per engine")
+    parser.add_argument("--baseline", type=lambda raw: Path(raw), default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed throughput drop (fraction)")
+    parser.add_argument("--p99-tolerance", type=float, default=DEFAULT_P99_TOLERANCE,
+                        help="allowed p99 latency rise (fraction)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    unknown = sorted(set(args.groups) - set(GROUPS))
+    if unknown:
+        print(f"[ERROR] Unknown group(s): {', '.join(unknown)} (expected {', '.join(GROUPS)})")
+        sys.exit(1)
+    if not 0 <= args.legacy_fraction <= 1 or any(n < 1 for n in args.sizes) \
+            or any(ms < 0 for ms in args.rpc_latency_ms) or args.rpc_ops < 1 or args.quotes < QUOTE_BATCH:
+        print(f"[ERROR] Need 0 ≤ legacy fraction ≤ 1, sizes ≥ 1, latencies ≥ 0, rpc-ops ≥ 1, quotes ≥ {QUOTE_BATCH}.")
+        sys.exit(1)
+
+    config = {
+        "groups": args.groups,
+        "sizes": args.sizes,
+        "legacy_fraction": args.legacy_fraction,
+        "seed": args.seed,
+        "rpc_latency_ms": args.rpc_latency_ms,
+        "rpc_ops": args.rpc_ops,
+        "quotes": args.quotes,
+    }
+    results = {}
+
+    def report(name, result):
+        results[name] = result
+        if not args.json:
+            print(f"{name:<58} {result['ops_per_s']:>14,.1f}/s {result['p50_ms']:>10.3f} ms "
+                  f"{result['p99_ms']:>10.3f} ms")
+
+    if not args.json:
+        print(f"\n=== cBTC Coordinator Benchmarks ({', '.join(args.groups)}) ===")
+        print(f"{'benchmark':<58} {'ops (median)':>16} {'p50':>13} {'p99':>13}")
+    if "ledger" in args.groups:
+        bench_ledger(args.sizes, args.legacy_fraction, args.seed, report)
+    if "quote" in args.groups:
+        bench_quotes(args.quotes, args.seed, report)
+    if "rpc" in args.groups:
+        bench_rpc(args.rpc_latency_ms, args.rpc_ops, report)
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    if baseline is not None:
+        regressions = compare(results, baseline["results"], args.tolerance, args.p99_tolerance)
+
+    if args.json:
+        print(json.dumps({"environment": environment(), "config": config, "results": results,
+                          "regressions": [{"benchmark": name, "detail": detail} for name, detail in regressions]},
+                         indent=2, sort_keys=True))
+    else:
+        print("=" * 104)
+        if baseline is None:
+            print(f"[NOTE] No baseline at {args.baseline}; run with --save-baseline to store one.")
+        else:
+            if baseline.get("environment") != environment():
+                print(f"[WARN] Baseline was recorded on a different environment: {baseline.get('environment')}")
+            compared = sum(1 for name in results if name in baseline["results"])
+            for name, detail in regressions:
+                print(f"[WARN] Regression in {name}: {detail}")
+            print(f"[RESULT] {compared} benchmark(s) compared with {args.baseline}: "
+                  f"{len(regressions)} regression(s).")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, config)
+        if not args.json:
+            print(f"[INFO] Baseline saved to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
@@ -17,7 +17,8 @@
 #         Tier 1 – Full floor     (coverage ≥ 60%)
 #         Tier 2 – Haircuts       (50% ≤ coverage < 60%)
 #         Tier 3 – Protection     (coverage < 50%)
-# - applies the same logic as redeem_cbtc.py:
+# - applies the same logic as redeem_cbtc.py
+#   (both use core.quote_redemption):
 #     - Tier 1 & 2:
 #         try full floor payout;
 #         if that would push coverage < 50%, haircut so
@@ -26,19 +27,85 @@
 #         strictly pro-rata:
 #             btc_paid = P * (R / O)
 #
+# Without arguments it asks for the three inputs interactively. For
+# scripted runs (many scenarios per invocation) it takes them from
+# the command line, or as JSON requests from stdin or a file
+# (see batch_io.py), and prints one JSON result per scenario:
+#
+#   {"outstanding_cbtc": "30000", "pool_btc": "0.2", "request_cbtc": "100", "id": "a"}
+#
+# Each result is the quote (same fields as the coordinator's /quote)
+# plus the outstanding supply and normalized coverage. Scenarios are
+# independent of each other.
+#
+# Usage:
+#   python src/coordinator/calc_redemption_rate.py
+#   python src/coordinator/calc_redemption_rate.py <outstanding_cbtc> <pool_btc> <request_cbtc>
+#   python src/coordinator/calc_redemption_rate.py --json < scenarios.jsonl
+#   python src/coordinator/calc_redemption_rate.py --file scenarios.json
+#
 # ⚠️ For reasoning and testing only. Not production code.
 # ------------------------------------------------------------
 
 from decimal import Decimal, getcontext
+import sys
 
-getcontext().prec = 18
-
-FLOOR_RATE = Decimal("0.00001")  # BTC per 1 cBTC
-
-BASELINE_COVERAGE = (Decimal("0.20") / Decimal("0.30"))  # ≈ 66.67%
+from batch_io import UsageError, emit, parse_batch_args, read_requests, request_decimal, result_for
+from core import (BASELINE_COVERAGE, HUNDRED, PCT_STEP, btc_to_sats, cbtc_to_mC, format_cbtc_from_mC,
+                  parse_amount, quote_redemption, quote_to_json)
 
+getcontext().prec = 18
 
-def main():
+USAGE = """Usage:
+  python src/coordinator/calc_redemption_rate.py
+  python src/coordinator/calc_redemption_rate.py <outstanding_cbtc> <pool_btc> <request_cbtc>
+  python src/coordinator/calc_redemption_rate.py --json | --file PATH"""
+
+
+def normalized_pct(coverage: Decimal) -> Decimal:
+    """
+    Coverage as a percentage of BASELINE_COVERAGE.
+    """
+    return (coverage / BASELINE_COVERAGE * HUNDRED).quantize(PCT_STEP)
+
+
+def simulate(request):
+    """
+    Quote one scenario {"outstanding_cbtc", "pool_btc", "request_cbtc"}.
+    Returns the JSON result fields; raises ValueError if the inputs are
+    invalid or not redeemable.
+    """
+    O = request_decimal(request, "outstanding_cbtc", places=3)
+    P = request_decimal(request, "pool_btc", places=8)
+    R = request_decimal(request, "request_cbtc", places=3)
+
+    outstanding_mC = cbtc_to_mC(O)
+    quote = quote_redemption(outstanding_mC, btc_to_sats(P), cbtc_to_mC(R))
+    result = quote_to_json(quote)
+    result["outstanding_cbtc"] = format_cbtc_from_mC(outstanding_mC)
+    result["normalized_coverage_before_pct"] = str(normalized_pct(quote.coverage_before))
+    result["normalized_coverage_after_pct"] = None
+    if quote.coverage_after is not None:
+        result["normalized_coverage_after_pct"] = str(normalized_pct(quote.coverage_after))
+    return result
+
+
+def run_batch(requests) -> bool:
+    """
+    Simulate every scenario and print one JSON line each. Returns True
+    if all of them could be quoted.
+    """
+    all_ok = True
+    for index, request in enumerate(requests):
+        try:
+            emit(result_for(index, request, ok=True, **simulate(request)))
+        except ValueError as e:
+            all_ok = False
+            emit(result_for(index, request, ok=False, error=str(e)))
+    return all_ok
+
+
+def interactive():
     print("=== cBTC Redemption Simulation ===")
 
     # --- Inputs -----------------------------------------------------------
@@ -47,153 +114,41 @@ def main():
     raw_redeem = input("Requested redemption cBTC (e.g. 15000): ").strip()
 
     try:
-        O = Decimal(raw_outstanding)
-        P = Decimal(raw_red_pool)
-        R = Decimal(raw_redeem)
-    except Exception:
-        print("[ERROR] Invalid numeric input.")
-        return
-
-    if O <= 0:
-        print("[ERROR] Outstanding cBTC must be > 0.")
-        return
-    if P < 0:
-        print("[ERROR] Redemption Pool BTC must be ≥ 0.")
-        return
-    if R <= 0:
-        print("[ERROR] Redemption request must be > 0.")
-        return
-    if R > O:
-        print("[ERROR] Redemption request cannot exceed outstanding cBTC.")
-        return
-
-    # --- Base quantities --------------------------------------------------
-    F = FLOOR_RATE
-    L_before = (O * F).quantize(Decimal("0.00000001"))
-    if L_before <= 0:
-        print("[ERROR] Invalid liability (L_before <= 0).")
+        O = parse_amount(raw_outstanding, "outstanding cBTC", places=3)
+        P = parse_amount(raw_red_pool, "Redemption Pool BTC", places=8)
+        R = parse_amount(raw_redeem, "requested cBTC", places=3)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
         return
 
-    absolute_coverage_before = P / L_before
-
-    # Tier classification by absolute coverage
-    if absolute_coverage_before >= Decimal("0.60"):
-        tier = "Tier 1 – Full floor"
-    elif absolute_coverage_before >= Decimal("0.50"):
-        tier = "Tier 2 – Haircuts"
-    else:
-        tier = "Tier 3 – Protection mode (pro-rata)"
-
-    # After redemption:
-    O_after = (O - R).quantize(Decimal("0.001"))
-    if O_after < 0:
-        print("[ERROR] Redemption amount exceeds outstanding cBTC (post-check).")
+    # --- Quote (amounts are settled in milli-cBTC and satoshis) -----------
+    try:
+        quote = quote_redemption(cbtc_to_mC(O), btc_to_sats(P), cbtc_to_mC(R))
+    except ValueError as e:
+        print(f"[ERROR] {e}")
         return
 
-    if O_after > 0:
-        L_after = (O_after * F).quantize(Decimal("0.00000001"))
-    else:
-        L_after = Decimal("0")
-
-    btc_needed_full = (R * F).quantize(Decimal("0.00000001"))
-
-    # Helper for coverage_after
-    def compute_coverage_after(payout: Decimal) -> Decimal:
-        if O_after <= 0 or L_after <= 0:
-            return Decimal("0")
-        P_after = (P - payout).quantize(Decimal("0.00000001"))
-        return P_after / L_after
-
-    btc_paid = Decimal("0")
-    redemption_rate = Decimal("0")
-    absolute_coverage_after = None
-
-    # --- Tier 1 & 2 logic -------------------------------------------------
-    if tier.startswith("Tier 1") or tier.startswith("Tier 2"):
-        if O_after <= 0:
-            # Redeeming all outstanding: no future liability.
-            btc_paid = min(btc_needed_full, P)
-            redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-            absolute_coverage_after = Decimal("0")
-        else:
-            # Try full floor
-            P_after_full = (P - btc_needed_full).quantize(Decimal("0.00000001"))
-            if P_after_full < 0:
-                can_pay_full = False
-            else:
-                cov_after_full = compute_coverage_after(btc_needed_full)
-                can_pay_full = (cov_after_full >= Decimal("0.50"))
-
-            if can_pay_full:
-                btc_paid = btc_needed_full
-                redemption_rate = F
-                absolute_coverage_after = compute_coverage_after(btc_paid)
-            else:
-                # Haircut so coverage_after = 50%
-                if L_after <= 0:
-                    # Edge case: no remaining liability, just pay pool
-                    btc_paid = P
-                else:
-                    btc_paid_candidate = (P - Decimal("0.5") * L_after).quantize(Decimal("0.00000001"))
-                    if btc_paid_candidate < 0:
-                        btc_paid_candidate = Decimal("0")
-                    btc_paid = min(btc_paid_candidate, btc_needed_full, P)
-
-                if btc_paid > 0:
-                    redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-                else:
-                    redemption_rate = Decimal("0")
-                absolute_coverage_after = compute_coverage_after(btc_paid)
-
-    # --- Tier 3: strictly pro-rata ----------------------------------------
-    else:
-        # coverage < 50%
-        # BTC payout is proportional to share of outstanding:
-        #    btc_paid = P * (R / O)
-        share = (R / O)
-        btc_paid = (P * share).quantize(Decimal("0.00000001"))
-        if btc_paid > P:
-            btc_paid = P
-
-        if R > 0:
-            redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-        else:
-            redemption_rate = Decimal("0")
-
-        if O_after > 0 and L_after > 0:
-            absolute_coverage_after = compute_coverage_after(btc_paid)
-        else:
-            absolute_coverage_after = Decimal("0")
-
-    # Sanity
-    if btc_paid < 0:
-        btc_paid = Decimal("0")
-    if btc_paid > P:
-        btc_paid = P
-
     # --- Print results ----------------------------------------------------
-    abs_cov_before_pct = (absolute_coverage_before * Decimal("100")).quantize(Decimal("0.0001"))
-    baseline_pct = (BASELINE_COVERAGE * Decimal("100")).quantize(Decimal("0.0001"))
-    norm_before = (absolute_coverage_before / BASELINE_COVERAGE * Decimal("100")).quantize(Decimal("0.0001"))
+    baseline_pct = (BASELINE_COVERAGE * HUNDRED).quantize(PCT_STEP)
+    norm_before = normalized_pct(quote.coverage_before)
 
     print("\n---------------------------------")
-    print(f"Tier:                 {tier}")
+    print(f"Tier:                 {quote.tier_label}")
     print(f"Outstanding cBTC:     {O}")
     print(f"Redemption Pool BTC:  {P:.8f}")
-    print(f"Floor liability (pre): {L_before:.8f}")
-    print(f"Absolute coverage (pre): {abs_cov_before_pct}%")
+    print(f"Floor liability (pre): {quote.liability_before:.8f}")
+    print(f"Absolute coverage (pre): {quote.coverage_before_pct}%")
     print(f"Baseline coverage:      {baseline_pct}% (treated as 100% health)")
     print(f"Normalized coverage:    {norm_before}% of baseline")
     print("---------------------------------")
     print(f"Requested redemption: {R} cBTC")
-    print(f"Redemption rate:      {redemption_rate:.8f} BTC per cBTC")
-    print(f"BTC paid out:         {btc_paid:.8f}")
-
-    if absolute_coverage_after is not None and L_after > 0 and O_after > 0:
-        abs_cov_after_pct = (absolute_coverage_after * Decimal("100")).quantize(Decimal("0.0001"))
-        norm_after = (absolute_coverage_after / BASELINE_COVERAGE * Decimal("100")).quantize(Decimal("0.0001"))
-        print(f"Floor liability (post): {L_after:.8f}")
-        print(f"Absolute coverage (post): {abs_cov_after_pct}%")
+    print(f"Redemption rate:      {quote.redemption_rate:.8f} BTC per cBTC")
+    print(f"BTC paid out:         {quote.btc_paid:.8f}")
+
+    if quote.coverage_after is not None:
+        norm_after = normalized_pct(quote.coverage_after)
+        print(f"Floor liability (post): {quote.liability_after:.8f}")
+        print(f"Absolute coverage (post): {quote.coverage_after_pct}%")
         print(f"Normalized coverage (post): {norm_after}% of baseline")
     else:
         print("Floor liability (post): 0.00000000")
@@ -202,8 +157,36 @@ def main():
     print("=================================\n")
 
 
+def main():
+    try:
+        source, positionals, _ = parse_batch_args(sys.argv[1:])
+        if source is None and positionals and len(positionals) != 3:
+            raise UsageError("expected <outstanding_cbtc> <pool_btc> <request_cbtc>")
+    except UsageError as e:
+        print(f"[ERROR] {e}")
+        print(USAGE)
+        sys.exit(1)
+
+    if source is None and not positionals:
+        interactive()
+        return
+
+    if source is None:
+        requests = [dict(zip(("outstanding_cbtc", "pool_btc", "request_cbtc"), positionals))]
+    else:
+        try:
+            requests = read_requests(source)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Cannot read requests: {e}")
+            sys.exit(1)
+
+    if not run_batch(requests):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
         print(f"[ERROR] {e}")
+        sys.exit(1)
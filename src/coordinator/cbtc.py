@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Command Line (EXPERIMENTAL)
+#
+# One entry point for the coordinator scripts:
+#
+#   cbtc status [--ledger-only | cps]   – status.py (--ledger-only:
+#                                         supply and floor liability
+#                                         from the ledger, no node)
+#   cbtc quote <amount_cbtc> [--outstanding CBTC] [--pool BTC]
+#                                       – redemption quote, nothing
+#                                         paid; offline when both the
+#                                         outstanding supply and the
+#                                         pool are given
+#   cbtc mint <deposit_btc> [CP_WALLET] – open_mint_channel.py
+#   cbtc redeem [<amount> <address> | --json | --file PATH] [--yes]
+#                                       – redeem_cbtc.py
+#   cbtc verify [--workers N] ...       – verify_invariants.py
+#   cbtc bench-startup [--runs N]       – startup time of the above
+#   cbtc bench [...]                    – bench_coordinator.py
+#
+# Built to start fast: only the standard library's sys / os are
+# imported up front, and each subcommand imports what it needs
+# (no argparse for the quick ones, RPC and NumPy only where used).
+# "status --ledger-only" and "quote" without --outstanding read the
+# supply from the ledger checkpoint directly when it already covers
+# the whole log (same tail check as ledger.checkpoint_matches_log);
+# otherwise they fall back to ledger.load_supply_totals().
+#
+# Usage:
+#   python src/coordinator/cbtc.py <command> [args...]
+#
+# Dependencies:
+#   pip install python-bitcoinrpc (node commands), numpy (verify)
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(_HERE)), "data")
+LEDGER_LOG = os.path.join(DATA_DIR, "ledger.jsonl")
+LEDGER_CHECKPOINT = os.path.join(DATA_DIR, "ledger.checkpoint.json")
+
+USAGE = """Usage:
+  cbtc status [--ledger-only | cps]
+  cbtc quote <amount_cbtc> [--outstanding CBTC] [--pool BTC]
+  cbtc mint <deposit_btc> [CP_WALLET_NAME]
+  cbtc redeem [<amount_cbtc> <address> | --json | --file PATH] [--yes]
+  cbtc verify [--workers N] [--chunk-mb MB]
+  cbtc bench-startup [--runs N]
+  cbtc bench [--groups ledger,quote,rpc] [--save-baseline] ..."""
+
+
+class UsageError(Exception):
+    pass
+
+
+def parse_options(args, options=(), flags=()):
+    """
+    Minimal option parser (argparse alone costs more than the quick
+    commands). Returns (positionals, {name: value or True}).
+    """
+    positionals = []
+    values = {}
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith("--"):
+            positionals.append(arg)
+            continue
+        name, _, value = arg[2:].partition("=")
+        if name in flags and not value:
+            values[name] = True
+        elif name in options:
+            if not value:
+                if not args:
+                    raise UsageError(f"--{name} needs a value")
+                value = args.pop(0)
+            values[name] = value
+        else:
+            raise UsageError(f"unknown option --{name}")
+    return positionals, values
+
+
+# --- LEDGER ----------------------------------------------------------------
+
+def _checkpoint_totals():
+    """
+    (total_minted_mC, total_redeemed_mC) from the persisted checkpoint
+    if it covers data/ledger.jsonl exactly, else None.
+    """
+    import hashlib
+    import json
+
+    try:
+        with open(LEDGER_CHECKPOINT, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        offset = int(checkpoint["offset"])
+        tail_length = int(checkpoint["tail_length"])
+        with open(LEDGER_LOG, "rb") as f:
+            if f.seek(0, os.SEEK_END) != offset:
+                return None
+            if offset:
+                if not 0 < tail_length <= offset:
+                    return None
+                f.seek(offset - tail_length)
+                if hashlib.sha256(f.read(tail_length)).hexdigest() != checkpoint["tail_sha256"]:
+                    return None
+        return int(checkpoint["total_minted_mC"]), int(checkpoint["total_redeemed_mC"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def supply_totals():
+    """
+    (total_minted_mC, total_redeemed_mC), without importing the ledger
+    module when the checkpoint is current.
+    """
+    if os.environ.get("CBTC_LEDGER_BACKEND", "jsonl").strip().lower() in ("", "jsonl"):
+        totals = _checkpoint_totals()
+        if totals is not None:
+            return totals
+
+    from ledger import load_supply_totals
+    return load_supply_totals()
+
+
+# --- COMMANDS --------------------------------------------------------------
+
+def run_script(module_name: str, args) -> None:
+    """
+    Run an existing coordinator script's main() with the given
+    arguments.
+    """
+    import importlib
+
+    sys.argv = [os.path.join(_HERE, f"{module_name}.py")] + list(args)
+    importlib.import_module(module_name).main()
+
+
+def cmd_status(args) -> None:
+    if args != ["--ledger-only"]:
+        run_script("status", args)
+        return
+
+    from core import format_cbtc_from_mC, sats_to_btc
+
+    total_minted_mC, total_redeemed_mC = supply_totals()
+    outstanding_mC = total_minted_mC - total_redeemed_mC
+
+    print("\n=== cBTC Protocol Status (ledger only) ===")
+    print(f"Ledger file:           {LEDGER_LOG}")
+    print("------------------------------------------")
+    print(f"Total minted cBTC:     {format_cbtc_from_mC(total_minted_mC)}")
+    print(f"Total redeemed cBTC:   {format_cbtc_from_mC(total_redeemed_mC)}")
+    print(f"Estimated outstanding: {format_cbtc_from_mC(outstanding_mC)}")
+    # 1 milli-cBTC of floor liability is exactly 1 sat
+    print(f"Floor liability BTC:   {sats_to_btc(max(outstanding_mC, 0)):.8f}")
+    print("[NOTE] Redemption Pool and coverage need the node: cbtc status")
+    print("==========================================\n")
+
+
+def cmd_quote(args) -> None:
+    positionals, options = parse_options(args, options=("outstanding", "pool"))
+    if len(positionals) != 1:
+        raise UsageError("quote takes one cBTC amount")
+
+    from decimal import Decimal, InvalidOperation
+    from core import MILLI, btc_to_sats, cbtc_to_mC, format_cbtc_from_mC, quote_redemption, sats_to_btc
+
+    try:
+        requested_mC = cbtc_to_mC(Decimal(positionals[0]).quantize(MILLI))
+        if "outstanding" in options:
+            outstanding_mC = cbtc_to_mC(Decimal(options["outstanding"]).quantize(MILLI))
+        else:
+            total_minted_mC, total_redeemed_mC = supply_totals()
+            outstanding_mC = total_minted_mC - total_redeemed_mC
+        pool_sats = btc_to_sats(Decimal(options["pool"])) if "pool" in options else None
+    except (InvalidOperation, ValueError):
+        print("[ERROR] Invalid numeric input.")
+        sys.exit(1)
+
+    if pool_sats is None:
+        from pool_balance import get_pool_tracker
+        pool_sats = get_pool_tracker().trusted_sats()
+
+    try:
+        quote = quote_redemption(outstanding_mC, pool_sats, requested_mC)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    print("\n--- Redemption Quote ---")
+    print(f"Tier:                  {quote.tier_label}")
+    print(f"Outstanding cBTC:      {format_cbtc_from_mC(outstanding_mC)}")
+    print(f"Requested redemption:  {format_cbtc_from_mC(requested_mC)} cBTC")
+    print(f"Redemption Pool BTC:   {sats_to_btc(pool_sats):.8f}")
+    print(f"Floor liability (pre): {quote.liability_before:.8f}")
+    print(f"Absolute coverage (pre): {quote.coverage_before_pct}%")
+    print("------------------------")
+    print(f"Redemption rate:       {quote.redemption_rate:.8f} BTC per cBTC")
+    print(f"BTC paid out:          {quote.btc_paid:.8f}")
+    if quote.coverage_after is not None:
+        print(f"Floor liability (post): {quote.liability_after:.8f}")
+        print(f"Absolute coverage (post): {quote.coverage_after_pct}%")
+    else:
+        print("Floor liability (post): 0.00000000")
+        print("Absolute coverage (post): N/A")
+    print("------------------------\n")
+
+
+def cmd_mint(args) -> None:
+    run_script("open_mint_channel", args)
+
+
+def cmd_redeem(args) -> None:
+    run_script("redeem_cbtc", args)
+
+
+def cmd_verify(args) -> None:
+    run_script("verify_invariants", args)
+
+
+def cmd_bench(args) -> None:
+    run_script("bench_coordinator", args)
+
+
+# --- STARTUP BENCHMARK -----------------------------------------------------
+
+BENCH_COMMANDS = (
+    ("bare interpreter", ["-c", "pass"], None),
+    ("cbtc quote (offline)", ["cbtc.py", "quote", "100", "--outstanding", "30000", "--pool", "0.2"], None),
+    ("cbtc status --ledger-only", ["cbtc.py", "status", "--ledger-only"], None),
+    ("calc_redemption_rate.py", ["calc_redemption_rate.py"], "30000\n0.2\n100\n"),
+    ("status.py imports", ["-c", "import status"], None),
+)
+
+
+def cmd_bench_startup(args) -> None:
+    _, options = parse_options(args, options=("runs",))
+    runs = int(options.get("runs", 20))
+    if runs < 1:
+        raise UsageError("--runs must be ≥ 1")
+
+    import statistics
+    import subprocess
+    import time
+
+    print(f"\n=== cBTC CLI Startup ({runs} runs each, median / p90) ===")
+    bare = None
+    for name, argv, stdin in BENCH_COMMANDS:
+        argv = [os.path.join(_HERE, a) if a.endswith(".py") else a for a in argv]
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + argv, input=stdin, capture_output=True, text=True, cwd=_HERE)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        median = statistics.median(times)
+        p90 = times[min(int(len(times) * 0.9), len(times) - 1)]
+        bare = median if bare is None else bare
+        print(f"{name:<28} {median:8.1f} ms {p90:8.1f} ms   +{median - bare:6.1f} ms")
+    print("==========================================================\n")
+
+
+COMMANDS = {
+    "status": cmd_status,
+    "quote": cmd_quote,
+    "mint": cmd_mint,
+    "redeem": cmd_redeem,
+    "verify": cmd_verify,
+    "bench-startup": cmd_bench_startup,
+    "bench": cmd_bench,
+}
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    args = sys.argv[1:]
+    command = COMMANDS.get(args[0]) if args else None
+    if command is None:
+        print(USAGE)
+        sys.exit(1)
+    try:
+        command(args[1:])
+    except UsageError as e:
+        print(f"[ERROR] {e}")
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
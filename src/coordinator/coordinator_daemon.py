@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Coordinator Daemon (EXPERIMENTAL)
+#
+# Long-running coordinator exposing the mint / redeem / status
+# logic over a small HTTP/JSON API, so callers do not pay process
+# startup, ledger re-reads and RPC reconnects on every request:
+#
+#   GET  /status                      – same figures as status.py
+#   GET  /quote?amount_cbtc=<amount>  – redemption quote (no payout)
+#   GET  /cps                         – per-CP positions (cp_index.py)
+#   POST /mint    {"deposit_btc": "1.0", "cp_wallet": "CP1"}
+#   POST /redeem  {"amount_cbtc": "250.5", "address": "<btc address>"}
+#
+# - Ledger totals stay in memory: each request only folds events
+#   appended since the last one (by this daemon or by the CLI
+#   scripts), using the ledger checkpoint helpers
+# - RPC connections stay warm in the pooled clients from rpc.py
+# - The Redemption Pool balance is kept in memory by the pool
+#   balance tracker (pool_balance.py): quotes and /status only go to
+#   bitcoind after a new block or a ledger change
+# - With --zmq-block / --zmq-tx the tracker is pushed new blocks and
+#   pool transactions by the ZMQ listener (zmq_listener.py) and stops
+#   polling; /status then also lists mints awaiting confirmations
+# - Mint destinations come from the pre-derived address pool
+#   (address_pool.py, filled at startup): a mint costs one sendmany
+# - Mints and redemptions take the ledger writer lock (shared with
+#   the CLI scripts); a redemption quoted against a ledger head that
+#   moved before payout is re-quoted and retried
+#
+# Responses are JSON; amounts are strings, like in the ledger.
+# Errors: {"error": "..."} with 400 (bad request / not quotable),
+# 404 (unknown endpoint), 409 (ledger busy: retry the request) or
+# 502 (bitcoind RPC failure).
+#
+# Usage:
+#   python src/coordinator/coordinator_daemon.py [--port 8420]
+#       [--host 127.0.0.1] [--rpc-host 127.0.0.1] [--rpc-port 18443]
+#       [--zmq-block tcp://127.0.0.1:28332] [--zmq-tx tcp://127.0.0.1:28333]
+#
+#   e.g. against the stub node:
+#   python src/coordinator/stub_node.py 18543
+#   python src/coordinator/coordinator_daemon.py --rpc-port 18543
+#   curl -s localhost:8420/status
+#   curl -s -d '{"deposit_btc": "1.0"}' localhost:8420/mint
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#   pip install pyzmq (only with --zmq-block / --zmq-tx)
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal, getcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from bitcoinrpc.authproxy import JSONRPCException
+import argparse
+import importlib.util
+import json
+import sys
+import threading
+
+from core import MILLI, btc_to_sats, cbtc_to_mC, parse_amount, quote_redemption, quote_to_json, sats_to_btc
+from cp_index import cp_positions
+from ledger import LEDGER_PATH, LedgerConflict, ledger_head
+from address_pool import get_address_pool, mint_labels
+from open_mint_channel import execute_mint, prepare_mint
+from pool_balance import get_pool_tracker
+from redeem_cbtc import MAX_REDEEM_ATTEMPTS, quote_current_redemption, redeem_with_retry
+from status import compute_status
+import rpc
+
+getcontext().prec = 18
+
+# --- CONSTANTS -------------------------------------------------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8420
+DEFAULT_CP_WALLET = "CP1"
+
+# Largest request body accepted (bytes)
+MAX_BODY_BYTES = 64 * 1024
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Conflict(Exception):
+    """
+    Transient conflict with other ledger writers; the client should retry.
+    """
+
+
+# --- COORDINATOR -----------------------------------------------------------
+
+def parse_request_amount(raw, name: str, places: int) -> Decimal:
+    """
+    core.parse_amount() for a request field: an invalid or out-of-range
+    amount is a bad request, not an internal error.
+    """
+    try:
+        return parse_amount(raw, name, places)
+    except ValueError as e:
+        raise BadRequest(str(e)) from None
+
+
+class Coordinator:
+    """
+    Request handling shared by all HTTP worker threads.
+    """
+
+    def __init__(self):
+        self.pool_tracker = get_pool_tracker()
+        self.address_pool = get_address_pool()
+        # zmq_listener.ChainListener, when notifications are enabled
+        self.listener = None
+
+    def _requested_mC(self, raw_amount) -> int:
+        """
+        Validate a requested cBTC amount against the outstanding supply.
+        """
+        requested_cbtc = parse_request_amount(raw_amount, "cBTC amount", places=3)
+        if requested_cbtc <= 0:
+            raise BadRequest("Redemption amount must be > 0.")
+
+        _, total_minted_mC, total_redeemed_mC = ledger_head()
+        if total_minted_mC - total_redeemed_mC <= 0:
+            raise BadRequest("No outstanding cBTC to redeem.")
+        return cbtc_to_mC(requested_cbtc.quantize(MILLI))
+
+    def _redemption_quote(self, raw_amount):
+        """
+        Returns (quote, seq) for a requested cBTC amount.
+        """
+        requested_mC = self._requested_mC(raw_amount)
+        try:
+            return quote_current_redemption(requested_mC)
+        except ValueError as e:
+            raise BadRequest(str(e)) from None
+
+    def status(self, params):
+        _, total_minted_mC, total_redeemed_mC = ledger_head()
+        pool = self.pool_tracker.balance()
+        status = compute_status(total_minted_mC, total_redeemed_mC, sats_to_btc(pool["trusted_sats"]))
+        status["redemption_pool_confirmed_btc"] = f"{sats_to_btc(pool['confirmed_sats']):.8f}"
+        status["redemption_pool_unconfirmed_btc"] = f"{sats_to_btc(pool['unconfirmed_sats']):.8f}"
+        if self.listener is not None:
+            status["pending_mint_confirmations"] = dict(self.listener.pending_mints)
+        return status
+
+    def cps(self, params):
+        return {"cps": cp_positions()}
+
+    def quote(self, params):
+        quote, _ = self._redemption_quote(params.get("amount_cbtc"))
+        return quote_to_json(quote)
+
+    def mint(self, params):
+        deposit_btc = parse_request_amount(params.get("deposit_btc"), "deposit amount", places=8)
+        cp_wallet_name = str(params.get("cp_wallet") or DEFAULT_CP_WALLET)
+
+        try:
+            plan = prepare_mint(deposit_btc, cp_wallet_name, address_pool=self.address_pool)
+            return execute_mint(plan)
+        except ValueError as e:
+            raise BadRequest(str(e)) from None
+
+    def redeem(self, params):
+        address = str(params.get("address") or "").strip()
+        if not address:
+            raise BadRequest("No address provided.")
+
+        requested_mC = self._requested_mC(params.get("amount_cbtc"))
+        try:
+            return redeem_with_retry(requested_mC, address, MAX_REDEEM_ATTEMPTS)
+        except ValueError as e:
+            raise BadRequest(str(e)) from None
+        except LedgerConflict:
+            raise Conflict("Ledger busy: redemption could not be quoted, try again.") from None
+
+
+# --- HTTP API --------------------------------------------------------------
+
+ROUTES = {
+    ("GET", "/status"): Coordinator.status,
+    ("GET", "/cps"): Coordinator.cps,
+    ("GET", "/quote"): Coordinator.quote,
+    ("POST", "/quote"): Coordinator.quote,
+    ("POST", "/mint"): Coordinator.mint,
+    ("POST", "/redeem"): Coordinator.redeem,
+}
+
+
+def make_handler(coordinator: Coordinator):
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, payload) -> None:
+            body = json.dumps(payload, sort_keys=True).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _params(self, url):
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # The body cannot be skipped, so the connection cannot be reused
+                self.close_connection = True
+                raise BadRequest("Invalid Content-Length header.")
+            if length > MAX_BODY_BYTES:
+                raise BadRequest("Request body too large.")
+            if length:
+                body = self.rfile.read(length)
+                try:
+                    data = json.loads(body.decode("utf8"))
+                except ValueError:
+                    raise BadRequest("Request body must be a JSON object.") from None
+                if not isinstance(data, dict):
+                    raise BadRequest("Request body must be a JSON object.")
+                params.update(data)
+            return params
+
+        def _dispatch(self, method: str) -> None:
+            url = urlsplit(self.path)
+            handler = ROUTES.get((method, url.path.rstrip("/") or "/"))
+            try:
+                params = self._params(url)
+                if handler is None:
+                    self._reply(404, {"error": f"Unknown endpoint: {method} {url.path}"})
+                    return
+                self._reply(200, handler(coordinator, params))
+            except BadRequest as e:
+                self._reply(400, {"error": str(e)})
+            except Conflict as e:
+                self._reply(409, {"error": str(e)})
+            except JSONRPCException as e:
+                self._reply(502, {"error": f"RPC error: {e.error}"})
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+    CoordinatorHandler.coordinator = coordinator
+    return CoordinatorHandler
+
+
+def make_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Build the daemon's HTTP server (not started yet).
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(Coordinator()))
+    server.daemon_threads = True
+    return server
+
+
+def warm_address_pool(server) -> None:
+    """
+    Fill the mint address pools of the default CP and every CP that
+    has minted, in the background.
+    """
+    coordinator = server.RequestHandlerClass.coordinator
+    cp_wallets = [DEFAULT_CP_WALLET] + sorted(set(cp_positions()) - {DEFAULT_CP_WALLET})
+
+    def run():
+        try:
+            coordinator.address_pool.fill(label for cp in cp_wallets for label in mint_labels(cp))
+        except Exception as e:
+            # Mints then derive their addresses on first use
+            print(f"[WARN] Address pool warm-up failed: {e}", file=sys.stderr)
+
+    threading.Thread(target=run, name="address-pool-warm", daemon=True).start()
+
+
+def enable_zmq(server, endpoints) -> None:
+    """
+    Drive the server's pool tracker from ZMQ notifications instead of
+    best-block polling.
+    """
+    from zmq_listener import start_listener
+
+    coordinator = server.RequestHandlerClass.coordinator
+    coordinator.listener, _ = start_listener(endpoints, tracker=coordinator.pool_tracker)
+    coordinator.pool_tracker.poll_interval = None
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC coordinator daemon (regtest MVP)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rpc-host", default=rpc.RPC_HOST)
+    parser.add_argument("--rpc-port", type=int, default=rpc.RPC_PORT)
+    parser.add_argument("--zmq-block", metavar="ENDPOINT", help="bitcoind -zmqpubhashblock endpoint")
+    parser.add_argument("--zmq-tx", metavar="ENDPOINT", help="bitcoind -zmqpubrawtx endpoint")
+    args = parser.parse_args()
+
+    # Must be set before the first wallet client is created
+    rpc.RPC_HOST = args.rpc_host
+    rpc.RPC_PORT = args.rpc_port
+
+    server = make_server(args.host, args.port)
+    warm_address_pool(server)
+    endpoints = [e for e in (args.zmq_block, args.zmq_tx) if e]
+    if endpoints:
+        if importlib.util.find_spec("zmq") is None:
+            print("[ERROR] pyzmq is not installed (pip install pyzmq).")
+            sys.exit(1)
+        enable_zmq(server, endpoints)
+        print(f"[INFO] ZMQ notifications: {', '.join(endpoints)}")
+    print(f"[INFO] cBTC coordinator listening on http://{args.host}:{args.port}")
+    print(f"[INFO] bitcoind RPC: {args.rpc_host}:{args.rpc_port}")
+    print(f"[INFO] Ledger file:  {LEDGER_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Coordinator stopped.")
+    finally:
+        server.server_close()
+        rpc.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Coordinator Core (EXPERIMENTAL)
+#
+# Pure protocol math shared by the coordinator scripts.
+# No RPC, no ledger I/O, no input()/print().
+#
+# Provides:
+# - protocol constants (floor rate, baseline coverage, tiers)
+# - unit conversions (BTC <-> satoshis, cBTC <-> milli-cBTC) and
+#   parse_amount(), the one check for user-supplied amounts
+# - quote_redemption(): the redemption tier engine used by
+#   redeem_cbtc.py and calc_redemption_rate.py
+#
+#   It runs on integers only (satoshis for BTC, milli-cBTC for cBTC)
+#   and reproduces the Decimal (prec=18) reference engine,
+#   quote_redemption_decimal(), bit for bit. See "INTEGER ENGINE"
+#   below for why the two agree.
+#
+#   Tier 1 – Full floor:
+#       absolute_coverage >= 60%
+#       → try full floor (0.00001 BTC/cBTC)
+#       → if that would drop coverage < 50%, haircut to keep ≥ 50%
+#
+#   Tier 2 – Haircuts:
+#       50% <= absolute_coverage < 60%
+#       → try full floor
+#       → if that would drop coverage < 50%, haircut to land at 50%
+#
+#   Tier 3 – Protection mode:
+#       absolute_coverage < 50%
+#       → strictly pro-rata:
+#           btc_paid = P * (R / O)
+#         which keeps coverage constant
+#
+# - quote_to_json(): a quote as a JSON-ready dict
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Context, Decimal, localcontext
+
+# All coverage math runs at the precision used by the coordinator
+# scripts. A private context keeps results identical no matter which
+# thread calls in (decimal contexts are thread-local).
+DECIMAL_CONTEXT = Context(prec=18)
+
+# --- PROTOCOL CONSTANTS ----------------------------------------------------
+
+FLOOR_RATE = Decimal("0.00001")  # BTC per 1 cBTC
+
+# Baseline coverage at mint:
+#  - LTV: 30%
+#  - Redemption Pool: 20%
+# ⇒ baseline = 0.20 / 0.30 = 2/3 ≈ 66.67%
+BASELINE_COVERAGE = DECIMAL_CONTEXT.divide(Decimal("0.20"), Decimal("0.30"))
+
+# Tier thresholds on absolute coverage
+TIER1_MIN_COVERAGE = Decimal("0.60")
+TIER2_MIN_COVERAGE = Decimal("0.50")
+
+TIER_FULL_FLOOR = 1
+TIER_HAIRCUT = 2
+TIER_PROTECTION = 3
+
+TIER_LABELS = {
+    TIER_FULL_FLOOR: "Tier 1 – Full floor",
+    TIER_HAIRCUT: "Tier 2 – Haircuts",
+    TIER_PROTECTION: "Tier 3 – Protection mode (pro-rata)",
+}
+
+# --- UNITS -----------------------------------------------------------------
+
+SATS_PER_BTC = 100_000_000
+MC_PER_CBTC = 1000
+
+# Quantization steps (built once, not inside hot code)
+SAT = Decimal("0.00000001")
+MILLI = Decimal("0.001")
+PCT_STEP = Decimal("0.0001")
+ONE = Decimal("1")
+ZERO = Decimal("0")
+HALF = Decimal("0.5")
+HUNDRED = Decimal("100")
+_SATS_PER_BTC_D = Decimal(SATS_PER_BTC)
+_MC_PER_CBTC_D = Decimal(MC_PER_CBTC)
+
+
+def btc_to_sats(value) -> int:
+    """
+    Convert a BTC amount (Decimal, str or RPC value) to integer satoshis.
+    """
+    btc = Decimal(str(value))
+    return int((btc * _SATS_PER_BTC_D).quantize(ONE))
+
+
+def sats_to_btc(sats: int) -> Decimal:
+    """
+    Convert integer satoshis to a BTC Decimal with 8 decimal places.
+    """
+    return (Decimal(sats) / _SATS_PER_BTC_D).quantize(SAT)
+
+
+def cbtc_to_mC(value) -> int:
+    """
+    Convert a cBTC amount (Decimal, str or legacy ledger value) to
+    integer milli-cBTC.
+    """
+    cbtc = Decimal(str(value))
+    return int((cbtc * _MC_PER_CBTC_D).quantize(ONE))
+
+
+def mC_to_cbtc(mC: int) -> Decimal:
+    """
+    Convert integer milli-cBTC to a cBTC Decimal with 3 decimal places.
+    """
+    return (Decimal(mC) / _MC_PER_CBTC_D).quantize(MILLI)
+
+
+def parse_amount(value, name: str, places: int = None) -> Decimal:
+    """
+    Parse a user-supplied amount into a finite Decimal; raises
+    ValueError("Invalid <name>: ...") otherwise. With `places` (3 for
+    cBTC → mC, 8 for BTC → sats) the amount must also convert to whole
+    units at the current decimal precision, so an out-of-range value
+    fails here and not in cbtc_to_mC() / btc_to_sats(). Sign checks are
+    left to the caller.
+    """
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        amount = Decimal(str(value).strip())
+    except Exception:
+        raise ValueError(f"Invalid {name}: {value}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Invalid {name}: {value}")
+    if places is not None:
+        try:
+            amount.scaleb(places).quantize(ONE)
+        except ArithmeticError:
+            raise ValueError(f"Invalid {name}: {value} (out of range)") from None
+    return amount
+
+
+def format_cbtc_from_mC(mC: int) -> str:
+    """
+    Convert integer milli-cBTC to a string with 3 decimal places.
+    """
+    return f"{mC_to_cbtc(mC):.3f}"
+
+
+def coverage_pct(coverage: Decimal) -> Decimal:
+    """
+    Coverage ratio as a percentage with 4 decimal places (display and
+    ledger format).
+    """
+    with localcontext(DECIMAL_CONTEXT):
+        return (coverage * HUNDRED).quantize(PCT_STEP)
+
+
+# --- REDEMPTION QUOTE ------------------------------------------------------
+
+class RedemptionQuote:
+    """
+    Immutable result of quote_redemption().
+
+    Stored fields are integers (satoshis / milli-cBTC); the Decimal
+    properties give the BTC / cBTC values printed and logged by the
+    coordinator scripts. coverage_after is None when nothing remains
+    outstanding (no post-redemption liability).
+    """
+
+    __slots__ = (
+        "tier",
+        "outstanding_mC",
+        "pool_sats",
+        "request_mC",
+        "btc_paid_sats",
+        "rate_sats_per_cbtc",
+    )
+
+    def __init__(self, tier, outstanding_mC, pool_sats, request_mC,
+                 btc_paid_sats, rate_sats_per_cbtc):
+        _init_quote(self, tier, outstanding_mC, pool_sats, request_mC,
+                    btc_paid_sats, rate_sats_per_cbtc)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RedemptionQuote is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RedemptionQuote is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, RedemptionQuote):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return (
+            f"RedemptionQuote(tier={self.tier}, outstanding_mC={self.outstanding_mC}, "
+            f"pool_sats={self.pool_sats}, request_mC={self.request_mC}, "
+            f"btc_paid_sats={self.btc_paid_sats}, rate_sats_per_cbtc={self.rate_sats_per_cbtc})"
+        )
+
+    # --- Derived integer quantities ----------------------------------------
+    # Floor liability in satoshis equals outstanding milli-cBTC:
+    #   1 mC × 0.00001 BTC/cBTC / 1000 = 0.00000001 BTC = 1 sat
+
+    @property
+    def liability_before_sats(self) -> int:
+        return self.outstanding_mC
+
+    @property
+    def liability_after_sats(self) -> int:
+        return self.outstanding_mC - self.request_mC
+
+    @property
+    def pool_after_sats(self) -> int:
+        return self.pool_sats - self.btc_paid_sats
+
+    # --- Decimal views (display / ledger format) ---------------------------
+
+    @property
+    def tier_label(self) -> str:
+        return TIER_LABELS[self.tier]
+
+    @property
+    def btc_paid(self) -> Decimal:
+        return sats_to_btc(self.btc_paid_sats)
+
+    @property
+    def redemption_rate(self) -> Decimal:
+        return sats_to_btc(self.rate_sats_per_cbtc)
+
+    @property
+    def liability_before(self) -> Decimal:
+        return sats_to_btc(self.liability_before_sats)
+
+    @property
+    def liability_after(self) -> Decimal:
+        return sats_to_btc(self.liability_after_sats)
+
+    @property
+    def coverage_before(self) -> Decimal:
+        return DECIMAL_CONTEXT.divide(Decimal(self.pool_sats), Decimal(self.liability_before_sats))
+
+    @property
+    def coverage_after(self):
+        if self.liability_after_sats <= 0:
+            return None
+        return DECIMAL_CONTEXT.divide(Decimal(self.pool_after_sats), Decimal(self.liability_after_sats))
+
+    @property
+    def coverage_before_pct(self) -> Decimal:
+        return coverage_pct(self.coverage_before)
+
+    @property
+    def coverage_after_pct(self):
+        coverage_after = self.coverage_after
+        if coverage_after is None:
+            return None
+        return coverage_pct(coverage_after)
+
+
+# Slot setters bound once: the engines build quotes with these instead of
+# going through __init__ and object.__setattr__ (roughly half the cost).
+(_set_tier, _set_outstanding, _set_pool, _set_request,
+ _set_paid, _set_rate) = [RedemptionQuote.__dict__[name].__set__ for name in RedemptionQuote.__slots__]
+
+
+def _init_quote(quote, tier, outstanding_mC, pool_sats, request_mC,
+                btc_paid_sats, rate_sats_per_cbtc):
+    _set_tier(quote, tier)
+    _set_outstanding(quote, outstanding_mC)
+    _set_pool(quote, pool_sats)
+    _set_request(quote, request_mC)
+    _set_paid(quote, btc_paid_sats)
+    _set_rate(quote, rate_sats_per_cbtc)
+    return quote
+
+
+def _new_quote(tier, outstanding_mC, pool_sats, request_mC, btc_paid_sats, rate_sats_per_cbtc):
+    return _init_quote(_new_object(RedemptionQuote), tier, outstanding_mC, pool_sats,
+                       request_mC, btc_paid_sats, rate_sats_per_cbtc)
+
+
+_new_object = object.__new__
+
+
+def classify_tier(coverage: Decimal) -> int:
+    """
+    Map absolute coverage to a redemption tier.
+    """
+    if coverage >= TIER1_MIN_COVERAGE:
+        return TIER_FULL_FLOOR
+    if coverage >= TIER2_MIN_COVERAGE:
+        return TIER_HAIRCUT
+    return TIER_PROTECTION
+
+
+def _validate_quote_inputs(outstanding_mC: int, pool_sats: int, request_mC: int) -> None:
+    if outstanding_mC <= 0:
+        raise ValueError("Outstanding cBTC must be > 0.")
+    if pool_sats < 0:
+        raise ValueError("Redemption Pool BTC must be ≥ 0.")
+    if request_mC <= 0:
+        raise ValueError("Redemption request must be > 0.")
+    if request_mC > outstanding_mC:
+        raise ValueError("Redemption request cannot exceed outstanding cBTC.")
+
+
+# --- DECIMAL REFERENCE ENGINE ----------------------------------------------
+
+def quote_redemption_decimal(outstanding_mC: int, pool_sats: int, request_mC: int) -> RedemptionQuote:
+    """
+    Reference implementation of the tier rules in decimal.Decimal
+    (prec=18), exactly as the coordinator scripts originally computed
+    them. Kept as the specification quote_redemption() is checked
+    against, and as the fallback for amounts outside its exact domain.
+    """
+    _validate_quote_inputs(outstanding_mC, pool_sats, request_mC)
+
+    with localcontext(DECIMAL_CONTEXT):
+        # --- Basic quantities ----------------------------------------------
+        O = mC_to_cbtc(outstanding_mC)    # total outstanding (cBTC)
+        R = mC_to_cbtc(request_mC)        # requested redemption (cBTC)
+        F = FLOOR_RATE                    # floor rate (BTC / cBTC)
+        P = sats_to_btc(pool_sats)        # Redemption Pool BTC
+
+        L_before = (O * F).quantize(SAT)  # floor liability before
+        if L_before <= 0:
+            raise ValueError("Invalid liability (L_before <= 0).")
+
+        tier = classify_tier(P / L_before)
+
+        # --- Post-redemption base quantities -------------------------------
+        O_after = (O - R).quantize(MILLI)
+        if O_after > 0:
+            L_after = (O_after * F).quantize(SAT)
+        else:
+            L_after = ZERO
+
+        btc_needed_full = (R * F).quantize(SAT)
+
+        # Coverage after a given payout (only defined while cBTC remains
+        # outstanding)
+        def compute_coverage_after(payout: Decimal) -> Decimal:
+            if O_after <= 0 or L_after <= 0:
+                return ZERO
+            P_after = (P - payout).quantize(SAT)
+            return P_after / L_after
+
+        # --- Tier 1 & Tier 2: full floor if safe, else haircut to ≥ 50% ----
+        if tier != TIER_PROTECTION:
+            if O_after <= 0:
+                # Redeeming all outstanding cBTC: no future liability.
+                # Pay up to full floor, capped by pool.
+                btc_paid = min(btc_needed_full, P)
+                redemption_rate = (btc_paid / R).quantize(SAT)
+            else:
+                # Try full floor first
+                P_after_full = (P - btc_needed_full).quantize(SAT)
+
+                if P_after_full < 0:
+                    # Can't afford full floor, must haircut
+                    can_pay_full = False
+                else:
+                    cov_after_full = compute_coverage_after(btc_needed_full)
+                    can_pay_full = (cov_after_full >= TIER2_MIN_COVERAGE)
+
+                if can_pay_full:
+                    # Full floor is safe
+                    btc_paid = btc_needed_full
+                    redemption_rate = F
+                else:
+                    # Haircut so that coverage_after = 50%
+                    # coverage_after = (P - btc_paid) / L_after = 0.5
+                    # => btc_paid = P - 0.5 * L_after
+                    btc_paid_candidate = (P - HALF * L_after).quantize(SAT)
+                    if btc_paid_candidate < 0:
+                        btc_paid_candidate = ZERO
+                    # Never pay more than full floor or more than the pool
+                    btc_paid = min(btc_paid_candidate, btc_needed_full, P)
+
+                    if btc_paid > 0:
+                        redemption_rate = (btc_paid / R).quantize(SAT)
+                    else:
+                        redemption_rate = ZERO
+
+        # --- Tier 3: strictly pro-rata -------------------------------------
+        else:
+            # Pro-rata rule:
+            #    btc_paid = P * (R / O)
+            # Ensures coverage_after == coverage_before (constant coverage).
+            share = (R / O)
+            btc_paid = (P * share).quantize(SAT)
+
+            # Cap at pool for sanity
+            if btc_paid > P:
+                btc_paid = P
+
+            redemption_rate = (btc_paid / R).quantize(SAT)
+
+        # Sanity: never pay negative or more than pool
+        if btc_paid < 0:
+            btc_paid = ZERO
+        if btc_paid > P:
+            btc_paid = P
+
+        btc_paid_sats = btc_to_sats(btc_paid)
+        rate_sats_per_cbtc = btc_to_sats(redemption_rate)
+
+    return _new_quote(
+        tier,
+        outstanding_mC,
+        pool_sats,
+        request_mC,
+        btc_paid_sats,
+        rate_sats_per_cbtc,
+    )
+
+
+# --- INTEGER ENGINE --------------------------------------------------------
+#
+# Units: satoshis (sats) for BTC, milli-cBTC (mC) for cBTC.
+#
+# With F = 0.00001 BTC/cBTC, every floor amount is a whole number of
+# satoshis: L = O_mC sats, full-floor payout = R_mC sats. So the
+# reference engine's quantize() calls on liabilities are exact and
+# every comparison becomes a cross-multiplication:
+#
+#   coverage >= 60%   <=>  5 * P >= 3 * L
+#   coverage >= 50%   <=>  2 * P >= L
+#
+# The reference engine divides at 18 significant digits before
+# comparing/quantizing. That only changes a result when the exact
+# rational lies within half a unit in the 18th digit of a threshold
+# or of a rounding midpoint. The nearest non-tie is 1/(2*den) away
+# (den = L, L_after or R, all < 10**15), which is larger than that
+# error, and exact ties are representable in 18 digits, so integer
+# half-even rounding gives the same answers within EXACT_MAX_MC /
+# EXACT_MAX_SATS. Outside that domain quote_redemption() falls back
+# to the Decimal engine.
+#
+# Tier 3 is the exception: btc_paid = P * (R / O) rounds R / O to 18
+# digits first and that rounding can decide a half-satoshi. Near a
+# half-satoshi it is reproduced exactly with _div_prec18() /
+# _round_prec18().
+
+EXACT_MAX_MC = 10**15 - 1     # > 21M BTC × 30,000 cBTC × 1000
+EXACT_MAX_SATS = 10**16 - 1   # 100M BTC
+
+DECIMAL_PRECISION = 18
+_POW10 = [10**i for i in range(128)]
+_TIER3_ERROR_SCALE = 10**(DECIMAL_PRECISION - 1)
+
+
+def _pow10(n: int) -> int:
+    return _POW10[n] if n < len(_POW10) else 10**n
+
+
+def _num_digits(n: int) -> int:
+    """
+    Number of decimal digits of n > 0.
+    """
+    d = (n.bit_length() * 1233) >> 12     # ≈ floor(bits × log10(2))
+    return d + 1 if n >= _pow10(d) else d
+
+
+def _round_half_even(num: int, den: int) -> int:
+    """
+    num / den rounded to the nearest integer, ties to even
+    (num >= 0, den > 0), as Decimal's default ROUND_HALF_EVEN.
+    """
+    q, r = divmod(num, den)
+    r2 = r + r
+    if r2 > den or (r2 == den and q & 1):
+        q += 1
+    return q
+
+
+def _div_prec18(num: int, den: int):
+    """
+    Emulate Decimal(num) / Decimal(den) at 18 significant digits.
+    Returns (m, k) with quotient value m × 10**-k.
+    """
+    if num == 0:
+        return 0, 0
+    # Pick k so that num / den × 10**k has exactly 18 integer digits.
+    k = DECIMAL_PRECISION - 1 - (_num_digits(num) - _num_digits(den))
+    lower = den * _POW10[DECIMAL_PRECISION - 1]
+    if k >= 0:
+        too_small = num * _pow10(k) < lower
+    else:
+        too_small = num < lower * _pow10(-k)
+    if too_small:
+        k += 1
+    if k >= 0:
+        return _round_half_even(num * _pow10(k), den), k
+    return _round_half_even(num, den * _pow10(-k)), k
+
+
+def _round_prec18(m: int, k: int):
+    """
+    Round m × 10**-k to 18 significant digits. Returns (m', k').
+    """
+    if m == 0:
+        return 0, 0
+    excess = _num_digits(m) - DECIMAL_PRECISION
+    if excess <= 0:
+        return m, k
+    return _round_half_even(m, _pow10(excess)), k - excess
+
+
+def _to_units(m: int, k: int) -> int:
+    """
+    Quantize m × 10**-k to an integer, ties to even.
+    """
+    if k <= 0:
+        return m * _pow10(-k)
+    return _round_half_even(m, _pow10(k))
+
+
+def quote_redemption(outstanding_mC: int, pool_sats: int, request_mC: int) -> RedemptionQuote:
+    """
+    Quote a redemption of `request_mC` milli-cBTC against a Redemption
+    Pool holding `pool_sats` satoshis, with `outstanding_mC` milli-cBTC
+    outstanding before the redemption.
+
+    Integer-only; identical to quote_redemption_decimal().
+    Raises ValueError for inputs the protocol cannot quote.
+    """
+    if not (0 < request_mC <= outstanding_mC and pool_sats >= 0):
+        _validate_quote_inputs(outstanding_mC, pool_sats, request_mC)
+
+    if outstanding_mC > EXACT_MAX_MC or pool_sats > EXACT_MAX_SATS:
+        return quote_redemption_decimal(outstanding_mC, pool_sats, request_mC)
+
+    P = pool_sats
+    R = request_mC                        # full-floor payout in sats
+    L_before = outstanding_mC             # floor liability in sats
+    L_after = outstanding_mC - request_mC
+
+    # Tier classification by absolute coverage P / L_before
+    if 5 * P >= 3 * L_before:
+        tier = TIER_FULL_FLOOR
+    elif 2 * P >= L_before:
+        tier = TIER_HAIRCUT
+    else:
+        tier = TIER_PROTECTION
+
+    # --- Tier 1 & Tier 2: full floor if safe, else haircut to ≥ 50% --------
+    if tier != TIER_PROTECTION:
+        if L_after == 0:
+            # Redeeming all outstanding cBTC: pay up to full floor,
+            # capped by pool.
+            btc_paid = R if R <= P else P
+            rate = _round_half_even(btc_paid * MC_PER_CBTC, R)
+        elif P >= R and 2 * (P - R) >= L_after:
+            # Full floor keeps coverage ≥ 50%
+            btc_paid = R
+            rate = MC_PER_CBTC            # 0.00001 BTC/cBTC = 1000 sats/cBTC
+        else:
+            # Haircut so that coverage_after = 50%:
+            #   btc_paid = P - L_after / 2   (half-satoshi ties to even)
+            twice = 2 * P - L_after
+            candidate = _round_half_even(twice, 2) if twice > 0 else 0
+            btc_paid = min(candidate, R, P)
+            rate = _round_half_even(btc_paid * MC_PER_CBTC, R)
+
+    # --- Tier 3: strictly pro-rata -----------------------------------------
+    else:
+        # btc_paid = P × (R / O)
+        #
+        # The Decimal engine rounds R / O and then the product to 18
+        # digits, a relative error below 1.0000001e-17. Exact half-even
+        # rounding of P × R / O agrees whenever the exact quotient is
+        # further than that from a half-satoshi:
+        #   |2·rem − O| / (2·O)  >  (P·R / O) × 1.0000001e-17
+        # which the check below tests with margin. Exact ties and
+        # near-ties replay the 18-digit roundings instead.
+        num = P * R
+        btc_paid, rem = divmod(num, outstanding_mC)
+        distance = abs(rem + rem - outstanding_mC)
+        if distance * _TIER3_ERROR_SCALE > 3 * num:
+            if rem + rem > outstanding_mC:
+                btc_paid += 1
+        else:
+            share_m, share_k = _div_prec18(R, outstanding_mC)
+            paid_m, paid_k = _round_prec18(P * share_m, share_k)
+            btc_paid = _to_units(paid_m, paid_k)
+        if btc_paid > P:
+            btc_paid = P
+        rate = _round_half_even(btc_paid * MC_PER_CBTC, R)
+
+    return _new_quote(tier, outstanding_mC, pool_sats, request_mC, btc_paid, rate)
+
+
+# --- SERIALIZATION ---------------------------------------------------------
+
+def quote_to_json(quote: RedemptionQuote):
+    """
+    JSON-ready dict of a quote (amounts as exact strings), as returned
+    by the coordinator API and the scripted redemption modes.
+    """
+    result = {
+        "tier": quote.tier,
+        "tier_label": quote.tier_label,
+        "requested_cbtc": format_cbtc_from_mC(quote.request_mC),
+        "requested_mC": quote.request_mC,
+        "btc_paid": f"{quote.btc_paid:.8f}",
+        "btc_paid_sats": quote.btc_paid_sats,
+        "redemption_rate": f"{quote.redemption_rate:.8f}",
+        "redemption_pool_btc": f"{sats_to_btc(quote.pool_sats):.8f}",
+        "liability_before": f"{quote.liability_before:.8f}",
+        "liability_after": f"{quote.liability_after:.8f}",
+        "coverage_before_pct": str(quote.coverage_before_pct),
+        "coverage_after_pct": None,
+    }
+    if quote.coverage_after is not None:
+        result["coverage_after_pct"] = str(quote.coverage_after_pct)
+    return result
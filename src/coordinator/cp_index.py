@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Per-CP Position Index (EXPERIMENTAL)
+#
+# Maintained per-Collateral-Provider totals from "mint" events:
+#
+#   channels         – Minting Channels opened
+#   deposit_sats     – BTC deposited (sats)
+#   principal_sats   – 70% principal share
+#   redemption_sats  – 20% contributed to the Redemption Pool
+#   yield_sats       – 10% contributed to the Yield Pool
+#   minted_mC        – cBTC minted (milli-cBTC)
+#   first_mint / last_mint – event timestamps
+#
+# Both backends keep the positions in a cp_positions table, one row
+# per CP, so a refresh only writes the rows of CPs that minted:
+#
+# JSONL backend:
+#   data/ledger.cp_index.sqlite3
+#     - same offset / tail-hash scheme as the supply checkpoint
+#       (ledger.py): only lines appended since the last update are
+#       folded in, in one transaction with the new log position, so
+#       the index stays cheap with thousands of CPs and a long ledger
+#     - a cache: rebuilt from the first event if missing or stale
+#
+# SQLite backend (CBTC_LEDGER_BACKEND=sqlite):
+#   cp_positions table in the ledger store, updated in the same
+#   transaction as each appended mint (see ledger_sqlite.py)
+#
+# Usage:
+#   python src/coordinator/cp_index.py      (refresh the index)
+#   python src/coordinator/status.py cps    (list all CPs)
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+import json
+import re
+import sqlite3
+import threading
+
+from core import btc_to_sats
+from ledger import (
+    LEDGER_PATH,
+    REPO_ROOT,
+    checkpoint_matches_log,
+    decode_line,
+    empty_checkpoint,
+    event_supply_delta_mC,
+    fold_line,
+    get_sqlite_store,
+    iter_legacy_events,
+)
+
+CP_INDEX_PATH = REPO_ROOT / "data" / "ledger.cp_index.sqlite3"
+
+POSITION_FIELDS = (
+    "channels",
+    "deposit_sats",
+    "principal_sats",
+    "redemption_sats",
+    "yield_sats",
+    "minted_mC",
+)
+
+
+# --- FOLDING ---------------------------------------------------------------
+
+def _sats(value) -> int:
+    if value is None:
+        return 0
+    return btc_to_sats(Decimal(str(value)))
+
+
+def mint_position_delta(event):
+    """
+    Returns (cp_wallet, {field: delta}) for a "mint" event, or None for
+    any other event.
+    """
+    if event.get("type") != "mint":
+        return None
+
+    minted_mC, _ = event_supply_delta_mC(event)
+    return event.get("cp_wallet") or "UNKNOWN", {
+        "channels": 1,
+        "deposit_sats": _sats(event.get("deposit_btc")),
+        "principal_sats": _sats(event.get("principal_btc")),
+        "redemption_sats": _sats(event.get("redemption_btc")),
+        "yield_sats": _sats(event.get("yield_btc")),
+        "minted_mC": minted_mC,
+    }
+
+
+def empty_position():
+    position = {field: 0 for field in POSITION_FIELDS}
+    position["first_mint"] = None
+    position["last_mint"] = None
+    return position
+
+
+def fold_cp_event(cps, event) -> None:
+    """
+    Fold one event into the {cp_wallet: position} map (in place).
+    """
+    delta = mint_position_delta(event)
+    if delta is None:
+        return
+
+    cp_wallet, amounts = delta
+    position = cps.get(cp_wallet)
+    if position is None:
+        position = cps[cp_wallet] = empty_position()
+    for field, amount in amounts.items():
+        position[field] += amount
+
+    timestamp = event.get("timestamp")
+    if position["first_mint"] is None:
+        position["first_mint"] = timestamp
+    position["last_mint"] = timestamp
+
+
+# --- POSITIONS TABLE -------------------------------------------------------
+# The same cp_positions table backs both ledger backends: inside the
+# SQLite ledger (ledger_sqlite.py) and in the JSONL index below.
+
+CP_POSITIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cp_positions (
+    cp_wallet       TEXT PRIMARY KEY,
+    channels        INTEGER NOT NULL,
+    deposit_sats    INTEGER NOT NULL,
+    principal_sats  INTEGER NOT NULL,
+    redemption_sats INTEGER NOT NULL,
+    yield_sats      INTEGER NOT NULL,
+    minted_mC       INTEGER NOT NULL,
+    first_mint      TEXT,
+    last_mint       TEXT
+);
+"""
+
+_POSITION_COLUMNS = ("cp_wallet",) + POSITION_FIELDS + ("first_mint", "last_mint")
+
+
+def upsert_cp_position(conn, event) -> None:
+    """
+    Fold one event into the cp_positions table (inside the caller's
+    transaction). Only the event's CP row is written.
+    """
+    delta = mint_position_delta(event)
+    if delta is None:
+        return
+    cp_wallet, amounts = delta
+    timestamp = event.get("timestamp")
+    conn.execute(
+        "INSERT INTO cp_positions (cp_wallet, channels, deposit_sats, principal_sats, redemption_sats,"
+        " yield_sats, minted_mC, first_mint, last_mint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (cp_wallet) DO UPDATE SET"
+        " channels = channels + excluded.channels,"
+        " deposit_sats = deposit_sats + excluded.deposit_sats,"
+        " principal_sats = principal_sats + excluded.principal_sats,"
+        " redemption_sats = redemption_sats + excluded.redemption_sats,"
+        " yield_sats = yield_sats + excluded.yield_sats,"
+        " minted_mC = minted_mC + excluded.minted_mC,"
+        " first_mint = COALESCE(first_mint, excluded.first_mint),"
+        " last_mint = excluded.last_mint",
+        (cp_wallet,) + tuple(amounts[field] for field in POSITION_FIELDS) + (timestamp, timestamp),
+    )
+
+
+def select_cp_positions(conn):
+    """
+    Returns {cp_wallet: position} from the cp_positions table.
+    """
+    rows = conn.execute(f"SELECT {', '.join(_POSITION_COLUMNS)} FROM cp_positions")
+    return {row[0]: dict(zip(_POSITION_COLUMNS[1:], row[1:])) for row in rows}
+
+
+# --- JSONL INDEX -----------------------------------------------------------
+
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+_index_local = threading.local()
+
+
+def _index_conn() -> sqlite3.Connection:
+    """
+    This thread's connection to the index (created on first use).
+    """
+    conn = getattr(_index_local, "conn", None)
+    if conn is None or getattr(_index_local, "path", None) != CP_INDEX_PATH:
+        CP_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(CP_INDEX_PATH), timeout=30, isolation_level=None)
+        conn.executescript(CP_POSITIONS_SCHEMA + _META_SCHEMA)
+        _index_local.conn = conn
+        _index_local.path = CP_INDEX_PATH
+    return conn
+
+
+def _load_checkpoint(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'checkpoint'").fetchone()
+    if row is None:
+        return empty_checkpoint()
+    try:
+        data = json.loads(row[0])
+        checkpoint = empty_checkpoint()
+        for key in checkpoint:
+            checkpoint[key] = type(checkpoint[key])(data[key])
+        return checkpoint
+    except Exception:
+        return empty_checkpoint()
+
+
+def update_cp_index():
+    """
+    Bring data/ledger.cp_index.sqlite3 up to date with the log and
+    return its connection. Returns None if there is no log yet (legacy
+    ledger only).
+
+    One transaction per refresh: the rows of the CPs that minted since
+    the last refresh and the log position are written, nothing else.
+    """
+    if not LEDGER_PATH.exists():
+        return None
+
+    conn = _index_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stored = _load_checkpoint(conn)
+        checkpoint = dict(stored)
+        with LEDGER_PATH.open("rb") as f:
+            if not checkpoint_matches_log(checkpoint, f):
+                conn.execute("DELETE FROM cp_positions")
+                checkpoint = empty_checkpoint()
+            f.seek(checkpoint["offset"])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                fold_line(checkpoint, line)
+                event = decode_line(line)
+                if event is not None:
+                    upsert_cp_position(conn, event)
+
+        if checkpoint != stored:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('checkpoint', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (json.dumps(checkpoint, sort_keys=True),),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return conn
+
+
+# --- QUERIES ---------------------------------------------------------------
+
+def cp_positions():
+    """
+    Returns {cp_wallet: position} for every CP that has minted.
+    """
+    store = get_sqlite_store()
+    if store is not None:
+        return store.cp_positions()
+
+    conn = update_cp_index()
+    if conn is None:
+        cps = {}
+        for event in iter_legacy_events():
+            fold_cp_event(cps, event)
+        return cps
+    return select_cp_positions(conn)
+
+
+def cp_sort_key(cp_wallet: str):
+    """
+    Natural order: CP2 before CP10.
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", cp_wallet)]
+
+
+def main():
+    cps = cp_positions()
+    channels = sum(position["channels"] for position in cps.values())
+    print(f"[RESULT] CP index up to date: {len(cps)} CPs, {channels} Minting Channels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,866 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Ledger Store (EXPERIMENTAL)
+#
+# Shared ledger access for all coordinator scripts.
+#
+# Primary store:
+#   data/ledger.jsonl
+#     - one JSON event per line (JSON Lines)
+#     - new events are appended and fsync'd
+#     - existing lines are never rewritten (append-only)
+#
+# Legacy store:
+#   data/ledger.json
+#     - {"events": [...]} rewritten in full on every event
+#     - migrated once into data/ledger.jsonl, then left untouched
+#       as a historical snapshot; a truncated or malformed file is
+#       refused, not migrated in part
+#
+# Reading works against either store: if the log does not exist
+# yet, events are read from the legacy file. Both are streamed one
+# event at a time (line iteration / incremental JSON parser), never
+# loaded whole.
+#
+# Backend (CBTC_LEDGER_BACKEND environment variable):
+#   jsonl  (default) – the files above
+#   sqlite           – data/ledger.sqlite3 with indexed queries
+#                      (see ledger_sqlite.py); seeded from the files
+#                      above on first use
+#   Callers of iter_events / load_ledger / append_ledger_events /
+#   ledger_head / load_supply_totals do not change.
+#
+# Concurrent writers:
+#   data/ledger.lock
+#     - every append (and the legacy migration) runs under an
+#       exclusive OS file lock, so parallel mints / redemptions from
+#       several processes never lose or interleave events
+#     - each appended event is stamped with "seq", its position in
+#       the log (1-based, counting readable events)
+#     - writers that acted on a given ledger state (e.g. a redemption
+#       quote) pass expected_seq: if other events landed meanwhile
+#       the append raises LedgerConflict and the caller re-quotes;
+#       catching up costs only the new lines, not a full re-parse
+#
+# Supply checkpoint:
+#   data/ledger.checkpoint.json
+#     - total minted / redeemed milli-cBTC (mC) up to a byte offset
+#       in the log, plus a hash chain over the processed lines
+#     - readers fold in only the lines appended after the offset,
+#       so supply totals cost O(new events), not O(ledger)
+#     - it is a cache: if it is missing or does not match the log,
+#       it is rebuilt from the first event
+#
+# Usage:
+#   python src/coordinator/ledger.py migrate
+#   python src/coordinator/ledger.py checkpoint
+#   python src/coordinator/ledger.py verify-checkpoint
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from core import cbtc_to_mC
+
+# --- LEDGER CONFIG ---------------------------------------------------------
+
+# Resolve repo root (cbtc-protocol/) from this file location:
+# .../cbtc-protocol/src/coordinator/ledger.py
+REPO_ROOT = Path(__file__).resolve().parents[2]
+LEDGER_PATH = REPO_ROOT / "data" / "ledger.jsonl"
+LEGACY_LEDGER_PATH = REPO_ROOT / "data" / "ledger.json"
+CHECKPOINT_PATH = REPO_ROOT / "data" / "ledger.checkpoint.json"
+LOCK_PATH = REPO_ROOT / "data" / "ledger.lock"
+
+# Hash chain seed for an empty prefix: 32 zero bytes, hex-encoded.
+GENESIS_HASH = "00" * 32
+
+LEDGER_BACKENDS = ("jsonl", "sqlite")
+LEDGER_BACKEND = os.environ.get("CBTC_LEDGER_BACKEND", "jsonl").strip().lower() or "jsonl"
+
+
+def get_sqlite_store():
+    """
+    The shared SQLite store if that backend is configured, else None.
+    """
+    if LEDGER_BACKEND == "jsonl":
+        return None
+    if LEDGER_BACKEND != "sqlite":
+        raise ValueError(f"Unknown CBTC_LEDGER_BACKEND: {LEDGER_BACKEND} (expected one of {', '.join(LEDGER_BACKENDS)})")
+
+    # Imported lazily: ledger_sqlite builds on this module
+    from ledger_sqlite import get_store
+    return get_store()
+
+
+# --- ENCODING --------------------------------------------------------------
+
+def encode_event(event) -> bytes:
+    """
+    Serialize one event as a single JSON line.
+
+    Keys are sorted (as in the legacy ledger) and the output is
+    ASCII-only, so every line is self-contained and byte offsets
+    into the log are stable.
+    """
+    line = json.dumps(event, sort_keys=True, separators=(",", ":"))
+    return (line + "\n").encode("ascii")
+
+
+def decode_line(line: bytes):
+    """
+    Parse one log line. Returns None for blank or unreadable lines
+    (e.g. a torn final line left behind by a crash mid-append).
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    return event
+
+
+# --- READ PATH -------------------------------------------------------------
+
+# Legacy file read size (characters) for the streaming parser
+LEGACY_READ_CHUNK = 1 << 20
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\n\r"
+
+
+class _LegacyStream:
+    """
+    Chunked reader over the legacy JSON text that hands complete JSON
+    values to json.JSONDecoder.raw_decode one at a time.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(LEGACY_READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays ~one chunk
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Next non-whitespace character ("" at end of input).
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _JSON_WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in legacy ledger")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decode the next complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buf, self.pos)
+            except ValueError:
+                # Incomplete value: read more, or the file is malformed
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buf) and self._fill():
+                # A number could continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+
+def iter_legacy_events(strict: bool = False):
+    """
+    Yield events from the legacy {"events": [...]} file one at a time.
+
+    Incremental parser: memory stays flat (about one read chunk plus
+    one event) however large the file is. Yields nothing if the file
+    is missing. By default it stops at the first malformed byte (events
+    before it are still yielded) and skips non-object entries; with
+    strict=True (migration) both raise ValueError, as does anything
+    after the closing brace.
+    """
+    if not LEGACY_LEDGER_PATH.exists():
+        return
+
+    with LEGACY_LEDGER_PATH.open("r", encoding="utf-8") as f:
+        stream = _LegacyStream(f)
+        try:
+            stream.expect("{")
+            while stream.peek() not in ("}", ""):
+                key = stream.value()
+                stream.expect(":")
+
+                if key != "events":
+                    stream.value()
+                elif stream.peek() == "[":
+                    stream.expect("[")
+                    index = 0
+                    while stream.peek() not in ("]", ""):
+                        event = stream.value()
+                        if isinstance(event, dict):
+                            yield event
+                        elif strict:
+                            raise ValueError(f"legacy ledger entry #{index} is not an object")
+                        index += 1
+                        if stream.peek() == ",":
+                            stream.expect(",")
+                        elif strict and stream.peek() != "]":
+                            raise ValueError("expected ',' or ']' in legacy ledger")
+                    stream.expect("]")
+                else:
+                    stream.value()
+
+                if stream.peek() == ",":
+                    stream.expect(",")
+                elif strict and stream.peek() != "}":
+                    raise ValueError("expected ',' or '}' in legacy ledger")
+            if strict:
+                stream.expect("}")
+                if stream.peek() != "":
+                    raise ValueError("unexpected data after the legacy ledger object")
+        except ValueError:
+            if strict:
+                raise
+            return
+
+
+def load_legacy_events():
+    """
+    Load the events list from the legacy {"events": [...]} file.
+    If it does not exist, return an empty list. Prefer
+    iter_legacy_events() for single-pass scans.
+    """
+    return list(iter_legacy_events())
+
+
+def iter_events():
+    """
+    Yield ledger events in append order from the configured backend.
+    """
+    store = get_sqlite_store()
+    if store is not None:
+        yield from store.iter_events()
+        return
+    yield from iter_log_events()
+
+
+def iter_log_events():
+    """
+    Yield events from the append-only log if present, otherwise from
+    the legacy JSON file.
+    """
+    if not LEDGER_PATH.exists():
+        yield from iter_legacy_events()
+        return
+
+    with LEDGER_PATH.open("rb") as f:
+        for line in f:
+            event = decode_line(line)
+            if event is not None:
+                yield event
+
+
+def load_ledger():
+    """
+    Load the full ledger as {"events": [...]}.
+
+    Kept for callers that need every event in memory; prefer
+    iter_events() for single-pass scans.
+    """
+    return {"events": list(iter_events())}
+
+
+# --- WRITE PATH ------------------------------------------------------------
+
+def _fsync_dir(path: Path) -> None:
+    """
+    fsync a directory so a newly created/renamed file survives a crash.
+    Not supported on every platform; best effort.
+    """
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# --- WRITER LOCK -----------------------------------------------------------
+
+class LedgerConflict(Exception):
+    """
+    Raised by a conditional append when the log head moved past the
+    sequence number the writer expected.
+    """
+
+    def __init__(self, expected_seq: int, head_seq: int):
+        super().__init__(f"Ledger changed: expected head seq {expected_seq}, found {head_seq}")
+        self.expected_seq = expected_seq
+        self.head_seq = head_seq
+
+
+# Lock paths held by some thread of this process → hold count
+_held_locks = {}
+_held_locks_lock = threading.Lock()
+
+
+def ledger_lock_held(path: Path = None) -> bool:
+    """
+    True while a thread of this process holds the ledger lock at `path`
+    (default LOCK_PATH), i.e. other processes cannot write.
+    """
+    with _held_locks_lock:
+        return _held_locks.get(LOCK_PATH if path is None else path, 0) > 0
+
+
+class LedgerLock:
+    """
+    Exclusive cross-process lock on the ledger (data/ledger.lock).
+
+    Blocks until acquired. Threads of one process exclude each other
+    too, as long as each uses its own LedgerLock.
+
+        with LedgerLock():
+            ...
+
+    `path` selects another lock file (e.g. for a derived cache that
+    must not block ledger writers); the default is read from LOCK_PATH
+    when the lock is created, so repointing LOCK_PATH (as the
+    benchmarks do) moves every default lock with it.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = LOCK_PATH if path is None else path
+        self._file = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = self.path.open("a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            f.close()
+            raise
+        self._file = f
+        with _held_locks_lock:
+            _held_locks[self.path] = _held_locks.get(self.path, 0) + 1
+
+    def release(self) -> None:
+        f, self._file = self._file, None
+        if f is None:
+            return
+        with _held_locks_lock:
+            _held_locks[self.path] -= 1
+            if not _held_locks[self.path]:
+                del _held_locks[self.path]
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class LedgerMigrationError(Exception):
+    """
+    Raised when the legacy ledger cannot be migrated in full (it is
+    truncated or malformed). Nothing is written in that case.
+    """
+
+
+def migrate_legacy_ledger() -> int:
+    """
+    One-shot migration of data/ledger.json into data/ledger.jsonl.
+
+    Does nothing if the log already exists. The log is written to a
+    temporary file and renamed into place, so a crash never leaves a
+    half-migrated log behind. A truncated or malformed legacy file
+    raises LedgerMigrationError and leaves no log behind either, since
+    the existing log would stop every later migration and the missing
+    events would be lost for good.
+
+    Returns the number of migrated events.
+    """
+    if LEDGER_PATH.exists():
+        return 0
+
+    count = 0
+    LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = LEDGER_PATH.with_name(LEDGER_PATH.name + ".tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            for event in iter_legacy_events(strict=True):
+                f.write(encode_event(event))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+    except ValueError as e:
+        tmp_path.unlink(missing_ok=True)
+        raise LedgerMigrationError(f"Cannot migrate {LEGACY_LEDGER_PATH} after {count} events: {e}") from None
+    os.replace(tmp_path, LEDGER_PATH)
+    _fsync_dir(LEDGER_PATH.parent)
+
+    return count
+
+
+def append_ledger_events(events, expected_seq: int = None, lock_held: bool = False) -> int:
+    """
+    Append events to the configured backend and persist them (fsync /
+    SQLite commit). Returns the new head seq.
+
+    Each event is stamped with its "seq" (in place). If expected_seq is
+    given and the log head is not at that seq, nothing is written and
+    LedgerConflict is raised.
+
+    Takes the writer lock unless the caller already holds it
+    (lock_held=True). Cost is proportional to the events appended
+    since this process last looked, not to the size of the ledger.
+    """
+    events = list(events)
+    if lock_held:
+        return _append_locked(events, expected_seq)
+    with LedgerLock():
+        return _append_locked(events, expected_seq)
+
+
+def _append_locked(events, expected_seq):
+    store = get_sqlite_store()
+    if store is not None:
+        return store.append_events(events, expected_seq)
+
+    migrate_legacy_ledger()
+
+    head_seq = ledger_head()[0]
+    if expected_seq is not None and head_seq != expected_seq:
+        raise LedgerConflict(expected_seq, head_seq)
+    if not events:
+        return head_seq
+
+    for i, event in enumerate(events, start=1):
+        event["seq"] = head_seq + i
+    payload = b"".join(encode_event(ev) for ev in events)
+
+    with LEDGER_PATH.open("ab+") as f:
+        # If a previous append was torn, start on a fresh line so the
+        # new event is not glued onto the partial one.
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+    return head_seq + len(events)
+
+
+def append_ledger_event(event, expected_seq: int = None, lock_held: bool = False) -> int:
+    """
+    Append a single event to the ledger and persist it.
+    """
+    return append_ledger_events([event], expected_seq, lock_held)
+
+
+# --- SUPPLY TOTALS ---------------------------------------------------------
+
+def event_supply_delta_mC(ev):
+    """
+    Returns (minted_mC, redeemed_mC) contributed by a single event.
+
+    Compatible with:
+      - older events with "minted_cbtc" / "burned_cbtc" only
+      - newer events with "minted_mC" / "burned_mC"
+    """
+    ev_type = ev.get("type")
+
+    if ev_type == "mint":
+        if "minted_mC" in ev:
+            return int(ev["minted_mC"]), 0
+        return cbtc_to_mC(ev.get("minted_cbtc", "0")), 0
+
+    if ev_type == "redeem":
+        if "burned_mC" in ev:
+            return 0, int(ev["burned_mC"])
+        return 0, cbtc_to_mC(ev.get("burned_cbtc", "0"))
+
+    return 0, 0
+
+
+def sum_minted_and_redeemed_mC(events):
+    """
+    Returns:
+      total_minted_mC   – integer milli-cBTC
+      total_redeemed_mC – integer milli-cBTC
+
+    Single pass over any iterable of events (e.g. iter_events()), so
+    memory stays flat regardless of ledger size. For the on-disk
+    ledger prefer load_supply_totals(), which resumes from the
+    checkpoint.
+    """
+    total_minted_mC = 0
+    total_redeemed_mC = 0
+
+    for ev in events:
+        minted_mC, redeemed_mC = event_supply_delta_mC(ev)
+        total_minted_mC += minted_mC
+        total_redeemed_mC += redeemed_mC
+
+    return total_minted_mC, total_redeemed_mC
+
+
+def chain_hash(prev_hash: str, line: bytes) -> str:
+    """
+    Extend the prefix hash chain by one raw log line:
+      h_n = sha256(h_{n-1} || line_n)
+    """
+    return hashlib.sha256(bytes.fromhex(prev_hash) + line).hexdigest()
+
+
+def empty_checkpoint():
+    return {
+        "offset": 0,
+        "event_count": 0,
+        "total_minted_mC": 0,
+        "total_redeemed_mC": 0,
+        "prefix_hash": GENESIS_HASH,
+        "tail_length": 0,
+        "tail_sha256": "",
+    }
+
+
+def load_checkpoint():
+    """
+    Load the persisted checkpoint, or an empty one if it is missing
+    or unreadable.
+    """
+    if not CHECKPOINT_PATH.exists():
+        return empty_checkpoint()
+    try:
+        with CHECKPOINT_PATH.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        checkpoint = empty_checkpoint()
+        for key in checkpoint:
+            checkpoint[key] = type(checkpoint[key])(data[key])
+        return checkpoint
+    except Exception:
+        return empty_checkpoint()
+
+
+def save_checkpoint(checkpoint) -> None:
+    """
+    Persist the checkpoint atomically (write temp file, then rename).
+    """
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Per-writer temp name: several processes may refresh it at once
+    tmp_path = CHECKPOINT_PATH.with_name(f"{CHECKPOINT_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def checkpoint_matches_log(checkpoint, f) -> bool:
+    """
+    Cheap consistency check of a checkpoint against an open log file:
+    the log must still be at least `offset` bytes long and the last
+    processed line must still sit right before `offset`.
+
+    Catches a replaced, truncated or rewritten log without rehashing
+    the whole prefix (see verify_checkpoint() for the full check).
+    """
+    offset = checkpoint["offset"]
+    if offset == 0:
+        return True
+
+    tail_length = checkpoint["tail_length"]
+    if tail_length <= 0 or tail_length > offset:
+        return False
+
+    f.seek(0, os.SEEK_END)
+    if f.tell() < offset:
+        return False
+
+    f.seek(offset - tail_length)
+    tail = f.read(tail_length)
+    return hashlib.sha256(tail).hexdigest() == checkpoint["tail_sha256"]
+
+
+def fold_line(checkpoint, line: bytes) -> None:
+    """
+    Fold one complete raw log line into the checkpoint (in place).
+    Unreadable lines advance the offset and hash but add no supply,
+    matching iter_events(), which skips them.
+    """
+    event = decode_line(line)
+    if event is not None:
+        minted_mC, redeemed_mC = event_supply_delta_mC(event)
+        checkpoint["total_minted_mC"] += minted_mC
+        checkpoint["total_redeemed_mC"] += redeemed_mC
+        checkpoint["event_count"] += 1
+
+    checkpoint["offset"] += len(line)
+    checkpoint["prefix_hash"] = chain_hash(checkpoint["prefix_hash"], line)
+    checkpoint["tail_length"] = len(line)
+    checkpoint["tail_sha256"] = hashlib.sha256(line).hexdigest()
+
+
+def advance_checkpoint(checkpoint, f):
+    """
+    Fold every complete line after checkpoint["offset"] into a copy of
+    the checkpoint and return it. A torn final line (no trailing
+    newline) is left for a later call.
+    """
+    checkpoint = dict(checkpoint)
+    f.seek(checkpoint["offset"])
+
+    for line in f:
+        if not line.endswith(b"\n"):
+            break
+        fold_line(checkpoint, line)
+
+    return checkpoint
+
+
+def update_checkpoint():
+    """
+    Bring the persisted checkpoint up to date with the log and return it.
+
+    Only lines appended since the last checkpoint are read. If the
+    checkpoint does not match the log it is rebuilt from scratch.
+    Returns None if there is no log yet (legacy ledger only).
+    """
+    if not LEDGER_PATH.exists():
+        return None
+
+    checkpoint = load_checkpoint()
+    with LEDGER_PATH.open("rb") as f:
+        if not checkpoint_matches_log(checkpoint, f):
+            checkpoint = empty_checkpoint()
+        updated = advance_checkpoint(checkpoint, f)
+
+    if updated != checkpoint or not CHECKPOINT_PATH.exists():
+        save_checkpoint(updated)
+    return updated
+
+
+def load_supply_totals():
+    """
+    Returns:
+      total_minted_mC   – integer milli-cBTC
+      total_redeemed_mC – integer milli-cBTC
+
+    Resumes from the persisted checkpoint and folds in only newer
+    events. Falls back to a full scan of the legacy ledger if the
+    append-only log does not exist yet.
+    """
+    store = get_sqlite_store()
+    if store is not None:
+        return store.head()[1:]
+
+    checkpoint = update_checkpoint()
+    if checkpoint is None:
+        return sum_minted_and_redeemed_mC(iter_legacy_events())
+    return checkpoint["total_minted_mC"], checkpoint["total_redeemed_mC"]
+
+
+class LedgerTotals:
+    """
+    In-memory supply totals for long-running processes, kept in step
+    with data/ledger.jsonl.
+
+    Starts from the persisted checkpoint and afterwards reads only the
+    bytes appended since the last refresh. If the log was replaced or
+    truncated the totals are rebuilt from scratch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkpoint = update_checkpoint()
+        self._stat = None
+
+    def head(self):
+        """
+        Returns (head_seq, total_minted_mC, total_redeemed_mC), folding
+        in any lines appended since the previous call.
+        """
+        with self._lock:
+            if not LEDGER_PATH.exists():
+                # Legacy ledger only (not migrated yet)
+                self._checkpoint = None
+                count = 0
+                total_minted_mC = 0
+                total_redeemed_mC = 0
+                for event in iter_legacy_events():
+                    minted_mC, redeemed_mC = event_supply_delta_mC(event)
+                    total_minted_mC += minted_mC
+                    total_redeemed_mC += redeemed_mC
+                    count += 1
+                return count, total_minted_mC, total_redeemed_mC
+
+            st = os.stat(LEDGER_PATH)
+            stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if self._checkpoint is None or stat_key != self._stat:
+                checkpoint = self._checkpoint or empty_checkpoint()
+                with LEDGER_PATH.open("rb") as f:
+                    if not checkpoint_matches_log(checkpoint, f):
+                        checkpoint = empty_checkpoint()
+                    self._checkpoint = advance_checkpoint(checkpoint, f)
+                self._stat = stat_key
+
+            c = self._checkpoint
+            return c["event_count"], c["total_minted_mC"], c["total_redeemed_mC"]
+
+    def refresh(self):
+        """
+        Returns (total_minted_mC, total_redeemed_mC), folding in any
+        lines appended since the previous call.
+        """
+        return self.head()[1:]
+
+
+_process_totals = None
+_process_totals_lock = threading.Lock()
+
+
+def ledger_head():
+    """
+    Returns (head_seq, total_minted_mC, total_redeemed_mC) for the log
+    as it is now. Kept per process, so repeated calls only read lines
+    appended in between.
+    """
+    store = get_sqlite_store()
+    if store is not None:
+        return store.head()
+
+    global _process_totals
+    with _process_totals_lock:
+        if _process_totals is None:
+            _process_totals = LedgerTotals()
+    return _process_totals.head()
+
+
+def verify_checkpoint() -> bool:
+    """
+    Full audit: recompute the checkpoint from the first log line and
+    compare it with the persisted one (up to its offset).
+    """
+    if not LEDGER_PATH.exists() or not CHECKPOINT_PATH.exists():
+        return False
+
+    persisted = load_checkpoint()
+    recomputed = empty_checkpoint()
+    with LEDGER_PATH.open("rb") as f:
+        for line in f:
+            if recomputed["offset"] >= persisted["offset"]:
+                break
+            fold_line(recomputed, line)
+
+    return recomputed == persisted
+
+
+# --- CLI -------------------------------------------------------------------
+
+USAGE = "Usage: python src/coordinator/ledger.py migrate|checkpoint|verify-checkpoint"
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(USAGE)
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "migrate":
+        if LEDGER_PATH.exists():
+            print(f"[INFO] Ledger log already exists: {LEDGER_PATH}")
+            return
+
+        try:
+            with LedgerLock():
+                count = migrate_legacy_ledger()
+        except LedgerMigrationError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        print(f"[RESULT] Migrated {count} events")
+        print(f"         from: {LEGACY_LEDGER_PATH}")
+        print(f"         to:   {LEDGER_PATH}")
+
+    elif command == "checkpoint":
+        checkpoint = update_checkpoint()
+        if checkpoint is None:
+            print(f"[ERROR] No ledger log at {LEDGER_PATH} (run 'migrate' first).")
+            sys.exit(1)
+
+        print(f"[RESULT] Checkpoint at offset {checkpoint['offset']} ({checkpoint['event_count']} events)")
+        print(f"         Total minted mC:   {checkpoint['total_minted_mC']}")
+        print(f"         Total redeemed mC: {checkpoint['total_redeemed_mC']}")
+        print(f"         Prefix hash:       {checkpoint['prefix_hash']}")
+
+    elif command == "verify-checkpoint":
+        if verify_checkpoint():
+            print("[RESULT] Checkpoint matches the ledger log.")
+        else:
+            print("[ERROR] Checkpoint does not match the ledger log (or is missing).")
+            sys.exit(1)
+
+    else:
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
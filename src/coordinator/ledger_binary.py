@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Binary Event Log (EXPERIMENTAL)
+#
+# Compact fixed-record copy of the ledger for analytics:
+#
+#   data/ledger.bin            – one 128-byte record per event:
+#                                seq, timestamp (µs since epoch),
+#                                minted / burned mC, deposit /
+#                                principal / redemption / yield /
+#                                BTC-paid sats, 32-byte txid, CP id
+#   data/ledger.bin.extra      – compact JSON of every field a record
+#                                cannot reproduce byte-for-byte (e.g.
+#                                "deposit_btc": "1.0", tier labels,
+#                                legacy field spellings)
+#   data/ledger.bin.meta.json  – record count, CP id → name table and
+#                                the source position
+#
+# - Read through mmap + numpy.frombuffer: the record array is a view
+#   of the file, nothing is parsed or copied, so totals, per-CP sums
+#   and time-bucketed supply curves are vectorized reductions
+# - Lossless: decoding a record (plus its extra JSON) gives back the
+#   original event; "verify" checks every event against the ledger
+# - A cache, never the ledger of record: kept up to date
+#   incrementally from data/ledger.jsonl (same offset / tail-hash
+#   scheme as the supply checkpoint), from the SQLite store (by
+#   seq) or built once from the legacy data/ledger.json; rebuilt from
+#   the first event if missing or stale
+#
+# Usage:
+#   python src/coordinator/ledger_binary.py build
+#   python src/coordinator/ledger_binary.py verify
+#   python src/coordinator/ledger_binary.py totals
+#   python src/coordinator/ledger_binary.py cps
+#   python src/coordinator/ledger_binary.py curve [--bucket-hours N]
+#   python src/coordinator/ledger_binary.py export <path.json|path.jsonl>
+#
+# Dependencies:
+#   pip install numpy
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+import argparse
+import datetime
+import json
+import mmap
+import os
+import sys
+import threading
+
+import numpy as np
+
+from core import btc_to_sats, format_cbtc_from_mC, sats_to_btc
+from cp_index import POSITION_FIELDS, cp_sort_key
+from ledger import (
+    LEDGER_PATH,
+    REPO_ROOT,
+    LedgerLock,
+    checkpoint_matches_log,
+    decode_line,
+    empty_checkpoint,
+    encode_event,
+    event_supply_delta_mC,
+    fold_line,
+    get_sqlite_store,
+    iter_events,
+    iter_legacy_events,
+)
+
+# --- FORMAT ----------------------------------------------------------------
+
+BINARY_LOG_PATH = REPO_ROOT / "data" / "ledger.bin"
+EXTRA_PATH = REPO_ROOT / "data" / "ledger.bin.extra"
+META_PATH = REPO_ROOT / "data" / "ledger.bin.meta.json"
+BINARY_LOCK_PATH = REPO_ROOT / "data" / "ledger.bin.lock"
+
+# Little-endian, 8-byte fields first (aligned), 128 bytes per record
+RECORD_DTYPE = np.dtype([
+    ("seq", "<i8"),
+    ("timestamp_us", "<i8"),
+    ("minted_mC", "<i8"),
+    ("burned_mC", "<i8"),
+    ("deposit_sats", "<i8"),
+    ("principal_sats", "<i8"),
+    ("redemption_sats", "<i8"),
+    ("yield_sats", "<i8"),
+    ("btc_paid_sats", "<i8"),
+    ("extra_offset", "<u8"),
+    ("txid", "V32"),
+    ("cp_id", "<u4"),
+    ("extra_len", "<u4"),
+    ("fields", "<u2"),
+    ("type", "u1"),
+    ("reserved", "V5"),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+TYPE_OTHER = 0
+TYPE_MINT = 1
+TYPE_REDEEM = 2
+TYPE_NAMES = {TYPE_MINT: "mint", TYPE_REDEEM: "redeem"}
+TYPE_CODES = {name: code for code, name in TYPE_NAMES.items()}
+
+# timestamp_us of events without a parseable timestamp
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+# cp_id 0: event has no (string) cp_wallet
+UNKNOWN_CP = "UNKNOWN"
+
+# Records encoded per write
+WRITE_BATCH = 65536
+
+_INT64_MIN = int(np.iinfo(np.int64).min)
+_INT64_MAX = int(np.iinfo(np.int64).max)
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_US = datetime.timedelta(microseconds=1)
+_NO_TXID = bytes(32)
+_RESERVED = bytes(5)
+
+
+# --- FIELD CODECS ----------------------------------------------------------
+# Each event field maps to a record column. A field is marked as
+# present in "fields" only if formatting the column gives back exactly
+# the original value; anything else goes to the extra JSON.
+
+def _int64(value) -> int:
+    if type(value) is not int or not _INT64_MIN <= value <= _INT64_MAX:
+        raise ValueError(f"not an int64: {value!r}")
+    return value
+
+
+def _sats(value) -> int:
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise ValueError(f"not a BTC amount: {value!r}")
+    return _int64(btc_to_sats(Decimal(str(value))))
+
+
+def _btc(sats: int) -> str:
+    return f"{sats_to_btc(sats):.8f}"
+
+
+def parse_timestamp_us(value) -> int:
+    """
+    Ledger timestamp ("2026-01-24T17:28:14.433734Z") → microseconds
+    since the Unix epoch. Raises ValueError for anything else.
+    """
+    if not isinstance(value, str) or not value.endswith("Z"):
+        raise ValueError(f"not a UTC timestamp: {value!r}")
+    dt = datetime.datetime.fromisoformat(value[:-1])
+    if dt.tzinfo is not None:
+        raise ValueError(f"not a UTC timestamp: {value!r}")
+    return (dt - _EPOCH) // _ONE_US
+
+
+def format_timestamp_us(us: int) -> str:
+    return (_EPOCH + datetime.timedelta(microseconds=us)).isoformat() + "Z"
+
+
+FIELD_TYPE = 1 << 0
+FIELD_CP_WALLET = 1 << 1
+FIELD_TXID = 1 << 2
+
+# (field bit, event key, column, parse, format); parse None: the
+# column is filled from event_supply_delta_mC()
+FIELD_CODECS = tuple(
+    (1 << (3 + i), key, column, parse, fmt)
+    for i, (key, column, parse, fmt) in enumerate((
+        ("seq", "seq", _int64, int),
+        ("timestamp", "timestamp_us", parse_timestamp_us, format_timestamp_us),
+        ("minted_mC", "minted_mC", None, int),
+        ("burned_mC", "burned_mC", None, int),
+        ("minted_cbtc", "minted_mC", None, format_cbtc_from_mC),
+        ("burned_cbtc", "burned_mC", None, format_cbtc_from_mC),
+        ("deposit_btc", "deposit_sats", _sats, _btc),
+        ("principal_btc", "principal_sats", _sats, _btc),
+        ("redemption_btc", "redemption_sats", _sats, _btc),
+        ("yield_btc", "yield_sats", _sats, _btc),
+        ("btc_paid", "btc_paid_sats", _sats, _btc),
+    ))
+)
+
+_INT_COLUMNS = (
+    "seq", "timestamp_us", "minted_mC", "burned_mC", "deposit_sats",
+    "principal_sats", "redemption_sats", "yield_sats", "btc_paid_sats",
+)
+
+
+def _same(value, expected) -> bool:
+    return type(value) is type(expected) and value == expected
+
+
+# --- ENCODING --------------------------------------------------------------
+
+def encode_record(event, cp_ids, cp_names):
+    """
+    Split one event into (columns, extra_json). New CP names are added
+    to cp_ids / cp_names (in place). The caller sets extra_offset.
+    """
+    columns = dict.fromkeys(_INT_COLUMNS, 0)
+    columns["timestamp_us"] = NO_TIMESTAMP
+    columns["txid"] = _NO_TXID
+    columns["cp_id"] = 0
+    columns["type"] = TYPE_OTHER
+    fields = 0
+    remaining = dict(event)
+
+    ev_type = event.get("type")
+    if isinstance(ev_type, str) and ev_type in TYPE_CODES:
+        columns["type"] = TYPE_CODES[ev_type]
+        fields |= FIELD_TYPE
+        del remaining["type"]
+
+    cp_wallet = event.get("cp_wallet")
+    if isinstance(cp_wallet, str):
+        cp_id = cp_ids.get(cp_wallet)
+        if cp_id is None:
+            cp_names.append(cp_wallet)
+            cp_id = cp_ids[cp_wallet] = len(cp_names)
+        columns["cp_id"] = cp_id
+        fields |= FIELD_CP_WALLET
+        del remaining["cp_wallet"]
+
+    txid = event.get("txid")
+    if isinstance(txid, str) and len(txid) == 64:
+        try:
+            raw = bytes.fromhex(txid)
+        except ValueError:
+            raw = None
+        if raw is not None and raw.hex() == txid:
+            columns["txid"] = raw
+            fields |= FIELD_TXID
+            del remaining["txid"]
+
+    minted_mC, burned_mC = event_supply_delta_mC(event)
+    columns["minted_mC"] = _int64(minted_mC)
+    columns["burned_mC"] = _int64(burned_mC)
+
+    for bit, key, column, parse, fmt in FIELD_CODECS:
+        if key not in remaining:
+            continue
+        value = remaining[key]
+        if parse is not None:
+            try:
+                columns[column] = parse(value)
+            except (ValueError, ArithmeticError):
+                continue
+        if _same(value, fmt(columns[column])):
+            fields |= bit
+            del remaining[key]
+
+    columns["fields"] = fields
+    extra = b""
+    if remaining:
+        extra = json.dumps(remaining, sort_keys=True, separators=(",", ":")).encode("ascii")
+    return columns, extra
+
+
+def decode_record(record, cp_names, extra) -> dict:
+    """
+    Rebuild the original event from one record and the extra JSON
+    buffer.
+    """
+    fields = int(record["fields"])
+    event = {}
+    if fields & FIELD_TYPE:
+        event["type"] = TYPE_NAMES[int(record["type"])]
+    if fields & FIELD_CP_WALLET:
+        event["cp_wallet"] = cp_names[int(record["cp_id"]) - 1]
+    if fields & FIELD_TXID:
+        event["txid"] = record["txid"].tobytes().hex()
+
+    for bit, key, column, _, fmt in FIELD_CODECS:
+        if fields & bit:
+            event[key] = fmt(int(record[column]))
+
+    length = int(record["extra_len"])
+    if length:
+        offset = int(record["extra_offset"])
+        event.update(json.loads(extra[offset:offset + length]))
+    return event
+
+
+# --- BUILD -----------------------------------------------------------------
+
+_build_lock = threading.Lock()
+
+
+def empty_meta(source: str = ""):
+    meta = empty_checkpoint()
+    meta.update({"source": source, "source_seq": 0, "records": 0, "extra_size": 0, "cps": []})
+    return meta
+
+
+def load_meta():
+    if not META_PATH.exists():
+        return empty_meta()
+    try:
+        with META_PATH.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        meta = empty_meta()
+        for key in meta:
+            meta[key] = type(meta[key])(data[key])
+        return meta
+    except Exception:
+        return empty_meta()
+
+
+def save_meta(meta) -> None:
+    META_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = META_PATH.with_name(f"{META_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(meta, f, sort_keys=True, separators=(",", ":"))
+    os.replace(tmp_path, META_PATH)
+
+
+def _files_match(meta) -> bool:
+    """
+    The record / extra files must hold at least what meta describes.
+    """
+    for path, size in ((BINARY_LOG_PATH, meta["records"] * RECORD_SIZE), (EXTRA_PATH, meta["extra_size"])):
+        if size and (not path.exists() or path.stat().st_size < size):
+            return False
+    return True
+
+
+def _append_records(meta, events) -> int:
+    """
+    Encode events after the records in meta and append them; meta is
+    updated in place (saved by the caller). Anything past meta's sizes
+    (an interrupted earlier build) is truncated first.
+    """
+    BINARY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    cp_names = meta["cps"]
+    cp_ids = {name: i + 1 for i, name in enumerate(cp_names)}
+    count = 0
+
+    with BINARY_LOG_PATH.open("ab") as bin_f, EXTRA_PATH.open("ab") as extra_f:
+        bin_f.truncate(meta["records"] * RECORD_SIZE)
+        extra_f.truncate(meta["extra_size"])
+
+        batch = []
+        for event in events:
+            columns, extra = encode_record(event, cp_ids, cp_names)
+            columns["extra_offset"] = meta["extra_size"] if extra else 0
+            columns["extra_len"] = len(extra)
+            columns["reserved"] = _RESERVED
+            if extra:
+                extra_f.write(extra)
+                meta["extra_size"] += len(extra)
+
+            batch.append(tuple(columns[name] for name in RECORD_DTYPE.names))
+            if len(batch) >= WRITE_BATCH:
+                bin_f.write(np.array(batch, dtype=RECORD_DTYPE).tobytes())
+                count += len(batch)
+                batch = []
+
+        if batch:
+            bin_f.write(np.array(batch, dtype=RECORD_DTYPE).tobytes())
+            count += len(batch)
+
+        for f in (bin_f, extra_f):
+            f.flush()
+            os.fsync(f.fileno())
+
+    meta["records"] += count
+    return count
+
+
+def _new_log_events(meta, f):
+    """
+    Yield events from complete log lines after meta["offset"], folding
+    each line into meta's checkpoint fields as it goes.
+    """
+    f.seek(meta["offset"])
+    for line in f:
+        if not line.endswith(b"\n"):
+            break
+        fold_line(meta, line)
+        event = decode_line(line)
+        if event is not None:
+            yield event
+
+
+def update_binary_log():
+    """
+    Bring data/ledger.bin up to date with the configured ledger and
+    return its metadata.
+    """
+    with _build_lock, LedgerLock(BINARY_LOCK_PATH):
+        meta = load_meta()
+        start = (meta["records"], meta["offset"])
+        store = get_sqlite_store()
+
+        if store is not None:
+            head_seq, _, _ = store.head()
+            if meta["source"] != "sqlite" or meta["source_seq"] > head_seq or not _files_match(meta):
+                meta = empty_meta("sqlite")
+            if meta["source_seq"] < head_seq:
+                _append_records(meta, store.events_after(meta["source_seq"]))
+                meta["source_seq"] = head_seq
+
+        elif LEDGER_PATH.exists():
+            with LEDGER_PATH.open("rb") as f:
+                if meta["source"] != "jsonl" or not checkpoint_matches_log(meta, f) or not _files_match(meta):
+                    meta = empty_meta("jsonl")
+                _append_records(meta, _new_log_events(meta, f))
+
+        elif meta["source"] != "legacy" or not _files_match(meta):
+            meta = empty_meta("legacy")
+            _append_records(meta, iter_legacy_events())
+
+        if (meta["records"], meta["offset"]) != start or not META_PATH.exists():
+            save_meta(meta)
+        return meta
+
+
+# --- READ ------------------------------------------------------------------
+
+def _map_file(path, size: int):
+    if size == 0:
+        return b""
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BinaryLedger:
+    """
+    Read-only view of the binary log. `records` is a NumPy structured
+    array over the memory-mapped file (no copy).
+    """
+
+    def __init__(self, meta):
+        self.cps = list(meta["cps"])
+        count = meta["records"]
+        self._records_map = _map_file(BINARY_LOG_PATH, count * RECORD_SIZE)
+        self._extra = _map_file(EXTRA_PATH, meta["extra_size"])
+        if count:
+            self.records = np.frombuffer(self._records_map, dtype=RECORD_DTYPE, count=count)
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def event(self, i: int) -> dict:
+        return decode_record(self.records[i], self.cps, self._extra)
+
+    def iter_events(self):
+        for record in self.records:
+            yield decode_record(record, self.cps, self._extra)
+
+    # --- Vectorized queries ------------------------------------------------
+
+    def totals(self):
+        """
+        Returns (total_minted_mC, total_redeemed_mC).
+        """
+        return int(self.records["minted_mC"].sum()), int(self.records["burned_mC"].sum())
+
+    def cp_sums(self):
+        """
+        Returns {cp_wallet: {field: total}} over "mint" events, with the
+        fields of cp_index.POSITION_FIELDS.
+        """
+        # Column-wise (no record copies); non-mints go to a spare bin
+        size = len(self.cps) + 2
+        ids = np.where(self.records["type"] == TYPE_MINT, self.records["cp_id"], size - 1)
+
+        columns = {"channels": np.bincount(ids, minlength=size)}
+        for field in POSITION_FIELDS[1:]:
+            total = np.zeros(size, dtype=np.int64)
+            np.add.at(total, ids, self.records[field])
+            columns[field] = total
+
+        sums = {}
+        for cp_id in np.flatnonzero(columns["channels"][:-1]):
+            # Same naming as cp_index.mint_position_delta()
+            name = (self.cps[cp_id - 1] if cp_id else None) or UNKNOWN_CP
+            position = sums.setdefault(name, dict.fromkeys(POSITION_FIELDS, 0))
+            for field in POSITION_FIELDS:
+                position[field] += int(columns[field][cp_id])
+        return sums
+
+    def supply_curve(self, bucket_seconds: int):
+        """
+        Supply per time bucket. Returns arrays (bucket_start_us,
+        minted_mC, burned_mC, outstanding_mC at bucket end), buckets
+        in time order. Events without a timestamp are left out.
+        """
+        bucket_us = int(bucket_seconds * 1_000_000)
+        if bucket_us <= 0:
+            raise ValueError("Bucket size must be > 0.")
+
+        timestamps = self.records["timestamp_us"]
+        minted_mC = self.records["minted_mC"]
+        burned_mC = self.records["burned_mC"]
+        dated = timestamps != NO_TIMESTAMP
+        if not dated.all():
+            timestamps, minted_mC, burned_mC = timestamps[dated], minted_mC[dated], burned_mC[dated]
+
+        buckets, inverse = np.unique(timestamps // bucket_us, return_inverse=True)
+        minted = np.zeros(len(buckets), dtype=np.int64)
+        burned = np.zeros(len(buckets), dtype=np.int64)
+        np.add.at(minted, inverse, minted_mC)
+        np.add.at(burned, inverse, burned_mC)
+        return buckets * bucket_us, minted, burned, np.cumsum(minted - burned)
+
+
+def open_binary_log() -> BinaryLedger:
+    """
+    Update the binary log and map it.
+    """
+    return BinaryLedger(update_binary_log())
+
+
+def verify_binary_log():
+    """
+    Decode every record and compare it with the ledger, byte for byte
+    in the canonical encoding. Returns (checked, first_mismatch_index
+    or None).
+    """
+    binary = open_binary_log()
+    checked = 0
+    for decoded, event in zip(binary.iter_events(), iter_events()):
+        if encode_event(decoded) != encode_event(event):
+            return checked, checked
+        checked += 1
+    if checked != len(binary):
+        return checked, checked
+    return checked, None
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC binary event log")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="create / update data/ledger.bin")
+    sub.add_parser("verify", help="check that every record decodes to its ledger event")
+    sub.add_parser("totals", help="supply totals")
+    sub.add_parser("cps", help="per-CP sums")
+
+    curve = sub.add_parser("curve", help="time-bucketed supply curve")
+    curve.add_argument("--bucket-hours", type=float, default=24.0)
+
+    export = sub.add_parser("export", help="decode back to legacy JSON (or .jsonl)")
+    export.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        meta = update_binary_log()
+        size = meta["records"] * RECORD_SIZE + meta["extra_size"]
+        print(f"[RESULT] Binary log up to date: {BINARY_LOG_PATH}")
+        print(f"         Records:  {meta['records']} ({RECORD_SIZE} bytes each)")
+        print(f"         CPs:      {len(meta['cps'])}")
+        print(f"         Size:     {size} bytes (incl. {meta['extra_size']} bytes extra JSON)")
+        print(f"         Source:   {meta['source']}")
+
+    elif args.command == "verify":
+        checked, mismatch = verify_binary_log()
+        if mismatch is not None:
+            print(f"[ERROR] Binary log differs from the ledger at event #{mismatch + 1} (run 'build').")
+            sys.exit(1)
+        print(f"[RESULT] All {checked} records decode to their ledger events.")
+
+    elif args.command == "totals":
+        total_minted_mC, total_redeemed_mC = open_binary_log().totals()
+        print(f"[RESULT] Total minted:   {format_cbtc_from_mC(total_minted_mC)} cBTC")
+        print(f"         Total redeemed: {format_cbtc_from_mC(total_redeemed_mC)} cBTC")
+        print(f"         Outstanding:    {format_cbtc_from_mC(total_minted_mC - total_redeemed_mC)} cBTC")
+
+    elif args.command == "cps":
+        sums = open_binary_log().cp_sums()
+        for cp_wallet in sorted(sums, key=cp_sort_key):
+            position = sums[cp_wallet]
+            print(f"{cp_wallet:<16} {position['channels']:>8} channels  "
+                  f"{_btc(position['deposit_sats']):>18} BTC  "
+                  f"{format_cbtc_from_mC(position['minted_mC']):>20} cBTC")
+
+    elif args.command == "curve":
+        try:
+            starts, minted, burned, outstanding = open_binary_log().supply_curve(int(args.bucket_hours * 3600))
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        for start, m, b, o in zip(starts.tolist(), minted.tolist(), burned.tolist(), outstanding.tolist()):
+            print(f"{format_timestamp_us(start)}  +{format_cbtc_from_mC(m)}  "
+                  f"-{format_cbtc_from_mC(b)}  = {format_cbtc_from_mC(o)} cBTC")
+
+    elif args.command == "export":
+        # Imported lazily: only export needs the SQLite module
+        from ledger_sqlite import export_events
+        count = export_events(open_binary_log().iter_events(), args.path)
+        print(f"[RESULT] Exported {count} events to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – SQLite Ledger Store (EXPERIMENTAL)
+#
+# Optional ledger backend: data/ledger.sqlite3
+#
+# Enable with:
+#   export CBTC_LEDGER_BACKEND=sqlite
+# and every coordinator script reads and appends through it
+# (ledger.iter_events / append_ledger_events / ledger_head ...).
+#
+# Tables:
+#   events  – one row per event, in append order (seq), with
+#             type / cp_wallet / txid / timestamp columns (indexed),
+#             the event's supply delta, running minted / redeemed
+#             totals, and the canonical event JSON
+#   mints   – mint details (deposit, splits, minted mC) per seq
+#   redeems – redemption details (burned mC, BTC paid, tier) per seq
+#   cp_positions – per-CP totals (see cp_index.py), updated in the
+#             same transaction as each appended mint
+#
+# - Supply totals are the running totals of the last row: O(1)
+# - Indexed lookups: by type, CP wallet, txid, time range
+# - Appends are one transaction (BEGIN IMMEDIATE), with the same
+#   expected_seq compare-and-swap as the JSONL log
+# - On first use the store is seeded from data/ledger.jsonl (or the
+#   legacy data/ledger.json) under the ledger writer lock, so
+#   switching backends keeps history; from then on the SQLite file is
+#   the ledger (export to go back). The seeded log position is
+#   recorded, and the store refuses to open if data/ledger.jsonl has
+#   changed since (a process without CBTC_LEDGER_BACKEND=sqlite
+#   appended to it)
+# - "export" writes the events back out in the legacy
+#   {"events": [...]} JSON format (or JSON Lines) for audits
+#
+# Usage:
+#   python src/coordinator/ledger_sqlite.py import
+#   python src/coordinator/ledger_sqlite.py export <path.json|path.jsonl>
+#   python src/coordinator/ledger_sqlite.py query [--type T] [--cp CP]
+#       [--txid TXID] [--since ISO_TIME] [--last-hours N]
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from cp_index import CP_POSITIONS_SCHEMA, select_cp_positions, upsert_cp_position
+import ledger
+from ledger import (
+    REPO_ROOT,
+    LedgerConflict,
+    LedgerLock,
+    checkpoint_matches_log,
+    decode_line,
+    empty_checkpoint,
+    encode_event,
+    event_supply_delta_mC,
+    fold_line,
+    iter_legacy_events,
+    ledger_lock_held,
+)
+
+# --- CONFIG ----------------------------------------------------------------
+
+SQLITE_PATH = REPO_ROOT / "data" / "ledger.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq                 INTEGER PRIMARY KEY,
+    type                TEXT,
+    timestamp           TEXT,
+    cp_wallet           TEXT,
+    txid                TEXT,
+    minted_mC           INTEGER NOT NULL,
+    redeemed_mC         INTEGER NOT NULL,
+    running_minted_mC   INTEGER NOT NULL,
+    running_redeemed_mC INTEGER NOT NULL,
+    body                TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_type ON events (type);
+CREATE INDEX IF NOT EXISTS events_cp_wallet ON events (cp_wallet);
+CREATE INDEX IF NOT EXISTS events_txid ON events (txid);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+
+CREATE TABLE IF NOT EXISTS mints (
+    seq            INTEGER PRIMARY KEY REFERENCES events (seq),
+    cp_wallet      TEXT,
+    deposit_btc    TEXT,
+    principal_btc  TEXT,
+    redemption_btc TEXT,
+    yield_btc      TEXT,
+    minted_mC      INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS redeems (
+    seq               INTEGER PRIMARY KEY REFERENCES events (seq),
+    burned_mC         INTEGER NOT NULL,
+    btc_paid          TEXT,
+    tier              TEXT,
+    recipient_address TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+""" + CP_POSITIONS_SCHEMA
+
+
+# --- STORE -----------------------------------------------------------------
+
+class SQLiteSeedError(Exception):
+    """
+    The JSONL log changed after the store was seeded from it: events
+    appended there since are missing from the SQLite ledger.
+    """
+
+
+def _seed_log_events(checkpoint, f):
+    """
+    Yield the events of every complete log line, folding each line into
+    `checkpoint` so it records exactly what was seeded.
+    """
+    for line in f:
+        if not line.endswith(b"\n"):
+            break
+        fold_line(checkpoint, line)
+        event = decode_line(line)
+        if event is not None:
+            yield event
+
+
+class SQLiteLedgerStore:
+    """
+    Ledger backend on SQLite. One connection per thread.
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        if not self._ready:
+            # Seeding reads the JSONL log, so it holds that log's writer
+            # lock (taken before _init_lock, as appenders do) unless this
+            # process already holds it.
+            seed_lock = None if ledger_lock_held() else LedgerLock()
+            if seed_lock is not None:
+                seed_lock.acquire()
+            try:
+                with self._init_lock:
+                    if not self._ready:
+                        self._initialize(conn)
+                        self._ready = True
+            finally:
+                if seed_lock is not None:
+                    seed_lock.release()
+        return conn
+
+    def _initialize(self, conn) -> None:
+        """
+        Create the schema and, on first use, seed it from the JSONL log
+        (or the legacy JSON file), recording the log position seeded.
+        Raises SQLiteSeedError if the log has changed since.
+        """
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seeded = conn.execute("SELECT value FROM meta WHERE key = 'seeded_from'").fetchone()
+            if seeded is None:
+                self._seed(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('cp_positions', 'v1')")
+            elif conn.execute("SELECT 1 FROM meta WHERE key = 'cp_positions'").fetchone() is None:
+                # Store created before cp_positions existed: backfill
+                for (body,) in conn.execute("SELECT body FROM events WHERE type = 'mint' ORDER BY seq").fetchall():
+                    upsert_cp_position(conn, json.loads(body))
+                conn.execute("INSERT INTO meta (key, value) VALUES ('cp_positions', 'v1')")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._check_seeded_log(conn)
+
+    def _seed(self, conn) -> None:
+        checkpoint = empty_checkpoint()
+        if ledger.LEDGER_PATH.exists():
+            with ledger.LEDGER_PATH.open("rb") as f:
+                count = self._insert(conn, _seed_log_events(checkpoint, f), 0, 0, 0, stamp=False)
+            source = f"jsonl:{count}"
+        else:
+            count = self._insert(conn, iter_legacy_events(), 0, 0, 0, stamp=False)
+            source = f"legacy:{count}"
+        conn.execute("INSERT INTO meta (key, value) VALUES ('seeded_from', ?)", (source,))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('seeded_log', ?)",
+                     (json.dumps(checkpoint, sort_keys=True),))
+
+    def _check_seeded_log(self, conn) -> None:
+        """
+        Refuse a store whose JSONL source was appended to (or rewritten)
+        after seeding: the two ledgers have split.
+        """
+        row = conn.execute("SELECT value FROM meta WHERE key = 'seeded_log'").fetchone()
+        if row is None or not ledger.LEDGER_PATH.exists():
+            # Seeded before the position was recorded, or the log is gone
+            return
+        checkpoint = json.loads(row[0])
+        with ledger.LEDGER_PATH.open("rb") as f:
+            matches = checkpoint_matches_log(checkpoint, f)
+            size = f.seek(0, os.SEEK_END)
+        if not matches or size != checkpoint["offset"]:
+            raise SQLiteSeedError(
+                f"{ledger.LEDGER_PATH} changed after {self.path} was seeded from it "
+                f"({checkpoint['offset']} bytes seeded, {size} now): events written without "
+                f"CBTC_LEDGER_BACKEND=sqlite are missing from the SQLite ledger."
+            )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Write -------------------------------------------------------------
+
+    @staticmethod
+    def _insert(conn, events, head_seq, running_minted_mC, running_redeemed_mC, stamp=True) -> int:
+        """
+        Insert events after head_seq inside the caller's transaction.
+        Returns the number of events inserted.
+        """
+        count = 0
+        for event in events:
+            count += 1
+            seq = head_seq + count
+            if stamp:
+                event["seq"] = seq
+
+            minted_mC, redeemed_mC = event_supply_delta_mC(event)
+            running_minted_mC += minted_mC
+            running_redeemed_mC += redeemed_mC
+            ev_type = event.get("type")
+
+            conn.execute(
+                "INSERT INTO events (seq, type, timestamp, cp_wallet, txid, minted_mC, redeemed_mC,"
+                " running_minted_mC, running_redeemed_mC, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    seq, ev_type, event.get("timestamp"), event.get("cp_wallet"), event.get("txid"),
+                    minted_mC, redeemed_mC, running_minted_mC, running_redeemed_mC,
+                    encode_event(event).decode("ascii").rstrip("\n"),
+                ),
+            )
+            if ev_type == "mint":
+                upsert_cp_position(conn, event)
+                conn.execute(
+                    "INSERT INTO mints (seq, cp_wallet, deposit_btc, principal_btc, redemption_btc,"
+                    " yield_btc, minted_mC) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        seq, event.get("cp_wallet"), _text(event.get("deposit_btc")),
+                        _text(event.get("principal_btc")), _text(event.get("redemption_btc")),
+                        _text(event.get("yield_btc")), minted_mC,
+                    ),
+                )
+            elif ev_type == "redeem":
+                conn.execute(
+                    "INSERT INTO redeems (seq, burned_mC, btc_paid, tier, recipient_address)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (
+                        seq, redeemed_mC, _text(event.get("btc_paid")), _text(event.get("tier")),
+                        event.get("recipient_address"),
+                    ),
+                )
+        return count
+
+    def append_events(self, events, expected_seq: int = None) -> int:
+        """
+        Append events in one transaction and return the new head seq.
+        Raises LedgerConflict (nothing written) if the head is not at
+        expected_seq.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            head_seq, running_minted_mC, running_redeemed_mC = self._head(conn)
+            if expected_seq is not None and head_seq != expected_seq:
+                raise LedgerConflict(expected_seq, head_seq)
+            count = self._insert(conn, events, head_seq, running_minted_mC, running_redeemed_mC)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return head_seq + count
+
+    # --- Read --------------------------------------------------------------
+
+    @staticmethod
+    def _head(conn):
+        row = conn.execute(
+            "SELECT seq, running_minted_mC, running_redeemed_mC FROM events ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+        return tuple(row) if row is not None else (0, 0, 0)
+
+    def head(self):
+        """
+        Returns (head_seq, total_minted_mC, total_redeemed_mC).
+        """
+        return self._head(self._conn())
+
+    def _select(self, where: str = "", params=()):
+        sql = "SELECT body FROM events"
+        if where:
+            sql += " WHERE " + where
+        sql += " ORDER BY seq"
+        for (body,) in self._conn().execute(sql, params):
+            yield json.loads(body)
+
+    def iter_events(self):
+        return self._select()
+
+    def cp_positions(self):
+        """
+        Returns {cp_wallet: position}, same shape as cp_index.cp_positions().
+        """
+        return select_cp_positions(self._conn())
+
+    def events_by_type(self, ev_type: str):
+        return self._select("type = ?", (ev_type,))
+
+    def events_by_cp(self, cp_wallet: str, ev_type: str = None):
+        if ev_type is None:
+            return self._select("cp_wallet = ?", (cp_wallet,))
+        return self._select("cp_wallet = ? AND type = ?", (cp_wallet, ev_type))
+
+    def events_by_txid(self, txid: str):
+        return self._select("txid = ?", (txid,))
+
+    def events_after(self, seq: int):
+        """
+        Events appended after sequence number `seq`.
+        """
+        return self._select("seq > ?", (seq,))
+
+    def events_since(self, timestamp: str, ev_type: str = None):
+        """
+        Events at or after an ISO-8601 UTC timestamp ("...Z" strings
+        sort chronologically).
+        """
+        if ev_type is None:
+            return self._select("timestamp >= ?", (timestamp,))
+        return self._select("timestamp >= ? AND type = ?", (timestamp, ev_type))
+
+    def query(self, ev_type: str = None, cp_wallet: str = None, txid: str = None, since: str = None):
+        """
+        Events matching all given filters, in append order.
+        """
+        clauses = []
+        params = []
+        for column, op, value in (
+            ("type", "=", ev_type),
+            ("cp_wallet", "=", cp_wallet),
+            ("txid", "=", txid),
+            ("timestamp", ">=", since),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return self._select(" AND ".join(clauses), params)
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SQLiteLedgerStore:
+    """
+    Return the shared store for data/ledger.sqlite3.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteLedgerStore()
+        return _store
+
+
+# --- EXPORT ----------------------------------------------------------------
+
+def export_events(events, path) -> int:
+    """
+    Write events to `path`: legacy {"events": [...]} JSON (same layout
+    as the original data/ledger.json) or, for a .jsonl path, JSON
+    Lines as in data/ledger.jsonl. Returns the number of events.
+    """
+    path = os.fspath(path)
+    tmp_path = f"{path}.tmp"
+    count = 0
+
+    if path.endswith(".jsonl"):
+        with open(tmp_path, "wb") as f:
+            for event in events:
+                f.write(encode_event(event))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        events = list(events)
+        count = len(events)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"events": events}, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return count
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC SQLite ledger store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("import", help="create / seed data/ledger.sqlite3 from the JSONL ledger")
+
+    export = sub.add_parser("export", help="export events as legacy JSON (or .jsonl)")
+    export.add_argument("path")
+
+    query = sub.add_parser("query", help="indexed event lookup")
+    query.add_argument("--type", dest="ev_type")
+    query.add_argument("--cp", dest="cp_wallet")
+    query.add_argument("--txid")
+    query.add_argument("--since", help="ISO-8601 UTC timestamp, e.g. 2026-01-24T17:00:00Z")
+    query.add_argument("--last-hours", type=float)
+
+    args = parser.parse_args()
+    store = get_store()
+    try:
+        head_seq, total_minted_mC, total_redeemed_mC = store.head()
+    except SQLiteSeedError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    if args.command == "import":
+        print(f"[RESULT] SQLite ledger ready: {SQLITE_PATH}")
+        print(f"         Events:            {head_seq}")
+        print(f"         Total minted mC:   {total_minted_mC}")
+        print(f"         Total redeemed mC: {total_redeemed_mC}")
+
+    elif args.command == "export":
+        count = export_events(store.iter_events(), args.path)
+        print(f"[RESULT] Exported {count} events to {args.path}")
+
+    elif args.command == "query":
+        since = args.since
+        if args.last_hours is not None:
+            cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=args.last_hours)
+            since = cutoff.isoformat() + "Z"
+        for event in store.query(args.ev_type, args.cp_wallet, args.txid, since):
+            sys.stdout.write(encode_event(event).decode("ascii"))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@
 #     - YIELD_POOL wallet
 # - Calculates minted cBTC = 30,000 * D
 #   (with 3 decimal places, and stores minted_mC = milli-cBTC)
-# - Appends a "mint" event to data/ledger.json
+# - Appends a "mint" event to the ledger (data/ledger.jsonl)
 #
 # ⚠️ WARNING:
 # - Experimental and for regtest MVP only.
@@ -36,17 +36,22 @@
 # ------------------------------------------------------------
 
 from decimal import Decimal, getcontext
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
-from pathlib import Path
+from bitcoinrpc.authproxy import JSONRPCException
 import datetime
-import json
 import sys
 
+from address_pool import mint_labels
+from ledger import LedgerLock, append_ledger_event
+from rpc import REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME, batch_wallets, ensure_regtest, get_wallet_client
+
 # Match precision with other coordinator scripts
 getcontext().prec = 18
 
 # --- PROTOCOL CONSTANTS ----------------------------------------------------
 
+# Bitcoin Core: wallet cannot fund the payment
+RPC_WALLET_INSUFFICIENT_FUNDS = -6
+
 MIN_DEPOSIT = Decimal("0.05")
 MAX_DEPOSIT = Decimal("5.0")
 
@@ -55,78 +60,180 @@ PRINCIPAL_PCT = Decimal("0.70")
 REDEMPTION_PCT = Decimal("0.20")
 YIELD_PCT = Decimal("0.10")
 
-# --- RPC CONFIG ------------------------------------------------------------
+# --- MINT STEPS ------------------------------------------------------------
+# Shared by the CLI below, the coordinator daemon and the asyncio
+# coordinator. Validation failures raise ValueError; RPC failures
+# raise JSONRPCException.
 
-RPC_USER = "cbtc"
-RPC_PASSWORD = "cbtcpassword"
-RPC_PORT = 18443
-RPC_HOST = "127.0.0.1"
+def validate_deposit(deposit_btc: Decimal) -> None:
+    if deposit_btc < MIN_DEPOSIT or deposit_btc > MAX_DEPOSIT:
+        raise ValueError(f"Deposit must be between {MIN_DEPOSIT} and {MAX_DEPOSIT} BTC.")
 
-REDEMPTION_WALLET_NAME = "REDEMPTION_POOL"
-YIELD_WALLET_NAME = "YIELD_POOL"
 
-# --- LEDGER CONFIG ---------------------------------------------------------
+def split_deposit(D: Decimal):
+    """
+    Split deposit D into principal / redemption / yield shares and the
+    cBTC minted for it (3 decimal places, plus milli-cBTC).
+    """
+    principal = (D * PRINCIPAL_PCT).quantize(Decimal("0.00000001"))
+    redemption_share = (D * REDEMPTION_PCT).quantize(Decimal("0.00000001"))
+    yield_share = (D * YIELD_PCT).quantize(Decimal("0.00000001"))
 
-# Resolve repo root (cbtc-protocol/) from this file location:
-# .../cbtc-protocol/src/coordinator/open_mint_channel.py
-REPO_ROOT = Path(__file__).resolve().parents[2]
-LEDGER_PATH = REPO_ROOT / "data" / "ledger.json"
+    minted_cbtc = (D * ISSUANCE_RATE).quantize(Decimal("0.001"))
+    minted_mC = int((minted_cbtc * Decimal("1000")).quantize(Decimal("1")))
 
+    return {
+        "principal": principal,
+        "redemption_share": redemption_share,
+        "yield_share": yield_share,
+        "minted_cbtc": minted_cbtc,
+        "minted_mC": minted_mC,
+    }
 
-def load_ledger():
+
+def mint_prepare_calls(cp_wallet_name: str):
     """
-    Load the JSON ledger from LEDGER_PATH.
-    If it does not exist or is invalid, return an empty ledger.
+    RPC calls a mint needs before spending, as one JSON-RPC batch per
+    wallet: {wallet_name: [(method, *params), ...]}.
+
+    The three wallets can be queried concurrently:
+     - CP wallet:          balance, principal address
+     - REDEMPTION_POOL:    redemption address
+     - YIELD_POOL:         yield address
+    (an address derived for a mint that is then rejected is simply
+     left unused). The chain is not part of it: ensure_regtest() must
+    pass before any address is derived.
     """
-    if not LEDGER_PATH.exists():
-        return {"events": []}
-
-    try:
-        with LEDGER_PATH.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "events" not in data or not isinstance(data["events"], list):
-            return {"events": []}
-        return data
-    except Exception:
-        return {"events": []}
+    return {
+        cp_wallet_name: [
+            ("getbalance",),
+            # Principal: stays in CP wallet, but moved to a labeled address
+            ("getnewaddress", f"{cp_wallet_name}_PRINCIPAL", "bech32"),
+        ],
+        # Redemption: goes to REDEMPTION_POOL wallet
+        REDEMPTION_WALLET_NAME: [("getnewaddress", "REDEMPTION_POOL", "bech32")],
+        # Yield: goes to YIELD_POOL wallet
+        YIELD_WALLET_NAME: [("getnewaddress", "YIELD_POOL", "bech32")],
+    }
 
 
-def save_ledger(data):
+def build_mint_plan(deposit_btc: Decimal, cp_wallet_name: str, results):
     """
-    Save the JSON ledger to LEDGER_PATH.
+    Turn the results of mint_prepare_calls() into the mint plan
+    (splits, addresses, CP balance). Raises ValueError if the CP wallet
+    cannot fund the deposit.
     """
-    LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with LEDGER_PATH.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, sort_keys=True)
+    raw_cp_balance, principal_address = results[cp_wallet_name]
+    (red_address,) = results[REDEMPTION_WALLET_NAME]
+    (yld_address,) = results[YIELD_WALLET_NAME]
+
+    cp_balance = Decimal(str(raw_cp_balance))
+    if cp_balance < deposit_btc:
+        raise ValueError(
+            f"{cp_wallet_name} balance {cp_balance} BTC is less than requested deposit {deposit_btc} BTC."
+        )
+
+    plan = split_deposit(deposit_btc)
+    plan.update({
+        "deposit_btc": deposit_btc,
+        "cp_wallet": cp_wallet_name,
+        "cp_balance": cp_balance,
+        "principal_address": principal_address,
+        "red_address": red_address,
+        "yld_address": yld_address,
+    })
+    return plan
 
 
-def append_ledger_event(event):
+def mint_outputs(plan):
     """
-    Append a single event to the ledger and persist it.
+    sendmany outputs for a mint plan. We use sendmany so that:
+     - Inputs come from CP wallet
+     - Outputs go to CP principal + Redemption Pool + Yield Pool
     """
-    ledger = load_ledger()
-    ledger["events"].append(event)
-    save_ledger(ledger)
+    return {
+        plan["principal_address"]: float(plan["principal"]),
+        plan["red_address"]: float(plan["redemption_share"]),
+        plan["yld_address"]: float(plan["yield_share"]),
+    }
 
 
-# --- RPC HELPERS -----------------------------------------------------------
+def build_mint_event(plan, txid: str):
+    """
+    Build the "mint" ledger event for a sent mint transaction.
+    """
+    return {
+        "type": "mint",
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "cp_wallet": plan["cp_wallet"],
+        "deposit_btc": str(plan["deposit_btc"]),
+        "principal_btc": str(plan["principal"]),
+        "redemption_btc": str(plan["redemption_share"]),
+        "yield_btc": str(plan["yield_share"]),
+        "minted_cbtc": f"{plan['minted_cbtc']:.3f}",
+        "minted_mC": plan["minted_mC"],
+        "txid": txid,
+    }
 
-def make_wallet_client(wallet_name: str) -> AuthServiceProxy:
+
+def prepare_mint(deposit_btc: Decimal, cp_wallet_name: str, address_pool=None):
     """
-    Create an RPC client bound to a specific wallet.
+    Validate a mint and derive its destinations. Returns the mint plan;
+    nothing is spent yet.
+
+    With an address_pool.AddressPool the destinations are taken from
+    the pool and no RPC is made here: the pool has checked the chain,
+    and sendmany itself rejects a deposit the CP wallet cannot fund
+    (plan["cp_balance"] is then None).
     """
-    url = f"http://{RPC_USER}:{RPC_PASSWORD}@{RPC_HOST}:{RPC_PORT}/wallet/{wallet_name}"
-    return AuthServiceProxy(url)
+    validate_deposit(deposit_btc)
+    if address_pool is None:
+        ensure_regtest(get_wallet_client(cp_wallet_name))
+        results = batch_wallets(mint_prepare_calls(cp_wallet_name))
+        return build_mint_plan(deposit_btc, cp_wallet_name, results)
+
+    principal_address, red_address, yld_address = address_pool.take(mint_labels(cp_wallet_name))
+    plan = split_deposit(deposit_btc)
+    plan.update({
+        "deposit_btc": deposit_btc,
+        "cp_wallet": cp_wallet_name,
+        "cp_balance": None,
+        "principal_address": principal_address,
+        "red_address": red_address,
+        "yld_address": yld_address,
+    })
+    return plan
 
 
-def check_regtest(client: AuthServiceProxy) -> None:
+def execute_mint(plan):
     """
-    Ensure we are running on regtest, not mainnet.
+    Send the mint transaction from the CP wallet and append the "mint"
+    event to the ledger. Returns the event. Raises ValueError if the CP
+    wallet cannot fund the deposit.
     """
-    info = client.getblockchaininfo()
-    chain = info.get("chain")
-    if chain != "regtest":
-        raise RuntimeError(f"Expected regtest chain, but node is on: {chain}")
+    cp_client = get_wallet_client(plan["cp_wallet"])
+
+    # Hold the ledger lock from payment to log entry: sendmany funds the
+    # Redemption Pool, and no redemption may be quoted against the
+    # larger pool before the new supply is logged.
+    with LedgerLock():
+        try:
+            txid = cp_client.sendmany(
+                "",              # empty string means: use default account (descriptor wallet)
+                mint_outputs(plan),
+                0,               # minconf
+                "cBTC Minting Channel"
+            )
+        except JSONRPCException as e:
+            if e.error.get("code") != RPC_WALLET_INSUFFICIENT_FUNDS:
+                raise
+            raise ValueError(
+                f"{plan['cp_wallet']} balance is less than requested deposit {plan['deposit_btc']} BTC."
+            ) from None
+
+        event = build_mint_event(plan, txid)
+        append_ledger_event(event, lock_held=True)
+    return event
 
 
 # --- MAIN LOGIC ------------------------------------------------------------
@@ -146,100 +253,41 @@ def main():
         print(f"[ERROR] Invalid deposit amount: {raw_deposit}")
         sys.exit(1)
 
-    if deposit_btc < MIN_DEPOSIT or deposit_btc > MAX_DEPOSIT:
-        print(f"[ERROR] Deposit must be between {MIN_DEPOSIT} and {MAX_DEPOSIT} BTC.")
+    # --- Validate, check CP balance, derive destinations -------------------
+    try:
+        plan = prepare_mint(deposit_btc, cp_wallet_name)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
         sys.exit(1)
 
-    # --- Connect to node & wallets -----------------------------------------
-    # Use CP wallet to check regtest chain
-    general_client = make_wallet_client(cp_wallet_name)
-    check_regtest(general_client)
-
-    # CP wallet:
-    cp_client = make_wallet_client(cp_wallet_name)
-    # Pool wallets:
-    red_client = make_wallet_client(REDEMPTION_WALLET_NAME)
-    yld_client = make_wallet_client(YIELD_WALLET_NAME)
-
-    # --- Check CP balance ---------------------------------------------------
-    cp_balance = Decimal(str(cp_client.getbalance()))
     print(f"[INFO] CP wallet: {cp_wallet_name}")
-    print(f"[INFO] {cp_wallet_name} balance: {cp_balance} BTC")
-
-    if cp_balance < deposit_btc:
-        print(f"[ERROR] {cp_wallet_name} balance {cp_balance} BTC is less than requested deposit {deposit_btc} BTC.")
-        sys.exit(1)
+    print(f"[INFO] {cp_wallet_name} balance: {plan['cp_balance']} BTC")
 
-    # --- Compute splits -----------------------------------------------------
-    D = deposit_btc
-    principal = (D * PRINCIPAL_PCT).quantize(Decimal("0.00000001"))
-    redemption_share = (D * REDEMPTION_PCT).quantize(Decimal("0.00000001"))
-    yield_share = (D * YIELD_PCT).quantize(Decimal("0.00000001"))
+    print(f"[INFO] Opening Minting Channel with deposit D = {deposit_btc} BTC")
+    print(f"[INFO] Principal:        {plan['principal']:.8f} BTC (70%)")
+    print(f"[INFO] Redemption pool: {plan['redemption_share']:.8f} BTC (20%)")
+    print(f"[INFO] Yield pool:      {plan['yield_share']:.8f} BTC (10%)")
 
-    print(f"[INFO] Opening Minting Channel with deposit D = {D} BTC")
-    print(f"[INFO] Principal:        {principal:.8f} BTC (70%)")
-    print(f"[INFO] Redemption pool: {redemption_share:.8f} BTC (20%)")
-    print(f"[INFO] Yield pool:      {yield_share:.8f} BTC (10%)")
-
-    # --- Derive destinations -----------------------------------------------
-    # Principal: stays in CP wallet, but moved to a labeled address
-    principal_address = cp_client.getnewaddress(f"{cp_wallet_name}_PRINCIPAL", "bech32")
-    # Redemption: goes to REDEMPTION_POOL wallet
-    red_address = red_client.getnewaddress("REDEMPTION_POOL", "bech32")
-    # Yield: goes to YIELD_POOL wallet
-    yld_address = yld_client.getnewaddress("YIELD_POOL", "bech32")
-
-    print(f"[INFO] Principal address:   {principal_address}")
-    print(f"[INFO] Redemption address:  {red_address}")
-    print(f"[INFO] Yield address:       {yld_address}")
-
-    # --- Construct the transaction from CP wallet --------------------------
-    # We use sendmany so that:
-    #  - Inputs come from CP wallet
-    #  - Outputs go to CP principal + Redemption Pool + Yield Pool
-
-    outputs = {
-        principal_address: float(principal),
-        red_address: float(redemption_share),
-        yld_address: float(yield_share),
-    }
+    print(f"[INFO] Principal address:   {plan['principal_address']}")
+    print(f"[INFO] Redemption address:  {plan['red_address']}")
+    print(f"[INFO] Yield address:       {plan['yld_address']}")
 
+    # --- Send from CP wallet and append event to ledger --------------------
     try:
-        txid = cp_client.sendmany(
-            "",              # empty string means: use default account (descriptor wallet)
-            outputs,
-            0,               # minconf
-            "cBTC Minting Channel"
-        )
+        event = execute_mint(plan)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
     except JSONRPCException as e:
         print(f"[ERROR] sendmany failed: {e}")
         sys.exit(1)
 
-    # --- Compute minted cBTC (3 decimal places) ----------------------------
-    minted_cbtc = (D * ISSUANCE_RATE).quantize(Decimal("0.001"))
-    minted_mC = int((minted_cbtc * Decimal("1000")).quantize(Decimal("1")))
-
     print("\n[RESULT] Minting Channel opened successfully.")
-    print(f"         Transaction ID: {txid}")
-    print(f"         Minted cBTC:    {minted_cbtc:.3f} cBTC")
+    print(f"         Transaction ID: {event['txid']}")
+    print(f"         Minted cBTC:    {event['minted_cbtc']} cBTC")
     print(f"         CP wallet used: {cp_wallet_name}")
 
-    # --- Append event to ledger --------------------------------------------
-    event = {
-        "type": "mint",
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "cp_wallet": cp_wallet_name,
-        "deposit_btc": str(D),
-        "principal_btc": str(principal),
-        "redemption_btc": str(redemption_share),
-        "yield_btc": str(yield_share),
-        "minted_cbtc": f"{minted_cbtc:.3f}",
-        "minted_mC": minted_mC,
-        "txid": txid,
-    }
-    append_ledger_event(event)
-
-    print("\n[NOTE] Event appended to data/ledger.json")
+    print("\n[NOTE] Event appended to data/ledger.jsonl")
     print("       (off-chain cBTC accounting for regtest simulations).")
 
 
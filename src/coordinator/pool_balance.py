@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Redemption Pool Balance Tracker (EXPERIMENTAL)
+#
+# Keeps the REDEMPTION_POOL balance in memory instead of asking
+# bitcoind for getbalance (a full UTXO re-sum) on every quote:
+#
+# - Follows the wallet through listsinceblock deltas: each listed
+#   transaction contributes its net effect on the wallet (outputs
+#   received − outputs sent − fee)
+# - A block-hash / height cursor trails the tip by
+#   TARGET_CONFIRMATIONS - 1 blocks: transactions below it are folded
+#   into one settled sum, those above it (and in the mempool) are
+#   kept per transaction and re-read on every refresh, which drops
+#   reorged-out or evicted ones
+# - Balances, from memory:
+#     confirmed   – transactions with ≥ minconf confirmations
+#     unconfirmed – the rest (incoming and outgoing)
+#     trusted     – confirmed minus pending outgoing payments;
+#                   what getbalance reports, used for quotes
+# - Refreshed only when the cache may be stale:
+#     - a new best block (checked at most every poll_interval
+#       seconds, or pushed with notify_block(), e.g. by the ZMQ
+#       listener in zmq_listener.py; poll_interval=None then turns
+#       polling off)
+#     - the ledger head moved (a mint or redemption by any process
+#       changed the pool)
+#     - invalidate()
+# - State persisted in data/pool_balance.json, so one-shot scripts
+#   (status.py, redeem_cbtc.py) start from the last cursor too
+#
+# listsinceblock does not name the inputs a send spent, so this
+# tracks balance deltas per transaction rather than individual UTXOs.
+#
+# Usage:
+#   python src/coordinator/pool_balance.py [--minconf N]
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+from bitcoinrpc.authproxy import JSONRPCException
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from core import btc_to_sats, sats_to_btc
+from ledger import REPO_ROOT, ledger_head
+from rpc import REDEMPTION_WALLET_NAME, get_wallet_client
+
+POOL_BALANCE_PATH = REPO_ROOT / "data" / "pool_balance.json"
+
+# Blocks re-read on every refresh (reorg depth we recover from)
+TARGET_CONFIRMATIONS = 6
+
+DEFAULT_MINCONF = 1
+
+# Seconds between best-block checks when nothing else invalidated
+# the cache
+POLL_SECONDS = 2.0
+
+# Bitcoin Core: unknown block hash (e.g. the wallet's chain was reset)
+RPC_INVALID_ADDRESS_OR_KEY = -5
+
+# Wallet categories that move spendable funds (immature / orphan
+# coinbase outputs do not)
+_BALANCE_CATEGORIES = frozenset({"send", "receive", "generate"})
+
+
+# --- STATE -----------------------------------------------------------------
+
+def empty_pool_state(wallet_name: str = REDEMPTION_WALLET_NAME):
+    return {
+        "wallet": wallet_name,
+        "lastblock": "",
+        "cursor_height": -1,
+        "settled_sats": 0,
+        "recent": {},
+        "tip_height": 0,
+        "best_block": "",
+    }
+
+
+def load_pool_state(wallet_name: str = REDEMPTION_WALLET_NAME):
+    if not POOL_BALANCE_PATH.exists():
+        return empty_pool_state(wallet_name)
+    try:
+        with POOL_BALANCE_PATH.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        state = empty_pool_state(wallet_name)
+        for key in state:
+            state[key] = type(state[key])(data[key])
+        if state["wallet"] != wallet_name:
+            return empty_pool_state(wallet_name)
+        return state
+    except Exception:
+        return empty_pool_state(wallet_name)
+
+
+def save_pool_state(state) -> None:
+    """
+    Persist the tracker state atomically.
+    """
+    POOL_BALANCE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = POOL_BALANCE_PATH.with_name(f"{POOL_BALANCE_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f, sort_keys=True, separators=(",", ":"))
+    os.replace(tmp_path, POOL_BALANCE_PATH)
+
+
+def transaction_deltas(transactions):
+    """
+    Net wallet effect per txid from listsinceblock entries. Returns
+    {txid: [delta_sats, blockheight or None]}; conflicted transactions
+    are left out.
+    """
+    deltas = {}
+    fees = {}
+    for tx in transactions:
+        if tx.get("category") not in _BALANCE_CATEGORIES or tx.get("confirmations", 0) < 0:
+            continue
+        txid = tx["txid"]
+        entry = deltas.setdefault(txid, [0, tx.get("blockheight")])
+        entry[0] += btc_to_sats(Decimal(str(tx["amount"])))
+        # The fee is repeated on every "send" entry of a transaction
+        if "fee" in tx:
+            fees[txid] = btc_to_sats(Decimal(str(tx["fee"])))
+    for txid, fee_sats in fees.items():
+        deltas[txid][0] += fee_sats
+    return deltas
+
+
+# --- TRACKER ---------------------------------------------------------------
+
+class PoolBalanceTracker:
+    """
+    In-memory balance of one pool wallet; safe to share between
+    threads.
+    """
+
+    def __init__(self, wallet_name: str = REDEMPTION_WALLET_NAME, minconf: int = DEFAULT_MINCONF,
+                 poll_interval: float = POLL_SECONDS, persist: bool = True):
+        if not 1 <= minconf <= TARGET_CONFIRMATIONS:
+            raise ValueError(f"minconf must be between 1 and {TARGET_CONFIRMATIONS}")
+        self.wallet_name = wallet_name
+        self.minconf = minconf
+        self.poll_interval = poll_interval
+        self.persist = persist
+        self.state = load_pool_state(wallet_name) if persist else empty_pool_state(wallet_name)
+        self._lock = threading.Lock()
+        self._stale = True
+        self._checked_at = None
+        self._ledger_seq = None
+        self.refreshes = 0
+
+    def invalidate(self) -> None:
+        """
+        Force a refresh on the next balance() call.
+        """
+        with self._lock:
+            self._stale = True
+
+    def notify_block(self, block_hash: str = None) -> None:
+        """
+        New-block hook (e.g. from a ZMQ listener): refresh on the next
+        balance() call unless `block_hash` is already the known tip.
+        """
+        with self._lock:
+            if block_hash is None or block_hash != self.state["best_block"]:
+                self._stale = True
+
+    def _refresh(self) -> None:
+        """
+        Re-list everything above the cursor (one round trip), then move
+        the cursor up to TARGET_CONFIRMATIONS - 1 blocks below the tip,
+        folding the transactions it passes into the settled sum (a
+        second round trip, only when a block arrived).
+        """
+        client = get_wallet_client(self.wallet_name)
+        state = self.state
+        calls = [("getblockchaininfo",), ("listsinceblock", state["lastblock"], 1, False, True)]
+        try:
+            info, listing = client.batch(calls)
+        except JSONRPCException as e:
+            if not state["lastblock"] or e.error.get("code") != RPC_INVALID_ADDRESS_OR_KEY:
+                raise
+            # Cursor block unknown to the node: start over
+            state = self.state = empty_pool_state(self.wallet_name)
+            info, listing = client.batch([calls[0], ("listsinceblock", "", 1, False, True)])
+
+        recent = transaction_deltas(listing.get("transactions", []))
+
+        cursor_height = info["blocks"] - TARGET_CONFIRMATIONS + 1
+        if cursor_height > state["cursor_height"]:
+            state["lastblock"] = client.getblockhash(cursor_height)
+            state["cursor_height"] = cursor_height
+            for txid, (delta_sats, height) in list(recent.items()):
+                if height is not None and height <= cursor_height:
+                    state["settled_sats"] += delta_sats
+                    del recent[txid]
+
+        state["recent"] = recent
+        state["tip_height"] = info["blocks"]
+        state["best_block"] = info["bestblockhash"]
+        self.refreshes += 1
+        if self.persist:
+            save_pool_state(state)
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        seq = ledger_head()[0]
+        if not self._stale and seq == self._ledger_seq:
+            if self.poll_interval is None or now - self._checked_at < self.poll_interval:
+                return
+            self._checked_at = now
+            if get_wallet_client(self.wallet_name).getbestblockhash() == self.state["best_block"]:
+                return
+
+        self._refresh()
+        self._stale = False
+        self._checked_at = now
+        self._ledger_seq = seq
+
+    def balance(self):
+        """
+        Returns {confirmed_sats, unconfirmed_sats, pending_spend_sats,
+        trusted_sats, tip_height, best_block}, refreshing first if the
+        cache may be stale.
+        """
+        with self._lock:
+            self._maybe_refresh()
+            state = self.state
+            confirmed = state["settled_sats"]
+            unconfirmed = 0
+            pending_spend = 0
+            for delta_sats, height in state["recent"].values():
+                confirmations = 0 if height is None else state["tip_height"] - height + 1
+                if confirmations >= self.minconf:
+                    confirmed += delta_sats
+                else:
+                    unconfirmed += delta_sats
+                    if delta_sats < 0:
+                        pending_spend -= delta_sats
+            return {
+                "confirmed_sats": confirmed,
+                "unconfirmed_sats": unconfirmed,
+                "pending_spend_sats": pending_spend,
+                "trusted_sats": confirmed - pending_spend,
+                "tip_height": state["tip_height"],
+                "best_block": state["best_block"],
+            }
+
+    def tx_confirmations(self, txid: str):
+        """
+        Confirmations of a wallet transaction still above the cursor (0
+        while in the mempool). None for unknown txids and for those
+        already folded into the settled sum.
+        """
+        with self._lock:
+            entry = self.state["recent"].get(txid)
+            if entry is None:
+                return None
+            height = entry[1]
+            return 0 if height is None else self.state["tip_height"] - height + 1
+
+    def trusted_sats(self) -> int:
+        """
+        Balance to quote redemptions against (as getbalance).
+        """
+        return self.balance()["trusted_sats"]
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_pool_tracker() -> PoolBalanceTracker:
+    """
+    Return the shared Redemption Pool tracker, creating it on first use.
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = PoolBalanceTracker()
+        return _tracker
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC Redemption Pool balance tracker")
+    parser.add_argument("--minconf", type=int, default=DEFAULT_MINCONF)
+    args = parser.parse_args()
+
+    try:
+        tracker = PoolBalanceTracker(minconf=args.minconf)
+        balance = tracker.balance()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    except JSONRPCException as e:
+        print(f"[ERROR] RPC error: {e}")
+        sys.exit(1)
+
+    print("\n=== cBTC Redemption Pool Balance (Regtest MVP) ===")
+    print(f"Wallet:                {tracker.wallet_name}")
+    print(f"Tip height:            {balance['tip_height']}")
+    print("--------------------------------------------------")
+    print(f"Confirmed BTC:         {sats_to_btc(balance['confirmed_sats']):.8f} (≥ {args.minconf} conf)")
+    print(f"Unconfirmed BTC:       {sats_to_btc(balance['unconfirmed_sats']):.8f}")
+    print(f"Pending payouts BTC:   {sats_to_btc(balance['pending_spend_sats']):.8f}")
+    print(f"Trusted BTC:           {sats_to_btc(balance['trusted_sats']):.8f}")
+    print("==================================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Raw Transaction / Address Codec (EXPERIMENTAL)
+#
+# Just enough Bitcoin serialization for the coordinator to read
+# what bitcoind pushes over ZMQ (zmq_listener.py) without an RPC
+# round trip per transaction:
+#
+# - parse_raw_tx: txid, spent outpoints and outputs (sats +
+#   scriptPubKey) of a serialized transaction, segwit or legacy
+# - address_to_script / script_to_address: bech32 / bech32m
+#   (BIP-173 / BIP-350) and base58check P2PKH / P2SH addresses
+# - build_raw_tx: serialize a simple transaction (used by the stub
+#   node to publish realistic "rawtx" messages)
+#
+# No dependencies beyond the standard library.
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+import hashlib
+import struct
+
+# --- HASHES ----------------------------------------------------------------
+
+def sha256d(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+# --- RAW TRANSACTIONS ------------------------------------------------------
+
+def _read_varint(data: bytes, pos: int):
+    first = data[pos]
+    if first < 0xfd:
+        return first, pos + 1
+    size = {0xfd: 2, 0xfe: 4, 0xff: 8}[first]
+    return int.from_bytes(data[pos + 1:pos + 1 + size], "little"), pos + 1 + size
+
+
+def _varint(n: int) -> bytes:
+    if n < 0xfd:
+        return bytes([n])
+    if n <= 0xffff:
+        return b"\xfd" + struct.pack("<H", n)
+    if n <= 0xffffffff:
+        return b"\xfe" + struct.pack("<I", n)
+    return b"\xff" + struct.pack("<Q", n)
+
+
+def parse_raw_tx(raw: bytes):
+    """
+    Decode a serialized transaction. Returns {"txid", "inputs":
+    [(prev_txid, vout)], "outputs": [(sats, script_hex)]}. Raises
+    ValueError on malformed data.
+    """
+    try:
+        pos = 4
+        segwit = raw[pos] == 0 and raw[pos + 1] == 1
+        if segwit:
+            pos += 2
+        body_start = pos
+
+        inputs = []
+        count, pos = _read_varint(raw, pos)
+        for _ in range(count):
+            prev_txid = raw[pos:pos + 32][::-1].hex()
+            vout = int.from_bytes(raw[pos + 32:pos + 36], "little")
+            script_len, pos = _read_varint(raw, pos + 36)
+            pos += script_len + 4
+            inputs.append((prev_txid, vout))
+
+        outputs = []
+        count, pos = _read_varint(raw, pos)
+        for _ in range(count):
+            sats = int.from_bytes(raw[pos:pos + 8], "little", signed=True)
+            script_len, pos = _read_varint(raw, pos + 8)
+            outputs.append((sats, raw[pos:pos + script_len].hex()))
+            pos += script_len
+        body_end = pos
+
+        if segwit:
+            for _ in inputs:
+                items, pos = _read_varint(raw, pos)
+                for _ in range(items):
+                    item_len, pos = _read_varint(raw, pos)
+                    pos += item_len
+        if pos + 4 != len(raw):
+            raise ValueError("trailing or missing bytes")
+    except (IndexError, KeyError):
+        raise ValueError("truncated transaction") from None
+
+    # txid: hash of the serialization without marker, flag and witness
+    stripped = raw[:4] + raw[body_start:body_end] + raw[-4:]
+    return {"txid": sha256d(stripped)[::-1].hex(), "inputs": inputs, "outputs": outputs}
+
+
+def build_raw_tx(inputs, outputs, version: int = 2, locktime: int = 0) -> bytes:
+    """
+    Serialize a (non-witness) transaction: inputs [(prev_txid, vout)]
+    with empty scriptSigs, outputs [(sats, script_hex)].
+    """
+    parts = [struct.pack("<i", version), _varint(len(inputs))]
+    for prev_txid, vout in inputs:
+        parts.append(bytes.fromhex(prev_txid)[::-1] + struct.pack("<I", vout) + b"\x00" + b"\xff\xff\xff\xff")
+    parts.append(_varint(len(outputs)))
+    for sats, script_hex in outputs:
+        script = bytes.fromhex(script_hex)
+        parts.append(struct.pack("<q", sats) + _varint(len(script)) + script)
+    parts.append(struct.pack("<I", locktime))
+    return b"".join(parts)
+
+
+def txid_of(raw: bytes) -> str:
+    return parse_raw_tx(raw)["txid"]
+
+
+# --- BECH32 / BECH32M ------------------------------------------------------
+
+_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+_BECH32_CONST = 1
+_BECH32M_CONST = 0x2bc830a3
+
+# bech32 human-readable parts per network
+SEGWIT_HRPS = ("bc", "tb", "bcrt")
+
+
+def _polymod(values) -> int:
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            if (top >> i) & 1:
+                chk ^= _GENERATOR[i]
+    return chk
+
+
+def _hrp_expand(hrp: str):
+    return [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+
+
+def _convertbits(data, frombits: int, tobits: int, pad: bool):
+    acc = 0
+    bits = 0
+    out = []
+    maxv = (1 << tobits) - 1
+    for value in data:
+        acc = (acc << frombits) | value
+        bits += frombits
+        while bits >= tobits:
+            bits -= tobits
+            out.append((acc >> bits) & maxv)
+    if pad:
+        if bits:
+            out.append((acc << (tobits - bits)) & maxv)
+    elif bits >= frombits or ((acc << (tobits - bits)) & maxv):
+        return None
+    return out
+
+
+def encode_segwit_address(hrp: str, witver: int, program: bytes) -> str:
+    const = _BECH32_CONST if witver == 0 else _BECH32M_CONST
+    data = [witver] + _convertbits(program, 8, 5, True)
+    polymod = _polymod(_hrp_expand(hrp) + data + [0] * 6) ^ const
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(_CHARSET[d] for d in data + checksum)
+
+
+def decode_segwit_address(address: str):
+    """
+    Returns (hrp, witness version, program bytes) or None if the
+    address is not valid bech32 / bech32m.
+    """
+    if address.lower() != address and address.upper() != address:
+        return None
+    address = address.lower()
+    sep = address.rfind("1")
+    if sep < 1 or sep + 7 > len(address) or len(address) > 90:
+        return None
+    hrp = address[:sep]
+    try:
+        data = [_CHARSET.index(c) for c in address[sep + 1:]]
+    except ValueError:
+        return None
+
+    const = _polymod(_hrp_expand(hrp) + data)
+    if not data or const not in (_BECH32_CONST, _BECH32M_CONST):
+        return None
+    witver = data[0]
+    program = _convertbits(data[1:-6], 5, 8, False)
+    if witver > 16 or program is None or not 2 <= len(program) <= 40:
+        return None
+    if (witver == 0) != (const == _BECH32_CONST):
+        return None
+    if witver == 0 and len(program) not in (20, 32):
+        return None
+    return hrp, witver, bytes(program)
+
+
+# --- BASE58CHECK -----------------------------------------------------------
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# version byte → script kind (mainnet, then testnet / regtest)
+_B58_VERSIONS = {0x00: "p2pkh", 0x05: "p2sh", 0x6f: "p2pkh", 0xc4: "p2sh"}
+
+
+def _b58decode_check(address: str):
+    n = 0
+    for c in address:
+        index = _B58_ALPHABET.find(c)
+        if index < 0:
+            return None
+        n = n * 58 + index
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    body = b"\x00" * (len(address) - len(address.lstrip("1"))) + body
+    if len(body) < 5 or sha256d(body[:-4])[:4] != body[-4:]:
+        return None
+    return body[:-4]
+
+
+# --- ADDRESS ↔ SCRIPT ------------------------------------------------------
+
+def address_to_script(address: str):
+    """
+    scriptPubKey (hex) paid by an address, or None if the address is
+    not recognized.
+    """
+    decoded = decode_segwit_address(address)
+    if decoded is not None and decoded[0] in SEGWIT_HRPS:
+        _, witver, program = decoded
+        return (bytes([0x50 + witver if witver else 0, len(program)]) + program).hex()
+
+    payload = _b58decode_check(address)
+    if payload is None or len(payload) != 21 or payload[0] not in _B58_VERSIONS:
+        return None
+    if _B58_VERSIONS[payload[0]] == "p2pkh":
+        return "76a914" + payload[1:].hex() + "88ac"
+    return "a914" + payload[1:].hex() + "87"
+
+
+def script_to_address(script_hex: str, hrp: str = "bcrt"):
+    """
+    Address for a segwit scriptPubKey (hex), or None for any other
+    script.
+    """
+    script = bytes.fromhex(script_hex)
+    if len(script) < 4 or script[1] != len(script) - 2:
+        return None
+    if script[0] == 0:
+        witver = 0
+    elif 0x51 <= script[0] <= 0x60:
+        witver = script[0] - 0x50
+    else:
+        return None
+    return encode_segwit_address(hrp, witver, script[2:])
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – On-chain Reconciliation (EXPERIMENTAL)
+#
+# Matches ledger events against the pool wallets' transactions:
+#
+#   mint   → REDEMPTION_POOL receives redemption_btc and
+#            YIELD_POOL receives yield_btc in the event's txid
+#   redeem → REDEMPTION_POOL sends btc_paid in the event's txid
+#            (batched redemptions share one txid; events that carry
+#            a vout are also matched output by output)
+#
+# and reports:
+#   - ledger events with no matching on-chain output
+#   - amount mismatches between logged and on-chain outputs
+#   - pool wallet transactions no ledger event accounts for
+#   - conflicted (double-spent / replaced) pool transactions
+#
+# Incremental on both sides; the state is kept in
+# data/reconcile.json:
+#   - chain: txid index built from listsinceblock deltas, one
+#     block-hash / height cursor per wallet. The cursor trails the
+#     tip by TARGET_CONFIRMATIONS - 1 blocks, so each run re-reads
+#     only the last few blocks and the mempool, which also picks up
+#     shallow reorgs and evicted transactions
+#   - ledger: expected outputs per txid, folded from events
+#     appended since the last run (same offset / tail-hash scheme as
+#     the supply checkpoint; by seq for the SQLite store)
+#
+# Principal outputs stay in the CP's own wallet and are not checked
+# here; legacy events from an older regtest chain show up as missing.
+#
+# Usage:
+#   python src/coordinator/reconcile.py [--rescan]
+#
+#   zmq_listener.py refreshes the state on every new block.
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+from bitcoinrpc.authproxy import JSONRPCException
+import argparse
+import json
+import os
+import sys
+import threading
+
+from core import btc_to_sats, sats_to_btc
+from ledger import (
+    LEDGER_PATH,
+    REPO_ROOT,
+    checkpoint_matches_log,
+    decode_line,
+    empty_checkpoint,
+    fold_line,
+    get_sqlite_store,
+    iter_legacy_events,
+)
+from rpc import REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME, check_regtest, get_wallet_client
+
+RECONCILE_PATH = REPO_ROOT / "data" / "reconcile.json"
+
+POOL_WALLETS = (REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME)
+
+# Blocks re-read on every run (reorg depth we recover from)
+TARGET_CONFIRMATIONS = 6
+
+# Bitcoin Core: unknown block hash (e.g. the wallet's chain was reset)
+RPC_INVALID_ADDRESS_OR_KEY = -5
+
+# Findings listed per kind before "... and N more"
+MAX_LISTED = 20
+
+
+# --- STATE -----------------------------------------------------------------
+
+# One refresh at a time per process (the ZMQ listener refreshes from
+# its own thread)
+_refresh_lock = threading.Lock()
+
+
+def empty_ledger_index(source: str = ""):
+    """
+    Expected pool outputs folded from the ledger, plus the position
+    folded up to (checkpoint fields for the JSONL log).
+    """
+    index = empty_checkpoint()
+    index["source"] = source
+    index["source_seq"] = 0
+    index["events"] = 0
+    index["expected"] = {}
+    index["no_txid"] = []
+    return index
+
+
+def empty_state():
+    return {
+        "ledger": empty_ledger_index(),
+        "wallets": {},
+        "chain": {},
+    }
+
+
+def load_state():
+    if not RECONCILE_PATH.exists():
+        return empty_state()
+    try:
+        with RECONCILE_PATH.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        state = empty_state()
+        ledger = state["ledger"]
+        for key in ledger:
+            ledger[key] = type(ledger[key])(data["ledger"][key])
+        state["wallets"] = dict(data["wallets"])
+        state["chain"] = dict(data["chain"])
+        return state
+    except Exception:
+        return empty_state()
+
+
+def save_state(state) -> None:
+    """
+    Persist the state atomically (compact JSON: it grows with the
+    number of transactions).
+    """
+    RECONCILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = RECONCILE_PATH.with_name(f"{RECONCILE_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f, sort_keys=True, separators=(",", ":"))
+    os.replace(tmp_path, RECONCILE_PATH)
+
+
+# --- LEDGER SIDE -----------------------------------------------------------
+
+def _sats(value):
+    try:
+        return btc_to_sats(Decimal(str(value)))
+    except (ArithmeticError, ValueError):
+        return None
+
+
+def expected_outputs(event):
+    """
+    Pool wallet outputs an event implies: [(wallet, category, vout,
+    sats)], vout None if the event does not record it.
+    """
+    ev_type = event.get("type")
+    outputs = []
+    if ev_type == "mint":
+        for wallet, field in ((REDEMPTION_WALLET_NAME, "redemption_btc"), (YIELD_WALLET_NAME, "yield_btc")):
+            sats = _sats(event.get(field))
+            if sats:
+                outputs.append((wallet, "receive", None, sats))
+    elif ev_type == "redeem":
+        sats = _sats(event.get("btc_paid"))
+        if sats:
+            outputs.append((REDEMPTION_WALLET_NAME, "send", event.get("vout"), sats))
+    return outputs
+
+
+def fold_expected(index, event) -> None:
+    """
+    Fold one event into the ledger index (in place).
+    """
+    index["events"] += 1
+    outputs = expected_outputs(event)
+    if not outputs:
+        return
+
+    txid = event.get("txid")
+    if not isinstance(txid, str) or not txid:
+        index["no_txid"].append(index["events"])
+        return
+
+    entry = index["expected"].get(txid)
+    if entry is None:
+        entry = index["expected"][txid] = {"events": [], "totals": {}, "vouts": {}}
+    entry["events"].append(index["events"])
+    for wallet, category, vout, sats in outputs:
+        key = f"{wallet}:{category}"
+        entry["totals"][key] = entry["totals"].get(key, 0) + sats
+        if isinstance(vout, int):
+            entry["vouts"][f"{key}:{vout}"] = sats
+
+
+def update_ledger_index(index):
+    """
+    Fold ledger events appended since the last run into the index;
+    rebuilt from the first event if the ledger no longer matches it.
+    """
+    store = get_sqlite_store()
+
+    if store is not None:
+        head_seq, _, _ = store.head()
+        if index["source"] != "sqlite" or index["source_seq"] > head_seq:
+            index = empty_ledger_index("sqlite")
+        for event in store.events_after(index["source_seq"]):
+            fold_expected(index, event)
+            index["source_seq"] = event["seq"]
+
+    elif LEDGER_PATH.exists():
+        with LEDGER_PATH.open("rb") as f:
+            if index["source"] != "jsonl" or not checkpoint_matches_log(index, f):
+                index = empty_ledger_index("jsonl")
+            f.seek(index["offset"])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                fold_line(index, line)
+                event = decode_line(line)
+                if event is not None:
+                    fold_expected(index, event)
+
+    elif index["source"] != "legacy":
+        index = empty_ledger_index("legacy")
+        for event in iter_legacy_events():
+            fold_expected(index, event)
+
+    return index
+
+
+# --- CHAIN SIDE ------------------------------------------------------------
+
+def _list_since(client, cursor: str):
+    """
+    One round trip: listsinceblock, then the tip height. The height is
+    read after the listing, so it is never below the returned lastblock.
+    """
+    return client.batch([
+        ("listsinceblock", cursor, TARGET_CONFIRMATIONS, True, True),
+        ("getblockcount",),
+    ])
+
+
+def update_wallet_index(chain, wallets, wallet_name: str) -> int:
+    """
+    Pull one wallet's transactions since its cursor into the txid index
+    (in place). Returns the number of entries read.
+    """
+    client = get_wallet_client(wallet_name)
+    cursor = wallets.get(wallet_name)
+
+    try:
+        listing, tip = _list_since(client, cursor["lastblock"] if cursor else "")
+    except JSONRPCException as e:
+        if cursor is None or e.error.get("code") != RPC_INVALID_ADDRESS_OR_KEY:
+            raise
+        # Cursor block unknown to the node: start over for this wallet
+        cursor = None
+        listing, tip = _list_since(client, "")
+
+    # Everything above the cursor (and the mempool) is listed again:
+    # drop it first, so reorged-out or evicted transactions disappear
+    since_height = cursor["height"] if cursor else -1
+    prefix = wallet_name + ":"
+    for txid in list(chain):
+        outputs = chain[txid]
+        for key in [k for k, out in outputs.items()
+                    if k.startswith(prefix) and (out["height"] is None or out["height"] > since_height)]:
+            del outputs[key]
+        if not outputs:
+            del chain[txid]
+
+    transactions = listing.get("transactions", [])
+    for tx in transactions:
+        if tx.get("category") not in ("send", "receive"):
+            continue
+        key = f"{wallet_name}:{tx['category']}:{tx.get('vout')}"
+        chain.setdefault(tx["txid"], {})[key] = {
+            "sats": abs(btc_to_sats(Decimal(str(tx["amount"])))),
+            "height": tx.get("blockheight"),
+            "conflicted": tx.get("confirmations", 0) < 0,
+        }
+
+    wallets[wallet_name] = {
+        "lastblock": listing["lastblock"],
+        "height": max(tip - TARGET_CONFIRMATIONS + 1, 0),
+    }
+    return len(transactions)
+
+
+def refresh_state(state=None):
+    """
+    Bring both indexes up to date (from the persisted state unless one
+    is given) and save them. Returns (state, {wallet: entries read}).
+    """
+    with _refresh_lock:
+        state = load_state() if state is None else state
+        read = {name: update_wallet_index(state["chain"], state["wallets"], name) for name in POOL_WALLETS}
+        state["ledger"] = update_ledger_index(state["ledger"])
+        save_state(state)
+        return state, read
+
+
+# --- MATCHING --------------------------------------------------------------
+
+def _chain_totals(outputs):
+    totals = {}
+    for key, out in outputs.items():
+        wallet_category = key.rsplit(":", 1)[0]
+        totals[wallet_category] = totals.get(wallet_category, 0) + out["sats"]
+    return totals
+
+
+def _events_label(events) -> str:
+    return ", ".join(f"#{n}" for n in events[:5]) + (f" (+{len(events) - 5})" if len(events) > 5 else "")
+
+
+def reconcile(state):
+    """
+    Compare the ledger index with the txid index. Returns
+    {kind: [message, ...]}.
+    """
+    expected = state["ledger"]["expected"]
+    chain = state["chain"]
+    findings = {"missing": [], "mismatch": [], "unlogged": [], "conflicted": [], "no_txid": []}
+
+    for n in state["ledger"]["no_txid"]:
+        findings["no_txid"].append(f"event #{n} moves pool funds but has no txid")
+
+    for txid, entry in expected.items():
+        outputs = chain.get(txid)
+        label = _events_label(entry["events"])
+        if not outputs:
+            findings["missing"].append(f"{txid}: no pool wallet transaction (ledger event {label})")
+            continue
+
+        totals = _chain_totals(outputs)
+        for key, sats in entry["totals"].items():
+            onchain = totals.get(key)
+            if onchain is None:
+                findings["missing"].append(f"{txid}: no {key} output (ledger event {label})")
+            elif onchain != sats:
+                findings["mismatch"].append(f"{txid}: {key} logged {sats_to_btc(sats)} BTC, "
+                                            f"on-chain {sats_to_btc(onchain)} BTC (ledger event {label})")
+        for key, sats in entry["vouts"].items():
+            out = outputs.get(key)
+            if out is None or out["sats"] != sats:
+                onchain = "missing" if out is None else f"{sats_to_btc(out['sats'])} BTC"
+                findings["mismatch"].append(f"{txid}: {key} logged {sats_to_btc(sats)} BTC, on-chain {onchain}")
+        for key in totals.keys() - entry["totals"].keys():
+            findings["unlogged"].append(f"{txid}: {key} {sats_to_btc(totals[key])} BTC not in the ledger event")
+
+    for txid, outputs in chain.items():
+        if txid not in expected:
+            for key, sats in sorted(_chain_totals(outputs).items()):
+                findings["unlogged"].append(f"{txid}: {key} {sats_to_btc(sats)} BTC, no ledger event")
+        if any(out["conflicted"] for out in outputs.values()):
+            findings["conflicted"].append(f"{txid}: conflicted on-chain")
+
+    return findings
+
+
+# --- MAIN ------------------------------------------------------------------
+
+FINDING_TITLES = {
+    "missing": "Ledger events with no on-chain output",
+    "mismatch": "Amount mismatches",
+    "unlogged": "On-chain outputs with no ledger event",
+    "conflicted": "Conflicted pool transactions",
+    "no_txid": "Pool-moving events without txid",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC ledger ↔ on-chain reconciliation")
+    parser.add_argument("--rescan", action="store_true",
+                        help="drop both indexes and rebuild them (full wallet listing)")
+    args = parser.parse_args()
+
+    try:
+        check_regtest(get_wallet_client(REDEMPTION_WALLET_NAME).getblockchaininfo())
+        state, read = refresh_state(empty_state() if args.rescan else None)
+    except JSONRPCException as e:
+        print(f"[ERROR] RPC error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    findings = reconcile(state)
+
+    print("\n=== cBTC On-chain Reconciliation (Regtest MVP) ===")
+    for name in POOL_WALLETS:
+        cursor = state["wallets"][name]
+        print(f"{name + ':':<22} {read[name]} entries read, cursor at height {cursor['height']}")
+    print(f"Ledger events:         {state['ledger']['events']} ({len(state['ledger']['expected'])} txids)")
+    print(f"On-chain txids:        {len(state['chain'])}")
+    print("--------------------------------------------------")
+    for kind, title in FINDING_TITLES.items():
+        print(f"{title + ':':<40} {len(findings[kind])}")
+    print("==================================================\n")
+
+    for kind, title in FINDING_TITLES.items():
+        messages = findings[kind]
+        for message in messages[:MAX_LISTED]:
+            print(f"[WARN] {message}")
+        if len(messages) > MAX_LISTED:
+            print(f"[WARN] ... and {len(messages) - MAX_LISTED} more ({title.lower()})")
+
+    if any(findings.values()):
+        sys.exit(1)
+    print("[RESULT] Ledger and pool wallets reconcile.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,11 @@
 # cBTC Protocol – Redemption (EXPERIMENTAL)
 #
 # Interactively:
-# - Reads current ledger and Redemption Pool BTC
+# - Reads current ledger and Redemption Pool BTC (trusted balance
+#   from the pool balance tracker, pool_balance.py)
 # - Asks for a cBTC amount to redeem
-# - Computes redemption rate according to coverage tiers:
+# - Computes redemption rate according to coverage tiers
+#   (see core.quote_redemption):
 #
 #   Tier 1 – Full floor:
 #       absolute_coverage >= 60%
@@ -24,119 +26,221 @@
 #         which keeps coverage constant
 #
 # - Executes redemption on-chain from Redemption Pool wallet
-# - Appends a "redeem" event to data/ledger.json
+# - Appends a "redeem" event to the ledger (data/ledger.jsonl)
+#   under the ledger writer lock; if another mint or redemption was
+#   logged after the quote, the amount is re-quoted before paying
+#
+# Scripted (no prompts), with one request from the command line or
+# many as JSON from stdin or a file (see batch_io.py), e.g.
+#
+#   {"amount_cbtc": "250.5", "address": "bcrt1q...", "id": "r1"}
+#
+# and one JSON result line per request:
+# - without --yes nothing is paid: each request is quoted in order
+#   against the supply and pool left by the requests before it
+#   ({"executed": false, "quote": {...}})
+# - with --yes each request is paid and logged in turn, re-quoted
+#   without asking if the ledger moved ({"executed": true,
+#   "event": {...}}); a failed request does not stop the others
+#
+# Usage:
+#   python src/coordinator/redeem_cbtc.py
+#   python src/coordinator/redeem_cbtc.py <amount_cbtc> <address> [--yes]
+#   python src/coordinator/redeem_cbtc.py --json [--yes] < requests.jsonl
+#   python src/coordinator/redeem_cbtc.py --file requests.json [--yes]
 #
 # ⚠️ For regtest/testing only. Not production-ready.
 # ------------------------------------------------------------
 
-from decimal import Decimal, getcontext
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
-from pathlib import Path
+from decimal import getcontext
+from bitcoinrpc.authproxy import JSONRPCException
 import datetime
-import json
+import sys
+
+from batch_io import UsageError, emit, parse_batch_args, read_requests, request_decimal, result_for
+from core import MILLI, btc_to_sats, cbtc_to_mC, format_cbtc_from_mC, parse_amount, quote_redemption, quote_to_json, sats_to_btc
+from ledger import LEDGER_PATH, LedgerConflict, LedgerLock, append_ledger_event, ledger_head
+from pool_balance import get_pool_tracker
+from rpc import REDEMPTION_WALLET_NAME, get_wallet_client
 
 getcontext().prec = 18
 
-# --- CONSTANTS -------------------------------------------------------------
+# Re-quotes of one redemption before giving up under contention
+MAX_REDEEM_ATTEMPTS = 5
 
-FLOOR_RATE = Decimal("0.00001")  # BTC per 1 cBTC
+USAGE = """Usage:
+  python src/coordinator/redeem_cbtc.py
+  python src/coordinator/redeem_cbtc.py <amount_cbtc> <address> [--yes]
+  python src/coordinator/redeem_cbtc.py --json | --file PATH [--yes]"""
 
-RPC_USER = "cbtc"
-RPC_PASSWORD = "cbtcpassword"
-RPC_PORT = 18443
-RPC_HOST = "127.0.0.1"
 
-REDEMPTION_WALLET_NAME = "REDEMPTION_POOL"
+# --- HELPERS ---------------------------------------------------------------
+
+def build_redeem_event(quote, txid: str):
+    """
+    Build the "redeem" ledger event for an executed redemption quote.
+    """
+    event = {
+        "type": "redeem",
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "burned_cbtc": format_cbtc_from_mC(quote.request_mC),
+        "burned_mC": quote.request_mC,
+        "btc_paid": f"{quote.btc_paid:.8f}",
+        "redemption_rate": f"{quote.redemption_rate:.8f}",
+        "tier": quote.tier_label,
+        "txid": txid,
+        "coverage_before": f"{quote.coverage_before_pct}%",
+    }
 
-# Resolve repo root (cbtc-protocol/) from this file location:
-REPO_ROOT = Path(__file__).resolve().parents[2]
-LEDGER_PATH = REPO_ROOT / "data" / "ledger.json"
+    if quote.coverage_after is not None:
+        event["coverage_after"] = f"{quote.coverage_after_pct}%"
+    else:
+        event["coverage_after"] = "N/A"
 
+    return event
 
-# --- HELPERS ---------------------------------------------------------------
 
-def make_wallet_client(wallet_name: str) -> AuthServiceProxy:
-    url = f"http://{RPC_USER}:{RPC_PASSWORD}@{RPC_HOST}:{RPC_PORT}/wallet/{wallet_name}"
-    return AuthServiceProxy(url)
+def quote_current_redemption(requested_mC: int):
+    """
+    Quote a redemption against the ledger and Redemption Pool as they
+    are now. Returns (quote, seq), seq being the ledger head the quote
+    is based on. Raises ValueError if the amount is not redeemable.
+    """
+    seq, total_minted_mC, total_redeemed_mC = ledger_head()
+    pool_sats = get_pool_tracker().trusted_sats()
+    return quote_redemption(total_minted_mC - total_redeemed_mC, pool_sats, requested_mC), seq
 
 
-def load_ledger():
-    if not LEDGER_PATH.exists():
-        return {"events": []}
-    try:
-        with LEDGER_PATH.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "events" not in data or not isinstance(data["events"], list):
-            return {"events": []}
-        return data
-    except Exception:
-        return {"events": []}
+def execute_redemption(quote, recv_addr: str, expected_seq: int = None):
+    """
+    Pay a redemption quote from the Redemption Pool wallet and append
+    its "redeem" event to the ledger. Returns the event.
 
+    With expected_seq, the quote is only paid if no other event was
+    logged since it was made; otherwise LedgerConflict is raised before
+    any BTC moves and the caller re-quotes.
+    Raises JSONRPCException if the payment fails.
+    """
+    red_client = get_wallet_client(REDEMPTION_WALLET_NAME)
 
-def save_ledger(data):
-    LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with LEDGER_PATH.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, sort_keys=True)
+    with LedgerLock():
+        if expected_seq is not None:
+            head_seq = ledger_head()[0]
+            if head_seq != expected_seq:
+                raise LedgerConflict(expected_seq, head_seq)
 
+        txid = red_client.sendtoaddress(recv_addr, float(quote.btc_paid))
 
-def sum_minted_and_redeemed_mC(events):
+        event = build_redeem_event(quote, txid)
+        append_ledger_event(event, expected_seq, lock_held=True)
+    return event
+
+
+def redeem_with_retry(requested_mC: int, recv_addr: str, attempts: int = MAX_REDEEM_ATTEMPTS):
     """
-    Returns:
-      total_minted_mC   – integer milli-cBTC
-      total_redeemed_mC – integer milli-cBTC
+    Quote and pay a redemption without asking: if the ledger moves
+    between quote and payment, re-quote and try again, up to
+    `attempts` times. Returns the "redeem" event.
 
-    Compatible with:
-      - older events with "minted_cbtc" / "burned_cbtc" only
-      - newer events with "minted_mC" / "burned_mC"
+    Raises ValueError if the amount is not redeemable (or would pay
+    0 BTC), LedgerConflict if every attempt lost the race, and
+    JSONRPCException if the payment fails.
     """
-    total_minted_mC = 0
-    total_redeemed_mC = 0
+    for attempt in range(attempts):
+        quote, seq = quote_current_redemption(requested_mC)
+        if quote.btc_paid_sats <= 0:
+            raise ValueError("Redemption would pay 0 BTC.")
+        try:
+            return execute_redemption(quote, recv_addr, expected_seq=seq)
+        except LedgerConflict:
+            if attempt == attempts - 1:
+                raise
 
-    for ev in events:
-        ev_type = ev.get("type")
 
-        if ev_type == "mint":
-            if "minted_mC" in ev:
-                minted_mC = int(ev["minted_mC"])
-            else:
-                mc_str = ev.get("minted_cbtc", "0")
-                minted_cbtc = Decimal(str(mc_str))
-                minted_mC = int((minted_cbtc * Decimal("1000")).quantize(Decimal("1")))
-            total_minted_mC += minted_mC
+# --- SCRIPTED --------------------------------------------------------------
 
-        elif ev_type == "redeem":
-            if "burned_mC" in ev:
-                burned_mC = int(ev["burned_mC"])
-            else:
-                bc_str = ev.get("burned_cbtc", "0")
-                burned_cbtc = Decimal(str(bc_str))
-                burned_mC = int((burned_cbtc * Decimal("1000")).quantize(Decimal("1")))
-            total_redeemed_mC += burned_mC
+def parse_redeem_request(request, need_address: bool):
+    """
+    (requested_mC, address) of one {"amount_cbtc", "address"} request.
+    Raises ValueError if it is invalid.
+    """
+    requested_cbtc = request_decimal(request, "amount_cbtc", places=3)
+    if requested_cbtc <= 0:
+        raise ValueError("Redemption amount must be > 0.")
+    address = str(request.get("address") or "").strip()
+    if need_address and not address:
+        raise ValueError("No address provided.")
+    return cbtc_to_mC(requested_cbtc.quantize(MILLI)), address
 
-    return total_minted_mC, total_redeemed_mC
 
+def simulate_requests(requests):
+    """
+    Dry run: quote the requests in order, each against the supply and
+    pool left by the ones before it. Yields one result per request.
+    """
+    _, total_minted_mC, total_redeemed_mC = ledger_head()
+    outstanding_mC = total_minted_mC - total_redeemed_mC
+    pool_sats = get_pool_tracker().trusted_sats()
 
-def format_cbtc_from_mC(mC: int) -> str:
-    cbtc = (Decimal(mC) / Decimal("1000")).quantize(Decimal("0.001"))
-    return f"{cbtc:.3f}"
+    for index, request in enumerate(requests):
+        try:
+            requested_mC, _ = parse_redeem_request(request, need_address=False)
+            quote = quote_redemption(outstanding_mC, pool_sats, requested_mC)
+        except ValueError as e:
+            yield result_for(index, request, ok=False, error=str(e))
+            continue
+        outstanding_mC -= quote.request_mC
+        pool_sats -= quote.btc_paid_sats
+        yield result_for(index, request, ok=True, executed=False, quote=quote_to_json(quote))
+
+
+def execute_requests(requests):
+    """
+    Pay and log the requests one after another. Yields one result per
+    request; a failed request does not stop the others.
+    """
+    for index, request in enumerate(requests):
+        try:
+            requested_mC, address = parse_redeem_request(request, need_address=True)
+            event = redeem_with_retry(requested_mC, address)
+        except ValueError as e:
+            yield result_for(index, request, ok=False, error=str(e))
+        except LedgerConflict:
+            yield result_for(index, request, ok=False,
+                             error="Ledger busy: redemption could not be quoted, try again.")
+        except JSONRPCException as e:
+            yield result_for(index, request, ok=False, error=f"sendtoaddress failed: {e}")
+        except Exception as e:
+            # e.g. OSError from the ledger lock or fsync: earlier requests
+            # may already be paid, so report this one and go on
+            yield result_for(index, request, ok=False, error=f"{type(e).__name__}: {e}")
+        else:
+            yield result_for(index, request, ok=True, executed=True, event=event)
+
+
+def run_scripted(requests, execute: bool) -> bool:
+    """
+    Print one JSON result line per request. Returns True if every
+    request succeeded.
+    """
+    all_ok = True
+    for result in (execute_requests if execute else simulate_requests)(requests):
+        all_ok = all_ok and result["ok"]
+        emit(result)
+    return all_ok
 
 
 # --- MAIN ------------------------------------------------------------------
 
-def main():
+def interactive():
     # --- Load ledger and compute outstanding -------------------------------
-    ledger = load_ledger()
-    events = ledger.get("events", [])
-
-    total_minted_mC, total_redeemed_mC = sum_minted_and_redeemed_mC(events)
+    seq, total_minted_mC, total_redeemed_mC = ledger_head()
     outstanding_mC = total_minted_mC - total_redeemed_mC
 
-    outstanding_cbtc = (Decimal(outstanding_mC) / Decimal("1000")).quantize(Decimal("0.001"))
     outstanding_str = format_cbtc_from_mC(outstanding_mC)
 
     # --- Get Redemption Pool BTC ------------------------------------------
-    red_client = make_wallet_client(REDEMPTION_WALLET_NAME)
-    red_balance_btc = Decimal(str(red_client.getbalance()))
+    red_balance_btc = sats_to_btc(get_pool_tracker().trusted_sats())
 
     print("\n=== cBTC Redemption (Regtest MVP) ===")
     print(f"Ledger file:           {str(LEDGER_PATH)}")
@@ -154,9 +258,9 @@ def main():
     # --- Ask user for redemption amount -----------------------------------
     raw_amount = input("Enter amount of cBTC to redeem (e.g. 3000 or 250.500): ").strip()
     try:
-        requested_cbtc = Decimal(raw_amount)
-    except Exception:
-        print(f"[ERROR] Invalid cBTC amount: {raw_amount}")
+        requested_cbtc = parse_amount(raw_amount, "cBTC amount", places=3)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
         return
 
     if requested_cbtc <= 0:
@@ -164,156 +268,37 @@ def main():
         return
 
     # Quantize to 3 decimal places
-    requested_cbtc = requested_cbtc.quantize(Decimal("0.001"))
-    requested_mC = int((requested_cbtc * Decimal("1000")).quantize(Decimal("1")))
+    requested_cbtc = requested_cbtc.quantize(MILLI)
+    requested_mC = cbtc_to_mC(requested_cbtc)
 
     if requested_mC > outstanding_mC:
         print("[ERROR] Requested amount exceeds outstanding cBTC.")
         return
 
-    # --- Basic quantities --------------------------------------------------
-    O = outstanding_cbtc                      # total outstanding (Decimal)
-    R = requested_cbtc                        # requested redemption (Decimal)
-    F = FLOOR_RATE                            # floor rate (BTC / cBTC)
-    P = red_balance_btc                       # Redemption Pool BTC
-
-    L_before = (O * F).quantize(Decimal("0.00000001"))  # floor liability before
-
-    if L_before <= 0:
-        print("\n[ERROR] Invalid liability state (L_before <= 0).")
-        return
-
-    absolute_coverage_before = P / L_before
-
-    # Determine tier from absolute coverage
-    if absolute_coverage_before >= Decimal("0.60"):
-        tier = "Tier 1 – Full floor"
-    elif absolute_coverage_before >= Decimal("0.50"):
-        tier = "Tier 2 – Haircuts"
-    else:
-        tier = "Tier 3 – Protection mode (pro-rata)"
-
-    # --- Compute post-redemption base quantities --------------------------
-    O_after = (O - R).quantize(Decimal("0.001"))
-    if O_after < 0:
-        print("[ERROR] Redemption amount exceeds outstanding cBTC (post-check).")
+    # --- Quote redemption (tier rules live in core.py) --------------------
+    try:
+        quote = quote_redemption(outstanding_mC, btc_to_sats(red_balance_btc), requested_mC)
+    except ValueError as e:
+        print(f"\n[ERROR] {e}")
         return
 
-    if O_after > 0:
-        L_after = (O_after * F).quantize(Decimal("0.00000001"))
-    else:
-        L_after = Decimal("0")
-
-    btc_needed_full = (R * F).quantize(Decimal("0.00000001"))
-
-    # --- Decide payout and rate based on tier -----------------------------
-    btc_paid = Decimal("0")
-    redemption_rate = Decimal("0")
-    absolute_coverage_after = None
-
-    # Helper: compute coverage after a given payout when O_after > 0
-    def compute_coverage_after(payout: Decimal) -> Decimal:
-        if O_after <= 0:
-            return Decimal("0")
-        P_after = (P - payout).quantize(Decimal("0.00000001"))
-        if L_after <= 0:
-            return Decimal("0")
-        return P_after / L_after
-
-    # --- Tier 1 & Tier 2: full floor if safe, else haircut to ≥ 50% -------
-    if tier.startswith("Tier 1") or tier.startswith("Tier 2"):
-        if O_after <= 0:
-            # Redeeming all outstanding cBTC: no future liability.
-            # Pay up to full floor, capped by pool.
-            btc_paid = min(btc_needed_full, P)
-            redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-            absolute_coverage_after = Decimal("0")
-        else:
-            # Try full floor first
-            P_after_full = (P - btc_needed_full).quantize(Decimal("0.00000001"))
-
-            if P_after_full < 0:
-                # Can't afford full floor, must haircut
-                can_pay_full = False
-            else:
-                cov_after_full = compute_coverage_after(btc_needed_full)
-                can_pay_full = (cov_after_full >= Decimal("0.50"))
-
-            if can_pay_full:
-                # Full floor is safe
-                btc_paid = btc_needed_full
-                redemption_rate = F
-                absolute_coverage_after = compute_coverage_after(btc_paid)
-            else:
-                # Haircut so that coverage_after = 50%
-                # coverage_after = (P - btc_paid) / L_after = 0.5
-                # => btc_paid = P - 0.5 * L_after
-                if L_after <= 0:
-                    # No remaining liability but we couldn't pay full floor.
-                    # In that weird edge case, just pay what's left in the pool
-                    # proportionally (which will empty it).
-                    btc_paid = P
-                else:
-                    btc_paid_candidate = (P - Decimal("0.5") * L_after).quantize(Decimal("0.00000001"))
-                    if btc_paid_candidate < 0:
-                        btc_paid_candidate = Decimal("0")
-                    # Never pay more than full floor or more than the pool
-                    btc_paid = min(btc_paid_candidate, btc_needed_full, P)
-
-                if btc_paid > 0:
-                    redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-                else:
-                    redemption_rate = Decimal("0")
-                absolute_coverage_after = compute_coverage_after(btc_paid)
-
-    # --- Tier 3: strictly pro-rata ----------------------------------------
-    else:
-        # absolute_coverage_before < 50%
-        # Pro-rata rule:
-        #    btc_paid = P * (R / O)
-        # Ensures coverage_after == coverage_before (constant coverage).
-        if O <= 0:
-            print("\n[ERROR] Invalid outstanding (O <= 0) in Tier 3.")
-            return
-
-        share = (R / O)
-        btc_paid = (P * share).quantize(Decimal("0.00000001"))
-
-        # Cap at pool for sanity
-        if btc_paid > P:
-            btc_paid = P
-
-        if R > 0:
-            redemption_rate = (btc_paid / R).quantize(Decimal("0.00000001"))
-        else:
-            redemption_rate = Decimal("0")
-
-        # Coverage after should be equal to coverage before if O_after > 0
-        if O_after > 0 and L_after > 0:
-            absolute_coverage_after = compute_coverage_after(btc_paid)
-        else:
-            absolute_coverage_after = Decimal("0")
-
-    # Sanity: never pay negative or more than pool
-    if btc_paid < 0:
-        btc_paid = Decimal("0")
-    if btc_paid > P:
-        btc_paid = P
+    btc_paid = quote.btc_paid
+    redemption_rate = quote.redemption_rate
 
     # --- Quote summary -----------------------------------------------------
     print("\n--- Redemption Quote ---")
-    print(f"Tier:                  {tier}")
+    print(f"Tier:                  {quote.tier_label}")
     print(f"Requested redemption:  {requested_cbtc:.3f} cBTC")
-    print(f"Redemption Pool BTC:   {P:.8f}")
-    print(f"Floor liability (pre): {L_before:.8f}")
-    print(f"Absolute coverage (pre): {(absolute_coverage_before * Decimal('100')).quantize(Decimal('0.0001'))}%")
+    print(f"Redemption Pool BTC:   {red_balance_btc:.8f}")
+    print(f"Floor liability (pre): {quote.liability_before:.8f}")
+    print(f"Absolute coverage (pre): {quote.coverage_before_pct}%")
     print("--------------------------------------")
     print(f"Redemption rate:       {redemption_rate:.8f} BTC per cBTC")
     print(f"Total BTC to be paid:  {btc_paid:.8f}")
 
-    if absolute_coverage_after is not None and L_after > 0 and O_after > 0:
-        print(f"Floor liability (post): {L_after:.8f}")
-        print(f"Absolute coverage (post): {(absolute_coverage_after * Decimal('100')).quantize(Decimal('0.0001'))}%")
+    if quote.coverage_after is not None:
+        print(f"Floor liability (post): {quote.liability_after:.8f}")
+        print(f"Absolute coverage (post): {quote.coverage_after_pct}%")
     else:
         print("Floor liability (post): 0.00000000")
         print("Absolute coverage (post): N/A (no remaining liability or not defined)")
@@ -332,48 +317,80 @@ def main():
         print("[ERROR] No address provided.")
         return
 
-    try:
-        txid = red_client.sendtoaddress(recv_addr, float(btc_paid))
-    except JSONRPCException as e:
-        print(f"[ERROR] sendtoaddress failed: {e}")
-        return
-
-    # --- Append redeem event to ledger ------------------------------------
-    burned_cbtc = requested_cbtc.quantize(Decimal("0.001"))
-    burned_mC = int((burned_cbtc * Decimal("1000")).quantize(Decimal("1")))
+    # --- Pay out and append redeem event to ledger -------------------------
+    # If another mint/redemption was logged since the quote, re-quote
+    # against the new state (only the new events are read) and ask
+    # again if the payout changed.
+    while True:
+        try:
+            event = execute_redemption(quote, recv_addr, expected_seq=seq)
+            break
+        except JSONRPCException as e:
+            print(f"[ERROR] sendtoaddress failed: {e}")
+            return
+        except LedgerConflict:
+            try:
+                new_quote, seq = quote_current_redemption(requested_mC)
+            except ValueError as e:
+                print(f"\n[ERROR] Ledger changed since the quote: {e}")
+                return
+
+            if new_quote.btc_paid_sats != quote.btc_paid_sats:
+                print("\n[INFO] Ledger changed since the quote.")
+                print(f"       New tier:            {new_quote.tier_label}")
+                print(f"       New BTC to be paid:  {new_quote.btc_paid:.8f}")
+                confirm = input("Proceed with the updated redemption? (yes/no): ").strip().lower()
+                if confirm not in ("yes", "y"):
+                    print("[INFO] Redemption cancelled.")
+                    return
+            quote = new_quote
+
+    btc_paid = quote.btc_paid
+
+    burned_cbtc = requested_cbtc.quantize(MILLI)
     btc_paid_str = f"{btc_paid:.8f}"
 
-    event = {
-        "type": "redeem",
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "burned_cbtc": f"{burned_cbtc:.3f}",
-        "burned_mC": burned_mC,
-        "btc_paid": btc_paid_str,
-        "redemption_rate": f"{redemption_rate:.8f}",
-        "tier": tier,
-        "txid": txid,
-        "coverage_before": f"{(absolute_coverage_before * Decimal('100')).quantize(Decimal('0.0001'))}%",
-    }
-
-    if absolute_coverage_after is not None and L_after > 0 and O_after > 0:
-        event["coverage_after"] = f"{(absolute_coverage_after * Decimal('100')).quantize(Decimal('0.0001'))}%"
-    else:
-        event["coverage_after"] = "N/A"
-
-    ledger["events"].append(event)
-    save_ledger(ledger)
-
     print("\n[RESULT] Redemption executed and logged.")
-    print(f"         Redemption txid: {txid}")
+    print(f"         Redemption txid: {event['txid']}")
     print(f"         Burned cBTC:     {burned_cbtc:.3f}")
     print(f"         BTC paid out:    {btc_paid_str}")
-    print("\n[NOTE] Event appended to data/ledger.json")
+    print("\n[NOTE] Event appended to data/ledger.jsonl")
     print("       (off-chain cBTC burn accounting for regtest simulations).")
     print("==========================================\n")
 
 
+def main():
+    try:
+        source, positionals, flags = parse_batch_args(sys.argv[1:], flags=("yes",))
+        if source is None and positionals and len(positionals) != 2:
+            raise UsageError("expected <amount_cbtc> <address>")
+        if source is None and not positionals and flags:
+            raise UsageError("--yes needs requests (arguments, --json or --file)")
+    except UsageError as e:
+        print(f"[ERROR] {e}")
+        print(USAGE)
+        sys.exit(1)
+
+    if source is None and not positionals:
+        interactive()
+        return
+
+    if source is None:
+        requests = [{"amount_cbtc": positionals[0], "address": positionals[1]}]
+    else:
+        try:
+            requests = read_requests(source)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Cannot read requests: {e}")
+            sys.exit(1)
+
+    if not run_scripted(requests, execute="yes" in flags):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
         print(f"[ERROR] {e}")
+        sys.exit(1)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Redemption Queue (EXPERIMENTAL)
+#
+# Batches redemptions into a single on-chain payout:
+#
+# - "add" queues a redemption request (cBTC amount + BTC address)
+#   in data/redemption_queue.jsonl; nothing is paid yet
+# - "settle" closes the current window:
+#     - reads the ledger and Redemption Pool BTC once (pool from the
+#       balance tracker, pool_balance.py, like redeem_cbtc.py)
+#     - quotes queued requests in order with the normal tier rules
+#       (core.quote_redemption), each against the outstanding supply
+#       and pool left by the requests before it
+#     - pays all of them with one sendmany from REDEMPTION_POOL
+#     - appends one "redeem" event per request, carrying the shared
+#       txid and the request's output index (vout)
+#
+# Requests stay queued for a later window if:
+#   - their payout would be zero (nothing to send)
+#   - another request in the same window pays the same address
+#     (sendmany takes one output per address)
+#
+# Usage:
+#   python src/coordinator/redemption_queue.py add <cbtc_amount> <btc_address>
+#   python src/coordinator/redemption_queue.py list
+#   python src/coordinator/redemption_queue.py settle
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import getcontext
+from bitcoinrpc.authproxy import JSONRPCException
+import datetime
+import os
+import sys
+import uuid
+
+from batch_io import request_decimal
+from core import MILLI, cbtc_to_mC, format_cbtc_from_mC, quote_redemption, sats_to_btc
+from ledger import REPO_ROOT, LedgerLock, append_ledger_events, decode_line, encode_event, ledger_head
+from pool_balance import get_pool_tracker
+from redeem_cbtc import build_redeem_event
+from rpc import REDEMPTION_WALLET_NAME, WalletClient, get_wallet_client
+
+getcontext().prec = 18
+
+# --- CONSTANTS -------------------------------------------------------------
+
+QUEUE_PATH = REPO_ROOT / "data" / "redemption_queue.jsonl"
+
+
+# --- HELPERS ---------------------------------------------------------------
+
+def load_queue():
+    """
+    Return queued requests in arrival order.
+    """
+    if not QUEUE_PATH.exists():
+        return []
+    with QUEUE_PATH.open("rb") as f:
+        return [req for req in map(decode_line, f) if req is not None]
+
+
+def enqueue(amount_mC: int, address: str):
+    """
+    Append a redemption request to the queue and return it.
+    """
+    request = {
+        "queue_id": uuid.uuid4().hex,
+        "queued_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "amount_mC": amount_mC,
+        "address": address,
+    }
+    QUEUE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Same lock as settle, which rewrites the queue file
+    with LedgerLock():
+        with QUEUE_PATH.open("ab") as f:
+            f.write(encode_event(request))
+            f.flush()
+            os.fsync(f.fileno())
+    return request
+
+
+def save_queue(requests) -> None:
+    """
+    Replace the queue with the given requests (used after settling).
+    """
+    tmp_path = QUEUE_PATH.with_name(QUEUE_PATH.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        for request in requests:
+            f.write(encode_event(request))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, QUEUE_PATH)
+
+
+def plan_batch(requests, outstanding_mC: int, pool_sats: int):
+    """
+    Quote queued requests sequentially against the evolving supply/pool.
+
+    Returns (batch, deferred, rejected):
+      batch    – list of (request, quote) to pay in this window
+      deferred – requests kept in the queue for a later window
+      rejected – list of (request, reason) dropped from the queue
+    """
+    batch = []
+    deferred = []
+    rejected = []
+    addresses = set()
+    outstanding_at_open = outstanding_mC
+
+    for request in requests:
+        amount_mC = int(request.get("amount_mC", 0))
+
+        if request.get("address") in addresses:
+            deferred.append(request)
+            continue
+
+        try:
+            quote = quote_redemption(outstanding_mC, pool_sats, amount_mC)
+        except ValueError as e:
+            if 0 < amount_mC <= outstanding_at_open:
+                # Only exceeds what is left after earlier requests in
+                # this window: retry in a later window.
+                deferred.append(request)
+            else:
+                rejected.append((request, str(e)))
+            continue
+
+        if quote.btc_paid_sats <= 0:
+            deferred.append(request)
+            continue
+
+        batch.append((request, quote))
+        addresses.add(request["address"])
+        outstanding_mC -= quote.request_mC
+        pool_sats -= quote.btc_paid_sats
+
+    return batch, deferred, rejected
+
+
+def output_indexes(client: WalletClient, txid: str):
+    """
+    Map each paid address to its output index in the wallet transaction.
+
+    Best effort: it runs after the batch is paid and before it is
+    logged, so a failed lookup returns {} (events get vout None)
+    rather than raising.
+    """
+    try:
+        tx = client.gettransaction(txid)
+    except Exception as e:
+        print(f"[WARN] Could not read output indexes of {txid}: {e}")
+        return {}
+    vouts = {}
+    for detail in tx.get("details", []):
+        if detail.get("category") == "send":
+            vouts[detail["address"]] = detail["vout"]
+    return vouts
+
+
+# --- COMMANDS --------------------------------------------------------------
+
+def cmd_add(raw_amount: str, address: str) -> None:
+    try:
+        requested_cbtc = request_decimal({"amount_cbtc": raw_amount}, "amount_cbtc", places=3)
+    except ValueError:
+        print(f"[ERROR] Invalid cBTC amount: {raw_amount}")
+        sys.exit(1)
+
+    amount_mC = cbtc_to_mC(requested_cbtc.quantize(MILLI))
+    if amount_mC <= 0:
+        print("[ERROR] Redemption amount must be > 0.")
+        sys.exit(1)
+    if not address:
+        print("[ERROR] No address provided.")
+        sys.exit(1)
+
+    request = enqueue(amount_mC, address)
+    print(f"[RESULT] Queued redemption {request['queue_id']}")
+    print(f"         Amount:  {format_cbtc_from_mC(amount_mC)} cBTC")
+    print(f"         Address: {address}")
+
+
+def cmd_list() -> None:
+    requests = load_queue()
+    print(f"\n=== cBTC Redemption Queue ({len(requests)} requests) ===")
+    for request in requests:
+        print(f"{request['queued_at']}  {request['queue_id']}  "
+              f"{format_cbtc_from_mC(int(request['amount_mC'])):>14} cBTC  {request['address']}")
+    print()
+
+
+def cmd_settle() -> None:
+    # The whole window runs under the ledger writer lock: no other
+    # mint, redemption or enqueue can change supply, pool or queue
+    # between reading them and logging the batch.
+    with LedgerLock():
+        settle_window()
+
+
+def settle_window() -> None:
+    requests = load_queue()
+    if not requests:
+        print("[INFO] Redemption queue is empty.")
+        return
+
+    # --- Read ledger and pool once for the whole window -------------------
+    seq, total_minted_mC, total_redeemed_mC = ledger_head()
+    outstanding_mC = total_minted_mC - total_redeemed_mC
+
+    red_client = get_wallet_client(REDEMPTION_WALLET_NAME)
+    pool_sats = get_pool_tracker().trusted_sats()
+
+    batch, deferred, rejected = plan_batch(requests, outstanding_mC, pool_sats)
+
+    print("\n=== cBTC Redemption Queue Settlement (Regtest MVP) ===")
+    print(f"Queued requests:       {len(requests)}")
+    print(f"Estimated outstanding: {format_cbtc_from_mC(outstanding_mC)}")
+    print(f"Redemption Pool BTC:   {sats_to_btc(pool_sats):.8f}")
+    print("------------------------------------------------------")
+
+    for request, quote in batch:
+        print(f"{request['queue_id']}  {format_cbtc_from_mC(quote.request_mC):>14} cBTC  "
+              f"→ {quote.btc_paid:.8f} BTC  ({quote.tier_label})")
+    for request, reason in rejected:
+        print(f"[WARN] Rejected {request.get('queue_id')}: {reason}")
+    if deferred:
+        print(f"[INFO] {len(deferred)} request(s) deferred to the next window.")
+
+    if not batch:
+        save_queue(deferred)
+        print("[INFO] Nothing to pay in this window.")
+        return
+
+    # --- One on-chain payout for the whole batch --------------------------
+    outputs = {request["address"]: float(quote.btc_paid) for request, quote in batch}
+
+    try:
+        txid = red_client.sendmany(
+            "",              # empty string means: use default account (descriptor wallet)
+            outputs,
+            0,               # minconf
+            "cBTC Redemption batch"
+        )
+    except JSONRPCException as e:
+        print(f"[ERROR] sendmany failed: {e}")
+        sys.exit(1)
+    get_pool_tracker().invalidate()
+
+    vouts = output_indexes(red_client, txid)
+
+    # --- One ledger event per request, single append ----------------------
+    events = []
+    for request, quote in batch:
+        event = build_redeem_event(quote, txid)
+        event["vout"] = vouts.get(request["address"])
+        event["recipient_address"] = request["address"]
+        event["queue_id"] = request["queue_id"]
+        event["batch_size"] = len(batch)
+        events.append(event)
+    append_ledger_events(events, expected_seq=seq, lock_held=True)
+
+    save_queue(deferred)
+
+    paid_sats = sum(quote.btc_paid_sats for _, quote in batch)
+    print("\n[RESULT] Redemption batch executed and logged.")
+    print(f"         Batch txid:    {txid}")
+    print(f"         Redemptions:   {len(batch)}")
+    print(f"         BTC paid out:  {sats_to_btc(paid_sats):.8f}")
+    print("\n[NOTE] Events appended to data/ledger.jsonl")
+    print("======================================================\n")
+
+
+USAGE = """Usage:
+  python src/coordinator/redemption_queue.py add <cbtc_amount> <btc_address>
+  python src/coordinator/redemption_queue.py list
+  python src/coordinator/redemption_queue.py settle"""
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == "add":
+        cmd_add(args[1], args[2].strip())
+    elif args == ["list"]:
+        cmd_list()
+    elif args == ["settle"]:
+        cmd_settle()
+    else:
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[ERROR] {e}")
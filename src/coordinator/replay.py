@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Historical Replay (EXPERIMENTAL)
+#
+# Rebuilds coverage over time from the ledger alone (no node):
+#
+# - Walks the ledger once, in append order, with a simulated
+#   Redemption Pool:
+#     mint   → pool += redemption_btc, outstanding += minted
+#     redeem → pool -= btc_paid,       outstanding -= burned
+# - After every event: outstanding mC, pool sats, absolute and
+#   normalized coverage and tier (same rules as status.py)
+# - Re-verifies every recorded coverage_before / coverage_after
+#   against the replayed pool and supply, at the precision it was
+#   logged with ("66.6667%" or legacy ratios like "0.600")
+# - O(1) state: the series is streamed out row by row, so long
+#   histories replay in constant memory
+#
+# The log is append-only, so append order is timestamp order; an
+# event whose timestamp goes backwards is counted and reported, not
+# re-sorted.
+#
+# The simulated pool ignores on-chain fees and any BTC sent to the
+# Redemption Pool outside mints. Coverages logged from the real pool
+# then drift from the replay; --tolerance-sats accepts such a
+# mismatch when the implied pool difference is within N sats.
+#
+# Usage:
+#   python src/coordinator/replay.py [--series PATH|-] [--format csv|jsonl]
+#       [--tolerance-sats N]
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal, InvalidOperation
+import argparse
+import csv
+import json
+import sys
+
+from core import (
+    BASELINE_COVERAGE,
+    DECIMAL_CONTEXT,
+    TIER_LABELS,
+    btc_to_sats,
+    classify_tier,
+    coverage_pct,
+    format_cbtc_from_mC,
+    sats_to_btc,
+)
+from ledger import event_supply_delta_mC, iter_events
+
+NO_OUTSTANDING = "No outstanding cBTC"
+
+SERIES_FIELDS = (
+    "index",
+    "seq",
+    "timestamp",
+    "type",
+    "txid",
+    "outstanding_mC",
+    "pool_sats",
+    "absolute_coverage_pct",
+    "normalized_coverage_pct",
+    "tier",
+    "check",
+)
+
+
+# --- COVERAGE --------------------------------------------------------------
+# With the floor rate of 0.00001 BTC per cBTC the floor liability of
+# 1 mC is exactly 1 sat, so liability_sats == outstanding_mC.
+
+def coverage_ratio(pool_sats: int, outstanding_mC: int):
+    """
+    Absolute coverage as in core.RedemptionQuote, or None if nothing
+    is outstanding.
+    """
+    if outstanding_mC <= 0:
+        return None
+    return DECIMAL_CONTEXT.divide(Decimal(pool_sats), Decimal(outstanding_mC))
+
+
+def coverage_tier(coverage) -> str:
+    if coverage is None:
+        return NO_OUTSTANDING
+    return TIER_LABELS[classify_tier(coverage)]
+
+
+def parse_coverage(recorded):
+    """
+    Logged coverage ("66.6667%" or a legacy ratio like "0.600") as a
+    ratio, or None for "N/A" / unreadable values.
+    """
+    if not isinstance(recorded, str):
+        return None
+    text = recorded.strip()
+    percent = text.endswith("%")
+    try:
+        value = Decimal(text[:-1] if percent else text)
+    except InvalidOperation:
+        return None
+    if not value.is_finite():
+        return None
+    return value.scaleb(-2) if percent else value
+
+
+def check_coverage(recorded, pool_sats: int, outstanding_mC: int):
+    """
+    Compare a logged coverage with the replayed one, at the precision
+    it was logged with. Returns (ok, replayed, drift_sats): drift_sats
+    is the pool difference the logged value implies (None if it cannot
+    be derived).
+    """
+    coverage = coverage_ratio(pool_sats, outstanding_mC)
+    if recorded in (None, "N/A"):
+        return coverage is None, "N/A" if coverage is None else str(coverage_pct(coverage)) + "%", None
+    if coverage is None:
+        return False, "N/A", None
+
+    text = str(recorded).strip()
+    percent = text.endswith("%")
+    try:
+        value = Decimal(text[:-1] if percent else text)
+    except InvalidOperation:
+        return False, str(coverage_pct(coverage)) + "%", None
+    if not value.is_finite():
+        return False, str(coverage_pct(coverage)) + "%", None
+
+    if percent:
+        replayed = coverage_pct(coverage)
+        implied_ratio = value.scaleb(-2)
+        shown = f"{replayed}%"
+    else:
+        # Legacy events logged the bare ratio with varying digits
+        replayed = DECIMAL_CONTEXT.quantize(coverage, Decimal(1).scaleb(value.as_tuple().exponent))
+        implied_ratio = value
+        shown = str(replayed)
+
+    drift_sats = int(DECIMAL_CONTEXT.multiply(implied_ratio, Decimal(outstanding_mC)).to_integral_value()) - pool_sats
+    return value == replayed, shown, drift_sats
+
+
+# --- REPLAY ----------------------------------------------------------------
+
+class ReplayState:
+    """
+    Running state of one replay: O(1) regardless of ledger length.
+    """
+
+    __slots__ = (
+        "outstanding_mC",
+        "pool_sats",
+        "events",
+        "mints",
+        "redeems",
+        "checked",
+        "mismatched",
+        "within_tolerance",
+        "out_of_order",
+        "last_timestamp",
+        "min_pool_sats",
+        "min_outstanding_mC",
+        "min_coverage_index",
+        "tolerance_sats",
+    )
+
+    def __init__(self, tolerance_sats: int = 0):
+        self.outstanding_mC = 0
+        self.pool_sats = 0
+        self.events = 0
+        self.mints = 0
+        self.redeems = 0
+        self.checked = 0
+        self.mismatched = 0
+        self.within_tolerance = 0
+        self.out_of_order = 0
+        self.last_timestamp = None
+        self.min_pool_sats = 0
+        self.min_outstanding_mC = 0
+        self.min_coverage_index = None
+        self.tolerance_sats = tolerance_sats
+
+    def _check(self, event, field: str, problems) -> None:
+        if field not in event:
+            return
+        self.checked += 1
+        ok, replayed, drift_sats = check_coverage(event[field], self.pool_sats, self.outstanding_mC)
+        if ok:
+            return
+        if drift_sats is not None and abs(drift_sats) <= self.tolerance_sats:
+            self.within_tolerance += 1
+            return
+        self.mismatched += 1
+        drift = "" if drift_sats is None else f", drift {drift_sats:+d} sats"
+        problems.append(f"{field} logged {event[field]}, replayed {replayed}{drift}")
+
+    @property
+    def min_coverage(self):
+        """
+        Lowest coverage seen after any event (None if never defined).
+        """
+        if self.min_coverage_index is None:
+            return None
+        return coverage_ratio(self.min_pool_sats, self.min_outstanding_mC)
+
+    def apply(self, event):
+        """
+        Apply one event and run its checks. Returns the list of
+        problems found (empty if none).
+        """
+        self.events += 1
+        problems = []
+
+        timestamp = event.get("timestamp")
+        if isinstance(timestamp, str):
+            if self.last_timestamp is not None and timestamp < self.last_timestamp:
+                self.out_of_order += 1
+                problems.append(f"timestamp before previous event ({self.last_timestamp})")
+            else:
+                self.last_timestamp = timestamp
+
+        minted_mC, burned_mC = event_supply_delta_mC(event)
+        ev_type = event.get("type")
+
+        if ev_type == "mint":
+            self.mints += 1
+            self.pool_sats += btc_to_sats(event.get("redemption_btc", "0"))
+            self.outstanding_mC += minted_mC
+
+        elif ev_type == "redeem":
+            self.redeems += 1
+            self._check(event, "coverage_before", problems)
+            self.pool_sats -= btc_to_sats(event.get("btc_paid", "0"))
+            self.outstanding_mC -= burned_mC
+            self._check(event, "coverage_after", problems)
+
+        # Lowest coverage by cross-multiplication (no division per event)
+        if self.outstanding_mC > 0 and (
+            self.min_coverage_index is None
+            or self.pool_sats * self.min_outstanding_mC < self.min_pool_sats * self.outstanding_mC
+        ):
+            self.min_pool_sats = self.pool_sats
+            self.min_outstanding_mC = self.outstanding_mC
+            self.min_coverage_index = self.events
+
+        return problems
+
+    def row(self, event, problems):
+        """
+        Series row for the state right after `event`.
+        """
+        coverage = coverage_ratio(self.pool_sats, self.outstanding_mC)
+        return {
+            "index": self.events,
+            "seq": event.get("seq"),
+            "timestamp": event.get("timestamp"),
+            "type": event.get("type"),
+            "txid": event.get("txid"),
+            "outstanding_mC": self.outstanding_mC,
+            "pool_sats": self.pool_sats,
+            "absolute_coverage_pct": None if coverage is None else str(coverage_pct(coverage)),
+            "normalized_coverage_pct": None if coverage is None else str(
+                coverage_pct(DECIMAL_CONTEXT.divide(coverage, BASELINE_COVERAGE))
+            ),
+            "tier": coverage_tier(coverage),
+            "check": "; ".join(problems) or "ok",
+        }
+
+
+def replay(events, state: ReplayState = None):
+    """
+    Yield one series row per event. Pass a ReplayState to read the
+    totals and check counts afterwards.
+    """
+    state = ReplayState() if state is None else state
+    for event in events:
+        yield state.row(event, state.apply(event))
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def open_series(path: str):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC historical coverage replay")
+    parser.add_argument("--series", metavar="PATH", help="write the time series to PATH ('-' for stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--tolerance-sats", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.tolerance_sats < 0:
+        print("[ERROR] --tolerance-sats must be ≥ 0.")
+        sys.exit(1)
+
+    state = ReplayState(args.tolerance_sats)
+    out = open_series(args.series) if args.series else None
+    report = sys.stderr if out is sys.stdout else sys.stdout
+
+    try:
+        writer = None
+        if out is not None and args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=SERIES_FIELDS)
+            writer.writeheader()
+
+        for event in iter_events():
+            problems = state.apply(event)
+            if out is not None:
+                row = state.row(event, problems)
+                if writer is not None:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(row, sort_keys=True) + "\n")
+            if problems:
+                print(f"[WARN] Event #{state.events} ({event.get('type')}, {event.get('timestamp')}): "
+                      f"{'; '.join(problems)}", file=report)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    coverage = coverage_ratio(state.pool_sats, state.outstanding_mC)
+    print("\n=== cBTC Coverage Replay (Regtest MVP) ===", file=report)
+    print(f"Events replayed:       {state.events} ({state.mints} mints, {state.redeems} redemptions)", file=report)
+    print(f"Outstanding cBTC:      {format_cbtc_from_mC(state.outstanding_mC)}", file=report)
+    print(f"Replayed pool BTC:     {sats_to_btc(state.pool_sats):.8f}", file=report)
+    if coverage is not None:
+        print(f"Absolute coverage:     {coverage_pct(coverage)}%", file=report)
+    else:
+        print("Absolute coverage:     N/A", file=report)
+    print(f"Tier:                  {coverage_tier(coverage)}", file=report)
+    min_coverage = state.min_coverage
+    if min_coverage is not None:
+        print(f"Lowest coverage:       {coverage_pct(min_coverage)}% (after event #{state.min_coverage_index})",
+              file=report)
+    print("------------------------------------------", file=report)
+    print(f"Coverage checks:       {state.checked}", file=report)
+    print(f"  mismatched:          {state.mismatched}", file=report)
+    if state.tolerance_sats:
+        print(f"  within tolerance:    {state.within_tolerance} (±{state.tolerance_sats} sats)", file=report)
+    if state.out_of_order:
+        print(f"Out-of-order events:   {state.out_of_order}", file=report)
+    print("==========================================\n", file=report)
+
+    if state.mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Coordinator RPC Layer (EXPERIMENTAL)
+#
+# Shared Bitcoin Core JSON-RPC access for the coordinator scripts.
+#
+# - One client per wallet, created once and reused
+#   (get_wallet_client); no more fresh AuthServiceProxy per call site
+# - Each client keeps a small pool of HTTP/1.1 keep-alive
+#   connections, so repeated calls skip the TCP (and auth) setup
+#   and concurrent callers do not share a socket
+# - JSON-RPC batch requests: several calls to the same wallet in a
+#   single HTTP round trip (WalletClient.batch)
+# - Calls to different wallets can be issued concurrently
+#   (batch_wallets), so e.g. the address derivation for a mint costs
+#   one round trip of latency instead of one per call
+#
+# Bitcoin Core routes wallet RPCs by URL (/wallet/<name>), so one
+# batch can only target one wallet.
+#
+# Dependencies:
+#   pip install python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from bitcoinrpc.authproxy import JSONRPCException
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import decimal
+import http.client
+import json
+import threading
+
+# --- RPC CONFIG ------------------------------------------------------------
+
+RPC_USER = "cbtc"
+RPC_PASSWORD = "cbtcpassword"
+RPC_PORT = 18443
+RPC_HOST = "127.0.0.1"
+
+REDEMPTION_WALLET_NAME = "REDEMPTION_POOL"
+YIELD_WALLET_NAME = "YIELD_POOL"
+
+HTTP_TIMEOUT = 30
+
+# Idle keep-alive connections kept per wallet client
+MAX_IDLE_CONNECTIONS = 4
+
+# Spending RPCs are never retried: if the connection drops after the
+# request was sent we cannot tell whether the node already acted on it.
+NON_RETRYABLE_METHODS = frozenset({
+    "send",
+    "sendall",
+    "sendmany",
+    "sendrawtransaction",
+    "sendtoaddress",
+})
+
+# Errors raised when a pooled keep-alive connection was closed by the
+# node while idle.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+def encode_decimal(o):
+    """
+    json.dumps default= hook: Decimal amounts as 8-decimal floats (the
+    form bitcoind expects).
+    """
+    if isinstance(o, decimal.Decimal):
+        return float(round(o, 8))
+    raise TypeError(repr(o) + " is not JSON serializable")
+
+
+# --- CLIENT ----------------------------------------------------------------
+
+class WalletClient:
+    """
+    Keep-alive JSON-RPC client bound to one wallet.
+
+    Attribute access works like AuthServiceProxy:
+        client.getbalance()
+        client.getnewaddress("REDEMPTION_POOL", "bech32")
+    """
+
+    def __init__(self, wallet_name: str, host: str = None, port: int = None,
+                 user: str = None, password: str = None, timeout: float = HTTP_TIMEOUT):
+        # Unset connection settings fall back to the module-level RPC
+        # config at construction time (tests can point it at a stub node).
+        user = RPC_USER if user is None else user
+        password = RPC_PASSWORD if password is None else password
+
+        self.wallet_name = wallet_name
+        self.host = RPC_HOST if host is None else host
+        self.port = RPC_PORT if port is None else port
+        self.timeout = timeout
+        self.path = f"/wallet/{wallet_name}"
+        self._auth_header = "Basic " + base64.b64encode(f"{user}:{password}".encode("utf8")).decode("ascii")
+        self._idle = []
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return lambda *params: self.call(name, *params)
+
+    def __repr__(self):
+        return f"WalletClient({self.wallet_name!r}, {self.host}:{self.port})"
+
+    # --- Connection pool ---------------------------------------------------
+
+    def _acquire(self):
+        """
+        Returns (connection, reused).
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _release(self, conn) -> None:
+        with self._lock:
+            if len(self._idle) < MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _ids(self, count: int):
+        with self._lock:
+            first = self._next_id + 1
+            self._next_id += count
+        return range(first, first + count)
+
+    def _post(self, payload, retryable: bool):
+        """
+        POST a JSON-RPC payload and return the decoded response body.
+
+        A stale pooled connection is replaced and the request re-sent
+        once, unless the payload contains a spending call.
+        """
+        body = json.dumps(payload, default=encode_decimal)
+        headers = {
+            "Host": self.host,
+            "Authorization": self._auth_header,
+            "Content-Type": "application/json",
+        }
+
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request("POST", self.path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and retryable:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            break
+
+        if response.getheader("Content-Type") != "application/json":
+            raise JSONRPCException({
+                "code": -342,
+                "message": f"non-JSON HTTP response with '{response.status} {response.reason}' from server",
+            })
+        return json.loads(data.decode("utf8"), parse_float=decimal.Decimal)
+
+    # --- Calls -------------------------------------------------------------
+
+    def call(self, method: str, *params):
+        """
+        Single JSON-RPC call; returns its result or raises JSONRPCException.
+        """
+        (request_id,) = self._ids(1)
+        payload = {"version": "1.1", "method": method, "params": list(params), "id": request_id}
+        response = self._post(payload, method not in NON_RETRYABLE_METHODS)
+        return rpc_result(response)
+
+    def batch(self, calls):
+        """
+        JSON-RPC batch: several calls in one HTTP round trip.
+
+        calls: iterable of (method, *params) tuples.
+        Returns the results in the same order as the calls. Raises
+        JSONRPCException for the first call that failed.
+        """
+        calls = [tuple(c) for c in calls]
+        if not calls:
+            return []
+
+        ids = self._ids(len(calls))
+        payload = [
+            {"jsonrpc": "2.0", "method": method, "params": list(params), "id": request_id}
+            for request_id, (method, *params) in zip(ids, calls)
+        ]
+        retryable = all(c[0] not in NON_RETRYABLE_METHODS for c in calls)
+        responses = self._post(payload, retryable)
+
+        if not isinstance(responses, list):
+            # Node rejected the whole batch (e.g. parse error)
+            rpc_result(responses)
+            raise JSONRPCException({"code": -343, "message": "unexpected batch response"})
+
+        by_id = {r.get("id"): r for r in responses}
+        results = []
+        for request_id in ids:
+            if request_id not in by_id:
+                raise JSONRPCException({"code": -343, "message": "missing JSON-RPC batch response"})
+            results.append(rpc_result(by_id[request_id]))
+        return results
+
+
+def rpc_result(response):
+    """
+    The result of one JSON-RPC response object; raises JSONRPCException
+    for an error or a missing result.
+    """
+    if response.get("error") is not None:
+        raise JSONRPCException(response["error"])
+    if "result" not in response:
+        raise JSONRPCException({"code": -343, "message": "missing JSON-RPC result"})
+    return response["result"]
+
+
+# --- CLIENT REGISTRY -------------------------------------------------------
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_wallet_client(wallet_name: str) -> WalletClient:
+    """
+    Return the shared client for a wallet, creating it on first use.
+    """
+    with _clients_lock:
+        client = _clients.get(wallet_name)
+        if client is None:
+            client = WalletClient(wallet_name)
+            _clients[wallet_name] = client
+        return client
+
+
+def make_wallet_client(wallet_name: str) -> WalletClient:
+    """
+    Create an RPC client bound to a specific wallet.
+    Kept for existing callers; returns the shared pooled client.
+    """
+    return get_wallet_client(wallet_name)
+
+
+def close_all() -> None:
+    """
+    Close idle connections of every shared client.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        client.close()
+
+
+def batch_wallets(calls_by_wallet):
+    """
+    Run one JSON-RPC batch per wallet, all wallets concurrently.
+
+    calls_by_wallet: {wallet_name: [(method, *params), ...]}
+    Returns {wallet_name: [results...]}.
+    """
+    items = list(calls_by_wallet.items())
+    if len(items) == 1:
+        wallet_name, calls = items[0]
+        return {wallet_name: get_wallet_client(wallet_name).batch(calls)}
+
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        futures = {
+            wallet_name: pool.submit(get_wallet_client(wallet_name).batch, calls)
+            for wallet_name, calls in items
+        }
+        return {wallet_name: future.result() for wallet_name, future in futures.items()}
+
+
+# --- CHAIN CHECKS ----------------------------------------------------------
+
+def check_regtest(info) -> None:
+    """
+    Ensure we are running on regtest, not mainnet.
+    `info` is a getblockchaininfo result.
+    """
+    chain = info.get("chain")
+    if chain != "regtest":
+        raise RuntimeError(f"Expected regtest chain, but node is on: {chain}")
+
+
+# Nodes (host, port) this process has already seen on regtest
+_regtest_nodes = set()
+
+
+def regtest_confirmed(client) -> bool:
+    return (client.host, client.port) in _regtest_nodes
+
+
+def confirm_regtest(client, info) -> None:
+    """
+    check_regtest(info) for the node `client` talks to, remembered for
+    the rest of the process.
+    """
+    check_regtest(info)
+    _regtest_nodes.add((client.host, client.port))
+
+
+def ensure_regtest(client) -> None:
+    """
+    Check the node is on regtest before anything is derived or spent.
+    Asks the node once per process; later calls make no RPC.
+    """
+    if not regtest_confirmed(client):
+        confirm_regtest(client, client.getblockchaininfo())
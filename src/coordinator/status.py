@@ -6,7 +6,8 @@
 # - total minted cBTC
 # - total redeemed (burned) cBTC
 # - outstanding cBTC
-# - Redemption Pool BTC
+# - Redemption Pool BTC (trusted balance, plus confirmed /
+#   unconfirmed, from the pool balance tracker in pool_balance.py)
 # - floor liability
 # - absolute coverage (real solvency)
 # - normalized coverage (relative to baseline 66.67%)
@@ -15,6 +16,14 @@
 #     Tier 2 – Haircuts       (50% ≤ coverage < 60%)
 #     Tier 3 – Protection     (coverage < 50%)
 #
+# "cps" mode lists every Collateral Provider from the per-CP index
+# (channels, deposits, splits, minted cBTC, first / last mint) plus
+# totals; it reads only the ledger, no node needed.
+#
+# Usage:
+#   python src/coordinator/status.py
+#   python src/coordinator/status.py cps
+#
 # Compatible with:
 # - older events with "minted_cbtc" / "burned_cbtc"
 # - newer events with "minted_mC" / "burned_mC"
@@ -23,117 +32,24 @@
 # ------------------------------------------------------------
 
 from decimal import Decimal, getcontext
-from bitcoinrpc.authproxy import AuthServiceProxy
-from pathlib import Path
-import json
-
-getcontext().prec = 18
-
-# --- CONSTANTS -------------------------------------------------------------
-
-FLOOR_RATE = Decimal("0.00001")  # BTC per 1 cBTC
-
-# Baseline coverage at mint:
-#  - LTV: 30%
-#  - Redemption Pool: 20%
-# ⇒ baseline = 0.20 / 0.30 = 2/3 ≈ 66.67%
-BASELINE_COVERAGE = (Decimal("0.20") / Decimal("0.30"))
-
-RPC_USER = "cbtc"
-RPC_PASSWORD = "cbtcpassword"
-RPC_PORT = 18443
-RPC_HOST = "127.0.0.1"
-
-REDEMPTION_WALLET_NAME = "REDEMPTION_POOL"
-
-# Resolve repo root (cbtc-protocol/) from this file location:
-REPO_ROOT = Path(__file__).resolve().parents[2]
-LEDGER_PATH = REPO_ROOT / "data" / "ledger.json"
-
-
-# --- HELPERS ---------------------------------------------------------------
+import sys
 
-def make_wallet_client(wallet_name: str) -> AuthServiceProxy:
-    url = f"http://{RPC_USER}:{RPC_PASSWORD}@{RPC_HOST}:{RPC_PORT}/wallet/{wallet_name}"
-    return AuthServiceProxy(url)
-
-
-def load_ledger():
-    if not LEDGER_PATH.exists():
-        return {"events": []}
-    try:
-        with LEDGER_PATH.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "events" not in data or not isinstance(data["events"], list):
-            return {"events": []}
-        return data
-    except Exception:
-        return {"events": []}
+from core import BASELINE_COVERAGE, FLOOR_RATE, format_cbtc_from_mC, sats_to_btc
+from cp_index import POSITION_FIELDS, cp_positions, cp_sort_key
+from ledger import LEDGER_PATH, load_supply_totals
+from pool_balance import get_pool_tracker
 
+getcontext().prec = 18
 
-def sum_minted_and_redeemed_mC(events):
-    """
-    Returns:
-      total_minted_mC   – integer milli-cBTC
-      total_redeemed_mC – integer milli-cBTC
 
-    Compatible with:
-      - older events with "minted_cbtc" / "burned_cbtc"
-      - newer events with "minted_mC" / "burned_mC"
-    """
-    total_minted_mC = 0
-    total_redeemed_mC = 0
-
-    for ev in events:
-        ev_type = ev.get("type")
-
-        if ev_type == "mint":
-            if "minted_mC" in ev:
-                minted_mC = int(ev["minted_mC"])
-            else:
-                mc_str = ev.get("minted_cbtc", "0")
-                minted_cbtc = Decimal(str(mc_str))
-                minted_mC = int((minted_cbtc * Decimal("1000")).quantize(Decimal("1")))
-            total_minted_mC += minted_mC
-
-        elif ev_type == "redeem":
-            if "burned_mC" in ev:
-                burned_mC = int(ev["burned_mC"])
-            else:
-                bc_str = ev.get("burned_cbtc", "0")
-                burned_cbtc = Decimal(str(bc_str))
-                burned_mC = int((burned_cbtc * Decimal("1000")).quantize(Decimal("1")))
-            total_redeemed_mC += burned_mC
-
-    return total_minted_mC, total_redeemed_mC
-
-
-def format_cbtc_from_mC(mC: int) -> str:
+def compute_status(total_minted_mC: int, total_redeemed_mC: int, red_balance_btc: Decimal):
     """
-    Convert integer milli-cBTC to a string with 3 decimal places.
+    Coverage figures for the given ledger totals and Redemption Pool
+    balance. Shared by the CLI below and the coordinator daemon.
     """
-    cbtc = (Decimal(mC) / Decimal("1000")).quantize(Decimal("0.001"))
-    return f"{cbtc:.3f}"
-
-
-def main():
-    # --- Load ledger data ---------------------------------------------------
-    ledger = load_ledger()
-    events = ledger.get("events", [])
-
-    total_minted_mC, total_redeemed_mC = sum_minted_and_redeemed_mC(events)
     outstanding_mC = total_minted_mC - total_redeemed_mC
-
-    total_minted_cbtc_str = format_cbtc_from_mC(total_minted_mC)
-    total_redeemed_cbtc_str = format_cbtc_from_mC(total_redeemed_mC)
-    outstanding_cbtc_str = format_cbtc_from_mC(outstanding_mC)
-
     outstanding_cbtc = (Decimal(outstanding_mC) / Decimal("1000")).quantize(Decimal("0.001"))
 
-    # --- Get Redemption Pool balance ---------------------------------------
-    red_client = make_wallet_client(REDEMPTION_WALLET_NAME)
-    red_balance_btc = Decimal(str(red_client.getbalance()))
-
     # --- Compute floor liability -------------------------------------------
     if outstanding_cbtc > 0:
         floor_liability_btc = (outstanding_cbtc * FLOOR_RATE).quantize(Decimal("0.00000001"))
@@ -162,31 +78,94 @@ def main():
         else:
             tier = "Tier 3 – Protection mode (< 50%)"
 
+    status = {
+        "total_minted_cbtc": format_cbtc_from_mC(total_minted_mC),
+        "total_redeemed_cbtc": format_cbtc_from_mC(total_redeemed_mC),
+        "outstanding_cbtc": format_cbtc_from_mC(outstanding_mC),
+        "outstanding_mC": outstanding_mC,
+        "redemption_pool_btc": f"{red_balance_btc:.8f}",
+        "floor_liability_btc": f"{floor_liability_btc:.8f}",
+        "absolute_coverage_pct": None,
+        "baseline_coverage_pct": None,
+        "normalized_coverage_pct": None,
+        "tier": tier,
+    }
+
+    if outstanding_cbtc > 0 and floor_liability_btc > 0:
+        status["absolute_coverage_pct"] = str((absolute_coverage * Decimal("100")).quantize(Decimal("0.0001")))
+        status["baseline_coverage_pct"] = str((BASELINE_COVERAGE * Decimal("100")).quantize(Decimal("0.0001")))
+        status["normalized_coverage_pct"] = str((normalized_coverage * Decimal("100")).quantize(Decimal("0.0001")))
+
+    return status
+
+
+def print_cp_positions() -> None:
+    """
+    One line per CP (natural order), then totals.
+    """
+    cps = cp_positions()
+    totals = dict.fromkeys(POSITION_FIELDS, 0)
+
+    print("\n=== cBTC Collateral Providers (Regtest MVP) ===")
+    print(f"{'CP':<12} {'Channels':>8} {'Deposited BTC':>15} {'Principal BTC':>15} "
+          f"{'Red. pool BTC':>15} {'Yield pool BTC':>15} {'Minted cBTC':>16}  First mint / Last mint")
+
+    for cp_wallet in sorted(cps, key=cp_sort_key):
+        position = cps[cp_wallet]
+        for field in POSITION_FIELDS:
+            totals[field] += position[field]
+        print(f"{cp_wallet:<12} {position['channels']:>8} {sats_to_btc(position['deposit_sats']):>15.8f} "
+              f"{sats_to_btc(position['principal_sats']):>15.8f} {sats_to_btc(position['redemption_sats']):>15.8f} "
+              f"{sats_to_btc(position['yield_sats']):>15.8f} {format_cbtc_from_mC(position['minted_mC']):>16}  "
+              f"{position['first_mint'] or '-'} / {position['last_mint'] or '-'}")
+
+    print("-" * 104)
+    print(f"{f'{len(cps)} CPs':<12} {totals['channels']:>8} {sats_to_btc(totals['deposit_sats']):>15.8f} "
+          f"{sats_to_btc(totals['principal_sats']):>15.8f} {sats_to_btc(totals['redemption_sats']):>15.8f} "
+          f"{sats_to_btc(totals['yield_sats']):>15.8f} {format_cbtc_from_mC(totals['minted_mC']):>16}")
+    print()
+
+
+def main():
+    if sys.argv[1:] == ["cps"]:
+        print_cp_positions()
+        return
+    if sys.argv[1:]:
+        print("Usage: python src/coordinator/status.py [cps]")
+        sys.exit(1)
+
+    # --- Load ledger data ---------------------------------------------------
+    total_minted_mC, total_redeemed_mC = load_supply_totals()
+
+    # --- Get Redemption Pool balance ---------------------------------------
+    pool = get_pool_tracker().balance()
+    red_balance_btc = sats_to_btc(pool["trusted_sats"])
+
+    status = compute_status(total_minted_mC, total_redeemed_mC, red_balance_btc)
+
     # --- Output -------------------------------------------------------------
     print("\n=== cBTC Protocol Status (Regtest MVP) ===")
     print(f"Ledger file:           {str(LEDGER_PATH)}")
     print("------------------------------------------")
-    print(f"Total minted cBTC:     {total_minted_cbtc_str}")
-    print(f"Total redeemed cBTC:   {total_redeemed_cbtc_str}")
-    print(f"Estimated outstanding: {outstanding_cbtc_str}")
+    print(f"Total minted cBTC:     {status['total_minted_cbtc']}")
+    print(f"Total redeemed cBTC:   {status['total_redeemed_cbtc']}")
+    print(f"Estimated outstanding: {status['outstanding_cbtc']}")
     print("------------------------------------------")
-    print(f"Redemption Pool BTC:   {red_balance_btc:.8f}")
-    print(f"Floor liability BTC:   {floor_liability_btc:.8f}")
-
-    if outstanding_cbtc > 0 and floor_liability_btc > 0:
-        abs_pct = (absolute_coverage * Decimal("100")).quantize(Decimal("0.0001"))
-        baseline_pct = (BASELINE_COVERAGE * Decimal("100")).quantize(Decimal("0.0001"))
-        norm_pct = (normalized_coverage * Decimal("100")).quantize(Decimal("0.0001"))
-
-        print(f"Absolute coverage:     {abs_pct}%")
-        print(f"Baseline coverage:     {baseline_pct}% (treated as 100% health)")
-        print(f"Normalized coverage:   {norm_pct}% of baseline")
+    print(f"Redemption Pool BTC:   {status['redemption_pool_btc']}")
+    print(f"  confirmed:           {sats_to_btc(pool['confirmed_sats']):.8f}")
+    print(f"  unconfirmed:         {sats_to_btc(pool['unconfirmed_sats']):.8f}")
+    print(f"Floor liability BTC:   {status['floor_liability_btc']}")
+
+    if status["absolute_coverage_pct"] is not None:
+        print(f"Absolute coverage:     {status['absolute_coverage_pct']}%")
+        print(f"Baseline coverage:     {status['baseline_coverage_pct']}% (treated as 100% health)")
+        print(f"Normalized coverage:   {status['normalized_coverage_pct']}% of baseline")
     else:
         print("Absolute coverage:     N/A")
         print("Baseline coverage:     66.6667% (design target at mint)")
         print("Normalized coverage:   N/A")
 
-    print(f"Tier:                  {tier}")
+    print(f"Tier:                  {status['tier']}")
     print("==========================================\n")
 
 
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Stub Bitcoin Node (EXPERIMENTAL)
+#
+# In-memory stand-in for a regtest bitcoind, speaking just enough
+# of its JSON-RPC interface for the coordinator scripts:
+#
+#   getblockchaininfo, getbalance, getnewaddress, sendmany,
+#   sendtoaddress, gettransaction, listsinceblock,
+#   getblockcount, getbestblockhash, getblockhash, generatetoaddress,
+#   getaddressesbylabel, getaddressinfo
+#
+# - Wallets are addressed by URL like Bitcoin Core (/wallet/<name>)
+# - CP wallets start funded; pool wallets start empty
+# - Payments move balances between wallets whose addresses are known
+#   (unknown addresses are treated as external)
+# - Addresses are valid regtest bech32 (P2WPKH) and every payment is
+#   a real serialized transaction (rawtx.py), so its txid and outputs
+#   match what bitcoind would publish; addresses the stub cannot
+#   decode are paid to a placeholder script instead of rejected
+# - Optional ZMQ publisher stand-in: "hashblock" and "rawtx"
+#   notifications in Bitcoin Core's wire format (needs pyzmq), for
+#   zmq_listener.py
+# - Supports HTTP/1.1 keep-alive and JSON-RPC batches
+# - Optional latency per HTTP request (one JSON-RPC call or batch),
+#   to stand in for a remote or loaded node in benchmarks
+#
+# - Each payment is mined into its own block right away (automine,
+#   the default), or waits in a mempool until generatetoaddress
+#   mines it (StubNode(automine=False)); no reorgs
+#
+# No fees, UTXOs or block rewards – only balances, transaction
+# records and block heights. Useful for exercising the coordinator
+# (rpc.py, the daemon, benchmarks) without a real node.
+#
+# Usage:
+#   python src/coordinator/stub_node.py [port] [cp_balance_btc] [zmq_port] [latency_ms]
+#   (zmq_port 0: no ZMQ publisher)
+#
+#   Then point the coordinator at it, e.g.:
+#   python src/coordinator/coordinator_daemon.py --rpc-port 18543
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from core import btc_to_sats, sats_to_btc
+from rawtx import address_to_script, build_raw_tx, encode_segwit_address, sha256d
+from rpc import RPC_HOST, RPC_PASSWORD, RPC_USER, REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME
+
+# --- CONSTANTS -------------------------------------------------------------
+
+DEFAULT_STUB_PORT = 18543
+DEFAULT_CP_BALANCE_BTC = Decimal("50")
+DEFAULT_CP_WALLETS = ("CP1", "CP2", "CP3")
+
+# Bitcoin Core RPC error codes used by the stub
+RPC_METHOD_NOT_FOUND = -32601
+RPC_INVALID_PARAMETER = -8
+RPC_WALLET_INSUFFICIENT_FUNDS = -6
+RPC_INVALID_ADDRESS_OR_KEY = -5
+RPC_WALLET_NOT_FOUND = -18
+RPC_WALLET_INVALID_LABEL_NAME = -11
+
+
+class StubRPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# --- NODE STATE ------------------------------------------------------------
+
+class StubNode:
+    """
+    Wallet balances (sats) and transactions, guarded by one lock.
+    """
+
+    def __init__(self, cp_wallets=DEFAULT_CP_WALLETS, cp_balance_btc: Decimal = DEFAULT_CP_BALANCE_BTC,
+                 automine: bool = True, latency: float = 0.0):
+        self.lock = threading.Lock()
+        self.balances = {name: btc_to_sats(cp_balance_btc) for name in cp_wallets}
+        self.balances[REDEMPTION_WALLET_NAME] = 0
+        self.balances[YIELD_WALLET_NAME] = 0
+        self.address_owner = {}
+        self.address_label = {}
+        self.transactions = {}
+        self.address_count = 0
+        self.tx_count = 0
+        # Block hashes differ per instance: a restarted stub is a new chain
+        self.chain_salt = os.urandom(8).hex()
+        self.block_hashes = [hashlib.sha256(f"stub-block-{self.chain_salt}-0".encode("ascii")).hexdigest()]
+        self.block_heights = {self.block_hashes[0]: 0}
+        self.mempool = []
+        self.automine = automine
+        # Seconds added to every HTTP request, outside the node lock
+        self.latency = latency
+        # Optional notify(topic, body) hook, e.g. a StubZmqPublisher;
+        # called with the node lock held, so it must not call back
+        self.notify = None
+
+    def dispatch(self, wallet_name, method: str, params):
+        handler = getattr(self, "rpc_" + method, None)
+        if handler is None:
+            raise StubRPCError(RPC_METHOD_NOT_FOUND, "Method not found")
+        if wallet_name is not None and wallet_name not in self.balances:
+            raise StubRPCError(RPC_WALLET_NOT_FOUND, "Requested wallet does not exist or is not loaded")
+        with self.lock:
+            return handler(wallet_name, *params)
+
+    def _require_wallet(self, wallet_name):
+        if wallet_name is None:
+            raise StubRPCError(RPC_WALLET_NOT_FOUND, "Wallet file not specified (must request wallet RPC through /wallet/<filename> uri-path).")
+
+    def _pay(self, wallet_name, outputs, comment: str) -> str:
+        """
+        Move sats from `wallet_name` to the given {address: sats}
+        outputs and record the transaction.
+        """
+        total = sum(outputs.values())
+        if any(sats <= 0 for sats in outputs.values()):
+            raise StubRPCError(RPC_INVALID_PARAMETER, "Invalid amount for send")
+        if total > self.balances[wallet_name]:
+            raise StubRPCError(RPC_WALLET_INSUFFICIENT_FUNDS, "Insufficient funds")
+
+        self.tx_count += 1
+        # One made-up input per payment (no UTXOs are tracked)
+        prevout = (hashlib.sha256(f"stub-in-{self.chain_salt}-{self.tx_count}".encode("ascii")).hexdigest(), 0)
+        raw = build_raw_tx([prevout], [(sats, _output_script(address)) for address, sats in outputs.items()])
+        txid = sha256d(raw)[::-1].hex()
+
+        self.balances[wallet_name] -= total
+        details = []
+        for vout, (address, sats) in enumerate(outputs.items()):
+            owner = self.address_owner.get(address)
+            if owner is not None:
+                self.balances[owner] += sats
+            details.append({"address": address, "vout": vout, "sats": sats, "owner": owner})
+
+        self.transactions[txid] = {
+            "from": wallet_name,
+            "details": details,
+            "comment": comment,
+            "height": None,
+            "hex": raw.hex(),
+        }
+        self.mempool.append(txid)
+        self._publish("rawtx", raw)
+        if self.automine:
+            self._mine_block()
+        return txid
+
+    def _mine_block(self) -> str:
+        height = len(self.block_hashes)
+        block_hash = hashlib.sha256(f"stub-block-{self.chain_salt}-{height}".encode("ascii")).hexdigest()
+        self.block_hashes.append(block_hash)
+        self.block_heights[block_hash] = height
+        for txid in self.mempool:
+            self.transactions[txid]["height"] = height
+            # bitcoind publishes every transaction of a connected block
+            self._publish("rawtx", bytes.fromhex(self.transactions[txid]["hex"]))
+        self.mempool = []
+        self._publish("hashblock", bytes.fromhex(block_hash))
+        return block_hash
+
+    def _publish(self, topic: str, body: bytes) -> None:
+        if self.notify is not None:
+            self.notify(topic, body)
+
+    def _wallet_entries(self, wallet_name, tx):
+        """
+        The wallet's view of a transaction: one "send" entry per output
+        it paid, one "receive" entry per output to its addresses.
+        """
+        entries = []
+        for d in tx["details"]:
+            if tx["from"] == wallet_name:
+                entries.append({"address": d["address"], "category": "send", "amount": -sats_to_btc(d["sats"]), "vout": d["vout"]})
+            if d["owner"] == wallet_name:
+                entries.append({"address": d["address"], "category": "receive", "amount": sats_to_btc(d["sats"]), "vout": d["vout"]})
+        return entries
+
+    def _confirmations(self, tx) -> int:
+        if tx["height"] is None:
+            return 0
+        return len(self.block_hashes) - tx["height"]
+
+    def _block_fields(self, tx):
+        fields = {"confirmations": self._confirmations(tx)}
+        if tx["height"] is not None:
+            fields["blockhash"] = self.block_hashes[tx["height"]]
+            fields["blockheight"] = tx["height"]
+        return fields
+
+    # --- RPC methods -------------------------------------------------------
+
+    def rpc_getblockchaininfo(self, wallet_name):
+        height = len(self.block_hashes) - 1
+        return {"chain": "regtest", "blocks": height, "headers": height, "bestblockhash": self.block_hashes[-1]}
+
+    def rpc_getblockcount(self, wallet_name):
+        return len(self.block_hashes) - 1
+
+    def rpc_getbestblockhash(self, wallet_name):
+        return self.block_hashes[-1]
+
+    def rpc_getblockhash(self, wallet_name, height: int):
+        if not 0 <= height < len(self.block_hashes):
+            raise StubRPCError(RPC_INVALID_PARAMETER, "Block height out of range")
+        return self.block_hashes[height]
+
+    def rpc_generatetoaddress(self, wallet_name, nblocks: int, address: str, *args):
+        """
+        Mine `nblocks` empty-reward blocks; the first one takes the
+        whole mempool.
+        """
+        return [self._mine_block() for _ in range(nblocks)]
+
+    def rpc_getbalance(self, wallet_name, *args):
+        self._require_wallet(wallet_name)
+        return sats_to_btc(self.balances[wallet_name])
+
+    def rpc_getnewaddress(self, wallet_name, label: str = "", address_type: str = "bech32"):
+        self._require_wallet(wallet_name)
+        self.address_count += 1
+        program = hashlib.sha256(f"stub-addr-{self.chain_salt}-{self.address_count}".encode("ascii")).digest()[:20]
+        address = encode_segwit_address("bcrt", 0, program)
+        self.address_owner[address] = wallet_name
+        self.address_label[address] = label
+        return address
+
+    def rpc_getaddressesbylabel(self, wallet_name, label: str):
+        self._require_wallet(wallet_name)
+        addresses = {
+            address: {"purpose": "receive"}
+            for address, owner in self.address_owner.items()
+            if owner == wallet_name and self.address_label[address] == label
+        }
+        if not addresses:
+            raise StubRPCError(RPC_WALLET_INVALID_LABEL_NAME, f"No addresses with label {label}")
+        return addresses
+
+    def rpc_getaddressinfo(self, wallet_name, address: str):
+        self._require_wallet(wallet_name)
+        if address_to_script(address) is None:
+            raise StubRPCError(RPC_INVALID_ADDRESS_OR_KEY, "Invalid address")
+        owner = self.address_owner.get(address)
+        info = {"address": address, "ismine": owner == wallet_name, "labels": []}
+        if owner == wallet_name:
+            info["labels"] = [self.address_label[address]]
+        return info
+
+    def rpc_sendmany(self, wallet_name, dummy, amounts, minconf=1, comment: str = "", *args):
+        self._require_wallet(wallet_name)
+        if not amounts:
+            raise StubRPCError(RPC_INVALID_PARAMETER, "Transaction must have at least one recipient")
+        outputs = {address: btc_to_sats(Decimal(str(amount))) for address, amount in amounts.items()}
+        return self._pay(wallet_name, outputs, comment)
+
+    def rpc_sendtoaddress(self, wallet_name, address: str, amount, comment: str = "", *args):
+        self._require_wallet(wallet_name)
+        return self._pay(wallet_name, {address: btc_to_sats(Decimal(str(amount)))}, comment)
+
+    def rpc_gettransaction(self, wallet_name, txid: str, *args):
+        self._require_wallet(wallet_name)
+        tx = self.transactions.get(txid)
+        if tx is None or (tx["from"] != wallet_name and all(d["owner"] != wallet_name for d in tx["details"])):
+            raise StubRPCError(RPC_INVALID_ADDRESS_OR_KEY, "Invalid or non-wallet transaction id")
+
+        details = self._wallet_entries(wallet_name, tx)
+        result = {
+            "txid": txid,
+            "amount": sum((d["amount"] for d in details), Decimal(0)),
+            "comment": tx["comment"],
+            "details": details,
+            "hex": tx["hex"],
+        }
+        result.update(self._block_fields(tx))
+        return result
+
+    def rpc_listsinceblock(self, wallet_name, blockhash: str = "", target_confirmations: int = 1, *args):
+        """
+        Wallet entries in blocks after `blockhash` (all blocks if empty)
+        plus the mempool. "lastblock" is the block `target_confirmations`
+        - 1 below the tip, as in Bitcoin Core.
+        """
+        self._require_wallet(wallet_name)
+        if target_confirmations < 1:
+            raise StubRPCError(RPC_INVALID_PARAMETER, "Invalid parameter")
+        since = 0
+        if blockhash:
+            if blockhash not in self.block_heights:
+                raise StubRPCError(RPC_INVALID_ADDRESS_OR_KEY, "Block not found")
+            since = self.block_heights[blockhash]
+
+        transactions = []
+        for txid, tx in self.transactions.items():
+            if tx["height"] is not None and tx["height"] <= since:
+                continue
+            for entry in self._wallet_entries(wallet_name, tx):
+                entry["txid"] = txid
+                entry.update(self._block_fields(tx))
+                transactions.append(entry)
+
+        tip = len(self.block_hashes) - 1
+        return {
+            "transactions": transactions,
+            "removed": [],
+            "lastblock": self.block_hashes[max(tip - target_confirmations + 1, 0)],
+        }
+
+
+def _output_script(address: str) -> str:
+    script = address_to_script(address)
+    if script is None:
+        # OP_RETURN <address>: keeps the payment visible without a
+        # decodable destination
+        data = address.encode("utf8")[:75]
+        script = "6a" + bytes([len(data)]).hex() + data.hex()
+    return script
+
+
+# --- ZMQ PUBLISHER ---------------------------------------------------------
+
+class StubZmqPublisher:
+    """
+    Publishes node notifications like bitcoind's -zmqpubhashblock /
+    -zmqpubrawtx: multipart [topic, body, 4-byte LE sequence number],
+    one sequence per topic. Use as StubNode.notify.
+    """
+
+    def __init__(self, endpoint: str):
+        try:
+            import zmq
+        except ImportError:
+            raise RuntimeError("pyzmq is not installed (pip install pyzmq)") from None
+        self._zmq = zmq
+        self.socket = zmq.Context.instance().socket(zmq.PUB)
+        self.socket.bind(endpoint)
+        self.endpoint = endpoint
+        self.sequence = {}
+
+    def __call__(self, topic: str, body: bytes) -> None:
+        seq = self.sequence.get(topic, 0)
+        self.sequence[topic] = (seq + 1) & 0xffffffff
+        self.socket.send_multipart([topic.encode("ascii"), body, seq.to_bytes(4, "little")])
+
+    def close(self) -> None:
+        self.socket.close(linger=0)
+
+
+# --- HTTP SERVER -----------------------------------------------------------
+
+def _decimal_default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    raise TypeError(repr(o) + " is not JSON serializable")
+
+
+def make_handler(node: StubNode, user: str = RPC_USER, password: str = RPC_PASSWORD):
+    expected_auth = "Basic " + base64.b64encode(f"{user}:{password}".encode("utf8")).decode("ascii")
+
+    class StubRPCHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes: without this,
+        # Nagle + delayed ACK add ~40 ms to every keep-alive call
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, payload) -> None:
+            body = json.dumps(payload, default=_decimal_default).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle_one(self, wallet_name, request):
+            response = {"id": request.get("id"), "result": None, "error": None}
+            try:
+                response["result"] = node.dispatch(wallet_name, request.get("method", ""), request.get("params") or [])
+            except StubRPCError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+            except (TypeError, ValueError) as e:
+                response["error"] = {"code": RPC_INVALID_PARAMETER, "message": str(e)}
+            return response
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+
+            if self.headers.get("Authorization") != expected_auth:
+                self.send_response(401)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if node.latency:
+                time.sleep(node.latency)
+
+            wallet_name = None
+            if self.path.startswith("/wallet/"):
+                wallet_name = self.path[len("/wallet/"):]
+
+            try:
+                request = json.loads(body.decode("utf8"), parse_float=Decimal)
+            except ValueError:
+                self._reply(500, {"result": None, "error": {"code": -32700, "message": "Parse error"}, "id": None})
+                return
+
+            if isinstance(request, list):
+                self._reply(200, [self._handle_one(wallet_name, r) for r in request])
+                return
+
+            response = self._handle_one(wallet_name, request)
+            self._reply(200 if response["error"] is None else 500, response)
+
+    return StubRPCHandler
+
+
+def start_stub_node(port: int = 0, host: str = RPC_HOST, node: StubNode = None):
+    """
+    Start a stub node in a background thread.
+    Returns (server, node); the bound port is server.server_address[1].
+    """
+    node = node or StubNode()
+    server = ThreadingHTTPServer((host, port), make_handler(node))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, node
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    args = sys.argv[1:]
+    try:
+        port = int(args[0]) if len(args) >= 1 else DEFAULT_STUB_PORT
+        cp_balance_btc = Decimal(args[1]) if len(args) >= 2 else DEFAULT_CP_BALANCE_BTC
+        zmq_port = int(args[2]) if len(args) >= 3 else None
+        latency_ms = Decimal(args[3]) if len(args) >= 4 else Decimal(0)
+        if latency_ms < 0:
+            raise ValueError
+    except Exception:
+        print("Usage: python src/coordinator/stub_node.py [port] [cp_balance_btc] [zmq_port] [latency_ms]")
+        sys.exit(1)
+
+    node = StubNode(cp_balance_btc=cp_balance_btc, latency=float(latency_ms) / 1000)
+    if zmq_port:
+        try:
+            node.notify = StubZmqPublisher(f"tcp://{RPC_HOST}:{zmq_port}")
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        print(f"[INFO] ZMQ notifications (hashblock, rawtx) on {node.notify.endpoint}")
+    server = ThreadingHTTPServer((RPC_HOST, port), make_handler(node))
+    server.daemon_threads = True
+
+    print(f"[INFO] Stub node listening on {RPC_HOST}:{port} (regtest, in-memory)")
+    print(f"[INFO] Wallets: {', '.join(node.balances)}")
+    if node.latency:
+        print(f"[INFO] Added latency: {latency_ms} ms per request")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Stub node stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
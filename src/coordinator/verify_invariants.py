@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – Ledger Invariant Audit (EXPERIMENTAL)
+#
+# Checks the ledger against docs/protocol-invariants.md, on all
+# cores:
+#
+# Per event (in a process pool, one chunk of the log per task):
+#   - issuance rate:    minted_mC == deposit × 30,000 × 1000
+#                       (same rounding as open_mint_channel.py)
+#   - collateral split: principal / redemption / yield are exactly
+#                       70 / 20 / 10% of the deposit (each share
+#                       rounded as in split_deposit); deposit within
+#                       0.05–5 BTC
+#   - units:            minted_mC / minted_cbtc and burned_mC /
+#                       burned_cbtc (legacy redeemed_cbtc) agree
+#   - redemptions:      burn > 0, BTC paid never above the floor
+#                       value, logged rate × burned == paid, logged
+#                       coverage_after ≥ 50% unless Tier 3
+#   - txid and timestamp well-formed, known event type
+#
+# Global (merged from per-chunk prefix sums):
+#   - supply conservation: outstanding cBTC never negative
+#   - ledger-implied Redemption Pool (mint shares in, payouts out)
+#     never negative, and ≥ 50% coverage after every redemption
+#     that did not start in Tier 3
+#   - seq stamps match event positions (append-only, no gaps)
+#   - timestamps non-decreasing (reported as a warning)
+#
+# data/ledger.jsonl is split into newline-aligned byte ranges that
+# the workers read and parse themselves; the SQLite store and the
+# legacy data/ledger.json are streamed to the workers in batches.
+#
+# Usage:
+#   python src/coordinator/verify_invariants.py [--workers N] [--chunk-mb M]
+#
+# Dependencies:
+#   pip install numpy python-bitcoinrpc
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+import argparse
+import collections
+import os
+import sys
+
+import numpy as np
+
+from core import HALF, _round_half_even, btc_to_sats, cbtc_to_mC, format_cbtc_from_mC, mC_to_cbtc, sats_to_btc
+from ledger import LEDGER_PATH, decode_line, event_supply_delta_mC, get_sqlite_store, iter_legacy_events
+from ledger_binary import parse_timestamp_us
+from open_mint_channel import MAX_DEPOSIT, MIN_DEPOSIT, split_deposit
+from replay import parse_coverage
+
+# --- RULES -----------------------------------------------------------------
+
+RULES = {
+    "event_type": "Known event type (mint / redeem)",
+    "mint_fields": "Mint amounts present and readable",
+    "deposit_range": "Deposit within 0.05–5 BTC",
+    "issuance_rate": "Invariant 1 – 30,000 cBTC per BTC",
+    "minted_units": "minted_mC matches minted_cbtc",
+    "collateral_split": "Invariant 2 – 70 / 20 / 10 split",
+    "redeem_fields": "Redemption amounts present and readable",
+    "burn_positive": "Invariant 4 – redemptions burn cBTC",
+    "burned_units": "burned_mC matches burned_cbtc",
+    "payout_floor": "BTC paid never above the floor value",
+    "payout_rate": "Logged rate × burned == BTC paid",
+    "logged_solvency": "Invariant 3 – logged coverage_after ≥ 50% (unless Tier 3)",
+    "txid": "txid is 64 hex characters",
+    "timestamp": "Timestamp is ISO-8601 UTC",
+    "unreadable_line": "Invariant 6 – every log line is a readable event",
+    "supply_conservation": "Outstanding cBTC never negative",
+    "pool_nonnegative": "Ledger-implied Redemption Pool never negative",
+    "redemption_solvency": "Invariant 3 – coverage ≥ 50% after redemptions (unless Tier 3)",
+    "seq_order": "Invariant 6 – seq stamps match append order",
+}
+
+# Detailed failures kept per chunk / per global rule
+MAX_SAMPLES = 20
+
+# Events per task when streaming (SQLite / legacy JSON)
+STREAM_BATCH = 50_000
+
+DEFAULT_CHUNK_MB = 16
+
+_SPLIT_FIELDS = (
+    ("principal_btc", "principal"),
+    ("redemption_btc", "redemption_share"),
+    ("yield_btc", "yield_share"),
+)
+
+
+# --- PER-EVENT CHECKS ------------------------------------------------------
+
+def _decimal(value):
+    if value is None or isinstance(value, bool) or not isinstance(value, (str, int)):
+        return None
+    try:
+        value = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    return value if value.is_finite() else None
+
+
+def _check_mint(event, minted_mC, problems) -> int:
+    """
+    Mint checks. Returns the event's Redemption Pool share (sats).
+    """
+    if "minted_mC" in event and "minted_cbtc" in event:
+        minted_cbtc = _decimal(event["minted_cbtc"])
+        if minted_cbtc is None or cbtc_to_mC(minted_cbtc) != minted_mC:
+            problems.append(("minted_units", f"minted_cbtc {event['minted_cbtc']} vs minted_mC {minted_mC}"))
+
+    shares = {key: _decimal(event.get(key)) for key, _ in _SPLIT_FIELDS}
+    for key, value in shares.items():
+        if value is None:
+            problems.append(("mint_fields", f"missing or unreadable {key}"))
+
+    deposit = _decimal(event.get("deposit_btc"))
+    if deposit is None:
+        problems.append(("mint_fields", "missing or unreadable deposit_btc"))
+    else:
+        if not MIN_DEPOSIT <= deposit <= MAX_DEPOSIT:
+            problems.append(("deposit_range", f"deposit {deposit} BTC"))
+
+        split = split_deposit(deposit)
+        if minted_mC != split["minted_mC"]:
+            problems.append(("issuance_rate", f"minted {format_cbtc_from_mC(minted_mC)} cBTC for {deposit} BTC, "
+                                              f"expected {split['minted_cbtc']}"))
+        for key, split_key in _SPLIT_FIELDS:
+            if shares[key] is not None and shares[key] != split[split_key]:
+                problems.append(("collateral_split", f"{key} {shares[key]}, expected {split[split_key]}"))
+
+    redemption = shares["redemption_btc"]
+    return btc_to_sats(redemption) if redemption is not None else 0
+
+
+def _check_redeem(event, burned_mC, problems) -> int:
+    """
+    Redemption checks. Returns the BTC paid (sats).
+    """
+    if burned_mC <= 0:
+        problems.append(("burn_positive", f"burned {format_cbtc_from_mC(burned_mC)} cBTC"))
+
+    for key in ("burned_cbtc", "redeemed_cbtc"):
+        if key in event and ("burned_mC" in event or key == "redeemed_cbtc"):
+            value = _decimal(event[key])
+            if value is None or cbtc_to_mC(value) != burned_mC:
+                problems.append(("burned_units", f"{key} {event[key]} vs burned {format_cbtc_from_mC(burned_mC)}"))
+
+    paid = _decimal(event.get("btc_paid"))
+    if paid is None:
+        problems.append(("redeem_fields", "missing or unreadable btc_paid"))
+        return 0
+    paid_sats = btc_to_sats(paid)
+
+    # Floor: 0.00001 BTC per cBTC, i.e. 1 sat per milli-cBTC
+    if paid_sats < 0 or paid_sats > max(burned_mC, 0):
+        problems.append(("payout_floor", f"paid {paid} BTC for {format_cbtc_from_mC(burned_mC)} cBTC "
+                                         f"(floor value {sats_to_btc(max(burned_mC, 0))} BTC)"))
+
+    if burned_mC > 0:
+        if "redemption_rate" in event:
+            rate = _decimal(event["redemption_rate"])
+            expected = _round_half_even(max(paid_sats, 0) * 1000, burned_mC)
+            if rate is None or btc_to_sats(rate) != expected:
+                problems.append(("payout_rate", f"redemption_rate {event['redemption_rate']}, "
+                                                f"expected {sats_to_btc(expected)}"))
+        elif "rate_btc_per_cbtc" in event:
+            rate = _decimal(event["rate_btc_per_cbtc"])
+            if rate is None or rate * mC_to_cbtc(burned_mC) != paid:
+                problems.append(("payout_rate", f"rate_btc_per_cbtc {event['rate_btc_per_cbtc']} × "
+                                                f"{format_cbtc_from_mC(burned_mC)} cBTC != {paid} BTC"))
+
+    before = parse_coverage(event.get("coverage_before"))
+    after = parse_coverage(event.get("coverage_after"))
+    if before is not None and after is not None and before >= HALF and after < HALF:
+        problems.append(("logged_solvency", f"coverage {event['coverage_before']} → {event['coverage_after']}"))
+
+    return paid_sats
+
+
+def check_event(event):
+    """
+    Per-event invariants. Returns (problems, outstanding delta mC,
+    ledger-implied pool delta sats); problems is [(rule, message)].
+    """
+    problems = []
+    ev_type = event.get("type")
+
+    txid = event.get("txid")
+    if not (isinstance(txid, str) and len(txid) == 64 and all(c in "0123456789abcdefABCDEF" for c in txid)):
+        problems.append(("txid", f"txid {txid!r}"))
+    try:
+        parse_timestamp_us(event.get("timestamp"))
+    except ValueError:
+        problems.append(("timestamp", f"timestamp {event.get('timestamp')!r}"))
+
+    try:
+        minted_mC, burned_mC = event_supply_delta_mC(event)
+    except (ArithmeticError, TypeError, ValueError):
+        field = "mint_fields" if ev_type == "mint" else "redeem_fields"
+        problems.append((field, "unreadable minted / burned amount"))
+        return problems, 0, 0
+
+    if ev_type == "mint":
+        pool_delta = _check_mint(event, minted_mC, problems)
+    elif ev_type == "redeem":
+        pool_delta = -_check_redeem(event, burned_mC, problems)
+    else:
+        problems.append(("event_type", f"type {ev_type!r}"))
+        pool_delta = 0
+
+    return problems, minted_mC - burned_mC, pool_delta
+
+
+# --- CHUNK WORKERS ---------------------------------------------------------
+
+def check_events(events, unreadable=()):
+    """
+    Check a list of events (one chunk, in ledger order). `unreadable`
+    lists (event index, message) for log lines that could not be
+    decoded. Returns the chunk summary merged by merge_chunks().
+    """
+    n = len(events)
+    d_outstanding = np.zeros(n, dtype=np.int64)
+    d_pool = np.zeros(n, dtype=np.int64)
+    is_redeem = np.zeros(n, dtype=bool)
+    seq = np.full(n, -1, dtype=np.int64)
+    counts = collections.Counter()
+    samples = []
+    first_ts = last_ts = None
+    ts_backwards = 0
+
+    for i, event in enumerate(events):
+        problems, d_outstanding[i], d_pool[i] = check_event(event)
+        is_redeem[i] = event.get("type") == "redeem"
+
+        value = event.get("seq")
+        if type(value) is int and 0 < value < 2**63:
+            seq[i] = value
+
+        timestamp = event.get("timestamp")
+        if isinstance(timestamp, str):
+            if first_ts is None:
+                first_ts = timestamp
+            elif timestamp < last_ts:
+                ts_backwards += 1
+            if last_ts is None or timestamp >= last_ts:
+                last_ts = timestamp
+
+        for rule, message in problems:
+            counts[rule] += 1
+            if len(samples) < MAX_SAMPLES:
+                samples.append((i, rule, message))
+
+    for i, message in unreadable:
+        counts["unreadable_line"] += 1
+        if len(samples) < MAX_SAMPLES:
+            samples.append((i, "unreadable_line", message))
+
+    return {
+        "events": n,
+        "d_outstanding": d_outstanding,
+        "d_pool": d_pool,
+        "is_redeem": is_redeem,
+        "seq": seq,
+        "counts": counts,
+        "samples": samples,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "ts_backwards": ts_backwards,
+    }
+
+
+def check_log_chunk(job):
+    """
+    Worker: parse and check log bytes [start, end) (newline-aligned).
+    """
+    path, start, end = job
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    events = []
+    unreadable = []
+    offset = start
+    for line in data.split(b"\n"):
+        if line.strip():
+            event = decode_line(line)
+            if event is None:
+                unreadable.append((len(events), f"unreadable line at byte {offset}"))
+            else:
+                events.append(event)
+        offset += len(line) + 1
+    return check_events(events, unreadable)
+
+
+def log_chunks(path, chunk_bytes: int):
+    """
+    Newline-aligned (start, end) byte ranges covering the log.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        pos = chunk_bytes
+        while pos < size:
+            f.seek(pos)
+            f.readline()
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+            pos = boundary + chunk_bytes
+    bounds.append(size)
+    return [(path, start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _batches(events, size: int):
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _map_ordered(pool, fn, jobs, window: int):
+    """
+    pool.map() that keeps at most `window` jobs in flight, so a
+    streamed source is not read into memory all at once.
+    """
+    pending = collections.deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# --- GLOBAL CHECKS ---------------------------------------------------------
+
+def _global_failures(mask, message):
+    """
+    Returns (count, [(index, message)]) for event indexes where mask
+    holds.
+    """
+    hits = np.flatnonzero(mask)
+    return int(hits.size), [(int(i), message(int(i))) for i in hits[:MAX_SAMPLES]]
+
+
+def merge_chunks(chunks):
+    """
+    Merge chunk summaries: per-event results plus the global
+    invariants over the concatenated prefix sums.
+    """
+    counts = collections.Counter()
+    samples = []
+    offset = 0
+    ts_backwards = 0
+    last_ts = None
+
+    for chunk in chunks:
+        counts.update(chunk["counts"])
+        samples.extend((offset + i, rule, message) for i, rule, message in chunk["samples"])
+        ts_backwards += chunk["ts_backwards"]
+        if chunk["first_ts"] is not None:
+            if last_ts is not None and chunk["first_ts"] < last_ts:
+                ts_backwards += 1
+            if last_ts is None or chunk["last_ts"] > last_ts:
+                last_ts = chunk["last_ts"]
+        offset += chunk["events"]
+
+    n = offset
+    if chunks:
+        d_outstanding = np.concatenate([c["d_outstanding"] for c in chunks])
+        d_pool = np.concatenate([c["d_pool"] for c in chunks])
+        is_redeem = np.concatenate([c["is_redeem"] for c in chunks])
+        seq = np.concatenate([c["seq"] for c in chunks])
+    else:
+        d_outstanding = d_pool = seq = np.zeros(0, dtype=np.int64)
+        is_redeem = np.zeros(0, dtype=bool)
+
+    # Prefix sums: state after each event, and before it
+    outstanding = np.cumsum(d_outstanding)
+    pool = np.cumsum(d_pool)
+    outstanding_before = outstanding - d_outstanding
+    pool_before = pool - d_pool
+
+    tier3_before = 2 * pool_before < outstanding_before
+    prev_seq = np.concatenate(([0], seq[:-1]))
+    global_checks = {
+        "supply_conservation": (
+            outstanding < 0,
+            lambda i: f"outstanding {format_cbtc_from_mC(int(outstanding[i]))} cBTC",
+        ),
+        "pool_nonnegative": (
+            pool < 0,
+            lambda i: f"ledger-implied pool {sats_to_btc(int(pool[i]))} BTC",
+        ),
+        "redemption_solvency": (
+            is_redeem & ~tier3_before & (outstanding > 0) & (2 * pool < outstanding),
+            lambda i: f"pool {sats_to_btc(int(pool[i]))} BTC for {format_cbtc_from_mC(int(outstanding[i]))} cBTC",
+        ),
+        "seq_order": (
+            (seq >= 0) & (prev_seq != -1) & (seq != prev_seq + 1),
+            lambda i: f"seq {int(seq[i])} after {int(seq[i - 1]) if i else 'start of ledger'}",
+        ),
+    }
+    for rule, (mask, message) in global_checks.items():
+        count, hits = _global_failures(mask, message)
+        if count:
+            counts[rule] += count
+            samples.extend((i, rule, text) for i, text in hits)
+
+    samples.sort()
+    return {
+        "events": n,
+        "counts": counts,
+        "samples": samples,
+        "ts_backwards": ts_backwards,
+        "total_minted_mC": int(d_outstanding[d_outstanding > 0].sum()),
+        "total_redeemed_mC": int(-d_outstanding[d_outstanding < 0].sum()),
+        "pool_sats": int(pool[-1]) if n else 0,
+    }
+
+
+def verify_ledger(workers: int, chunk_bytes: int = DEFAULT_CHUNK_MB << 20):
+    """
+    Audit the configured ledger on `workers` processes. Returns
+    (merged result, number of chunks, source description).
+    """
+    store = get_sqlite_store()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if store is None and LEDGER_PATH.exists():
+            # At least a few chunks per worker, so one slow range does not
+            # leave the other cores idle
+            size = LEDGER_PATH.stat().st_size
+            jobs = log_chunks(str(LEDGER_PATH), max(min(chunk_bytes, size // (4 * workers)), 1 << 16))
+            chunks = list(pool.map(check_log_chunk, jobs))
+            source = str(LEDGER_PATH)
+        else:
+            events = store.iter_events() if store is not None else iter_legacy_events()
+            chunks = list(_map_ordered(pool, check_events, _batches(events, STREAM_BATCH), 2 * workers))
+            source = str(store.path) if store is not None else "legacy data/ledger.json"
+    return merge_chunks(chunks), len(chunks), source
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC ledger invariant audit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_MB)
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.chunk_mb <= 0:
+        print("[ERROR] --workers must be ≥ 1 and --chunk-mb > 0.")
+        sys.exit(1)
+
+    result, n_chunks, source = verify_ledger(args.workers, max(int(args.chunk_mb * (1 << 20)), 1))
+    counts = result["counts"]
+
+    for index, rule, message in result["samples"]:
+        print(f"[FAIL] Event #{index + 1}: {rule}: {message}")
+
+    print("\n=== cBTC Ledger Invariant Audit (Regtest MVP) ===")
+    print(f"Source:                {source}")
+    print(f"Events checked:        {result['events']} ({n_chunks} chunks, {args.workers} workers)")
+    print("-------------------------------------------------")
+    for rule, description in RULES.items():
+        print(f"{'OK  ' if not counts[rule] else 'FAIL'}  {description:<62} {counts[rule]:>8}")
+    print("-------------------------------------------------")
+    print(f"Total minted cBTC:     {format_cbtc_from_mC(result['total_minted_mC'])}")
+    print(f"Total redeemed cBTC:   {format_cbtc_from_mC(result['total_redeemed_mC'])}")
+    print(f"Ledger-implied pool:   {sats_to_btc(result['pool_sats'])} BTC (before on-chain fees)")
+    if result["ts_backwards"]:
+        print(f"[WARN] {result['ts_backwards']} event(s) timestamped before the previous event.")
+    print("=================================================\n")
+
+    failed = sum(counts.values())
+    if failed:
+        print(f"[ERROR] {failed} invariant violation(s).")
+        sys.exit(1)
+    print("[RESULT] All invariants hold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+# cBTC Protocol – ZMQ Chain Listener (EXPERIMENTAL)
+#
+# Pushes chain changes into the coordinator's cached state instead
+# of waiting for the next poll, using bitcoind's ZMQ notifications
+# (-zmqpubhashblock, -zmqpubrawtx):
+#
+# - hashblock → the Redemption Pool tracker (pool_balance.py) is
+#   refreshed at once, the reconciliation indexes (reconcile.py) are
+#   brought up to date and the confirmations of pending mints are
+#   re-read
+# - rawtx → outputs are decoded locally (rawtx.py) and matched
+#   against the watched scripts: REDEMPTION_POOL, YIELD_POOL and
+#   every CP's <CP>_PRINCIPAL addresses. A hit on a pool address
+#   refreshes the pool balance and the reconciliation state; a
+#   transaction paying a CP principal address and the Redemption
+#   Pool is followed as a pending mint until it has
+#   TARGET_CONFIRMATIONS
+# - Unrelated transactions cost one decode and a dict lookup per
+#   output, no RPC call; the watched set is re-read (rate limited)
+#   when an unmatched transaction arrives, to pick up new addresses
+# - A gap in a topic's sequence numbers (missed messages) marks the
+#   tracker stale, so the next quote falls back to an RPC refresh
+#
+# Messages are queued and applied by one worker thread, so a
+# publisher (or the stub node) is never blocked on RPC calls.
+#
+# Usage:
+#   python src/coordinator/zmq_listener.py
+#       [--block tcp://127.0.0.1:28332] [--tx tcp://127.0.0.1:28333]
+#       [--rpc-port 18443] [--no-reconcile]
+#
+#   bitcoind needs -zmqpubhashblock=<block endpoint> and
+#   -zmqpubrawtx=<tx endpoint>. Against the stub node:
+#   python src/coordinator/stub_node.py 18543 100 28332
+#   python src/coordinator/zmq_listener.py --rpc-port 18543
+#       --block tcp://127.0.0.1:28332 --tx tcp://127.0.0.1:28332
+#
+# Dependencies:
+#   pip install python-bitcoinrpc pyzmq
+#
+# ⚠️ For regtest/testing only. Not production-ready.
+# ------------------------------------------------------------
+
+from bitcoinrpc.authproxy import JSONRPCException
+import argparse
+import importlib.util
+import queue
+import sys
+import threading
+import time
+
+from cp_index import cp_positions
+from pool_balance import TARGET_CONFIRMATIONS, get_pool_tracker
+from rawtx import address_to_script, parse_raw_tx
+from rpc import REDEMPTION_WALLET_NAME, YIELD_WALLET_NAME, get_wallet_client
+import reconcile as reconcile_mod
+import rpc
+
+DEFAULT_BLOCK_ENDPOINT = "tcp://127.0.0.1:28332"
+DEFAULT_TX_ENDPOINT = "tcp://127.0.0.1:28333"
+
+TOPICS = ("hashblock", "rawtx")
+
+# Minimum seconds between re-reads of the watched address set
+WATCH_REFRESH_SECONDS = 5.0
+
+# Bitcoin Core: no addresses with this label
+RPC_WALLET_INVALID_LABEL_NAME = -11
+
+# Poll timeout of the ZMQ loop, so stop() is noticed
+RECV_TIMEOUT_MS = 500
+
+
+# --- WATCHED ADDRESSES -----------------------------------------------------
+
+def watch_labels(cp_wallets=()):
+    """
+    (wallet, label) pairs whose addresses the listener follows.
+    """
+    labels = [(REDEMPTION_WALLET_NAME, "REDEMPTION_POOL"), (YIELD_WALLET_NAME, "YIELD_POOL")]
+    labels.extend((cp, f"{cp}_PRINCIPAL") for cp in cp_wallets)
+    return labels
+
+
+def load_watched_scripts(labels):
+    """
+    Returns {script_hex: wallet_name} for every address of the given
+    (wallet, label) pairs.
+    """
+    scripts = {}
+    for wallet_name, label in labels:
+        try:
+            addresses = get_wallet_client(wallet_name).getaddressesbylabel(label)
+        except JSONRPCException as e:
+            if e.error.get("code") == RPC_WALLET_INVALID_LABEL_NAME:
+                continue
+            raise
+        for address in addresses:
+            script = address_to_script(address)
+            if script is not None:
+                scripts[script] = wallet_name
+    return scripts
+
+
+# --- LISTENER --------------------------------------------------------------
+
+class ChainListener:
+    """
+    Applies hashblock / rawtx notifications to the coordinator state.
+    handle() only queues; start() runs the worker thread.
+    """
+
+    def __init__(self, tracker=None, reconcile: bool = True, cp_wallets=None, verbose: bool = False):
+        self.tracker = get_pool_tracker() if tracker is None else tracker
+        self.reconcile = reconcile
+        # None: follow every CP that has minted (from the ledger)
+        self.cp_wallets = cp_wallets
+        self.verbose = verbose
+        self.queue = queue.Queue()
+        self.watched = {}
+        self._watched_at = None
+        self.sequence = {}
+        # txid → confirmations (0 in the mempool) of mints not yet deep
+        self.pending_mints = {}
+        # Last reconcile.reconcile() result
+        self.findings = {}
+        self.counts = {"hashblock": 0, "rawtx": 0, "matched": 0, "gaps": 0, "errors": 0}
+        self._worker = None
+
+    # --- intake ---
+
+    def handle(self, topic, body: bytes, seq=None) -> None:
+        """
+        Queue one notification (safe to call from any thread).
+        """
+        if isinstance(topic, bytes):
+            topic = topic.decode("ascii", "replace")
+        self.queue.put((topic, body, seq))
+
+    def start(self) -> None:
+        self._worker = threading.Thread(target=self._run, name="zmq-listener", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        if self._worker is not None:
+            self.queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def drain(self) -> None:
+        """
+        Block until every queued notification has been applied.
+        """
+        self.queue.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.process(*item)
+            except Exception as e:
+                self.counts["errors"] += 1
+                self.tracker.invalidate()
+                print(f"[WARN] ZMQ {item[0]} notification failed: {e}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    # --- processing ---
+
+    def _check_sequence(self, topic: str, seq) -> None:
+        if seq is None:
+            return
+        last = self.sequence.get(topic)
+        self.sequence[topic] = seq
+        if last is not None and seq != (last + 1) & 0xffffffff:
+            # Missed notifications: only a full refresh is safe
+            self.counts["gaps"] += 1
+            self.tracker.invalidate()
+            if self.verbose:
+                print(f"[WARN] {topic} sequence gap ({last} → {seq})")
+
+    def process(self, topic: str, body: bytes, seq=None) -> None:
+        self._check_sequence(topic, seq)
+        if topic == "hashblock":
+            self.on_block(body.hex())
+        elif topic == "rawtx":
+            self.on_tx(body)
+
+    def on_block(self, block_hash: str) -> None:
+        self.counts["hashblock"] += 1
+        self.tracker.notify_block(block_hash)
+        self.tracker.balance()
+        self._update_mints()
+        if self.reconcile:
+            self._reconcile()
+        if self.verbose:
+            print(f"[INFO] Block {block_hash}: {len(self.pending_mints)} mint(s) pending")
+
+    def on_tx(self, raw: bytes) -> None:
+        self.counts["rawtx"] += 1
+        tx = parse_raw_tx(raw)
+        wallets = self._match(tx["outputs"])
+        if not wallets:
+            return
+        self.counts["matched"] += 1
+
+        if REDEMPTION_WALLET_NAME in wallets or YIELD_WALLET_NAME in wallets:
+            self.tracker.invalidate()
+            self.tracker.balance()
+            if self.reconcile:
+                self._reconcile()
+        if REDEMPTION_WALLET_NAME in wallets and len(wallets) > 1 and tx["txid"] not in self.pending_mints:
+            self.pending_mints[tx["txid"]] = 0
+            self._update_mints()
+        if self.verbose:
+            print(f"[INFO] Tx {tx['txid']} touches {', '.join(sorted(wallets))}")
+
+    def _match(self, outputs):
+        if self._watched_at is None:
+            self.refresh_watched()
+        wallets = {self.watched[script] for _, script in outputs if script in self.watched}
+        if not wallets and time.monotonic() - self._watched_at >= WATCH_REFRESH_SECONDS:
+            # Possibly paid to an address handed out since the last read
+            self.refresh_watched()
+            wallets = {self.watched[script] for _, script in outputs if script in self.watched}
+        return wallets
+
+    def refresh_watched(self) -> None:
+        cp_wallets = self.cp_wallets if self.cp_wallets is not None else sorted(cp_positions())
+        self.watched = load_watched_scripts(watch_labels(cp_wallets))
+        self._watched_at = time.monotonic()
+
+    def _update_mints(self) -> None:
+        for txid in list(self.pending_mints):
+            confirmations = self.tracker.tx_confirmations(txid)
+            if confirmations is None or confirmations >= TARGET_CONFIRMATIONS:
+                # Settled (or dropped from the wallet): stop following
+                del self.pending_mints[txid]
+            else:
+                self.pending_mints[txid] = confirmations
+
+    def _reconcile(self) -> None:
+        state, _ = reconcile_mod.refresh_state()
+        self.findings = reconcile_mod.reconcile(state)
+
+
+# --- ZMQ -------------------------------------------------------------------
+
+def run_zmq(listener: ChainListener, endpoints, stop_event: threading.Event = None) -> None:
+    """
+    Subscribe to hashblock and rawtx on the given endpoints and feed
+    every message to listener.handle() until stop_event is set.
+    """
+    try:
+        import zmq
+    except ImportError:
+        raise RuntimeError("pyzmq is not installed (pip install pyzmq)") from None
+
+    context = zmq.Context.instance()
+    socket = context.socket(zmq.SUB)
+    socket.setsockopt(zmq.RCVHWM, 0)
+    for topic in TOPICS:
+        socket.setsockopt(zmq.SUBSCRIBE, topic.encode("ascii"))
+    for endpoint in dict.fromkeys(endpoints):
+        socket.connect(endpoint)
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            if not socket.poll(RECV_TIMEOUT_MS):
+                continue
+            parts = socket.recv_multipart()
+            if len(parts) != 3 or len(parts[2]) != 4:
+                continue
+            listener.handle(parts[0], parts[1], int.from_bytes(parts[2], "little"))
+    finally:
+        socket.close(linger=0)
+
+
+def start_listener(endpoints, tracker=None, reconcile: bool = True, verbose: bool = False):
+    """
+    Start a ChainListener and its ZMQ subscriber thread. Returns
+    (listener, stop_event).
+    """
+    listener = ChainListener(tracker=tracker, reconcile=reconcile, verbose=verbose)
+    listener.start()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run_zmq, args=(listener, endpoints, stop_event), name="zmq-sub", daemon=True)
+    thread.start()
+    return listener, stop_event
+
+
+# --- MAIN ------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="cBTC ZMQ chain listener")
+    parser.add_argument("--block", default=DEFAULT_BLOCK_ENDPOINT, help="hashblock endpoint")
+    parser.add_argument("--tx", default=DEFAULT_TX_ENDPOINT, help="rawtx endpoint")
+    parser.add_argument("--rpc-port", type=int, default=rpc.RPC_PORT)
+    parser.add_argument("--no-reconcile", action="store_true", help="do not update reconcile.json")
+    args = parser.parse_args()
+
+    rpc.RPC_PORT = args.rpc_port
+    if importlib.util.find_spec("zmq") is None:
+        print("[ERROR] pyzmq is not installed (pip install pyzmq).")
+        sys.exit(1)
+
+    listener = ChainListener(reconcile=not args.no_reconcile, verbose=True)
+    listener.start()
+    print(f"[INFO] Listening for hashblock on {args.block}, rawtx on {args.tx}")
+    try:
+        run_zmq(listener, [args.block, args.tx])
+    except KeyboardInterrupt:
+        print("\n[INFO] Listener stopped.")
+    finally:
+        listener.stop()
+        rpc.close_all()
+
+
+if __name__ == "__main__":
+    main()
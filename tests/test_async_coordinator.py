@@ -0,0 +1,69 @@
+import asyncio
+import fcntl
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import async_coordinator
+import ledger
+from ledger import LedgerLock
+
+
+@pytest.mark.parametrize("raw", ["redeem:1e40:addr", "redeem:inf:addr", "redeem:nan:addr",
+                                 "redeem:0:addr", "mint:1e40", "mint:abc", "mint:-inf"])
+def test_parse_job_rejects_bad_amounts_with_value_error(raw):
+    with pytest.raises(ValueError):
+        async_coordinator.parse_job(raw)
+
+
+def test_parse_job_accepts_bounded_amounts():
+    assert async_coordinator.parse_job("redeem:1.5:addr") == ("redeem", (1500, "addr"))
+    kind, (deposit_btc, cp_wallet_name) = async_coordinator.parse_job("mint:0.3:CP2")
+    assert (kind, str(deposit_btc), cp_wallet_name) == ("mint", "0.3", "CP2")
+
+
+def test_cancelled_lock_wait_does_not_leave_the_ledger_locked(tmp_path, monkeypatch):
+    lock_path = tmp_path / "ledger.lock"
+    monkeypatch.setattr(ledger, "LOCK_PATH", lock_path)
+
+    # Keep every lock alive so a dropped (never released) one cannot be
+    # closed by garbage collection instead
+    created = []
+
+    class TrackedLock(LedgerLock):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(async_coordinator, "LedgerLock", TrackedLock)
+
+    holder = LedgerLock()
+    holder.acquire()
+
+    async def run():
+        coordinator = async_coordinator.AsyncCoordinator()
+
+        async def job():
+            async with coordinator.critical_section():
+                pass
+
+        task = asyncio.create_task(job())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The abandoned worker thread now takes the lock, then lets go
+        threading.Timer(0.05, holder.release).start()
+        await asyncio.sleep(0.5)
+
+    asyncio.run(run())
+
+    assert len(created) == 1
+    with lock_path.open("a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+from batch_io import request_decimal
+
+
+def test_request_decimal_rejects_out_of_range_amounts():
+    assert request_decimal({"a": "1.5"}, "a", places=3) == Decimal("1.5")
+    with pytest.raises(ValueError, match="out of range"):
+        request_decimal({"a": "1e40"}, "a", places=3)
+    with pytest.raises(ValueError, match="Invalid"):
+        request_decimal({"a": "nan"}, "a")
+    with pytest.raises(ValueError, match="missing"):
+        request_decimal({}, "a")
+
+
+def test_calc_batch_reports_every_request_after_a_bad_amount():
+    requests = [
+        {"outstanding_cbtc": 30000, "pool_btc": 0.2, "request_cbtc": 100, "id": "a"},
+        {"outstanding_cbtc": 30000, "pool_btc": 0.2, "request_cbtc": "1e40", "id": "b"},
+        {"outstanding_cbtc": 30000, "pool_btc": 0.2, "request_cbtc": 5, "id": "c"},
+    ]
+    proc = subprocess.run(
+        [sys.executable, str(COORDINATOR_DIR / "calc_redemption_rate.py"), "--json"],
+        input=json.dumps(requests), capture_output=True, text=True, cwd=COORDINATOR_DIR,
+    )
+    results = [json.loads(line) for line in proc.stdout.splitlines()]
+
+    assert proc.returncode == 1
+    assert [(r["id"], r["ok"]) for r in results] == [("a", True), ("b", False), ("c", True)]
+    assert "out of range" in results[1]["error"]
+
+
+def test_redeem_dry_run_reports_every_request_after_a_bad_amount(monkeypatch):
+    import redeem_cbtc
+
+    class Tracker:
+        def trusted_sats(self):
+            return 20_000_000
+
+    monkeypatch.setattr(redeem_cbtc, "ledger_head", lambda: (1, 30_000_000, 0))
+    monkeypatch.setattr(redeem_cbtc, "get_pool_tracker", lambda: Tracker())
+
+    results = list(redeem_cbtc.simulate_requests([
+        {"amount_cbtc": 100},
+        {"amount_cbtc": "1e40"},
+        {"amount_cbtc": 5},
+    ]))
+
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert [r["index"] for r in results] == [0, 1, 2]
+
+
+def test_calc_batch_reports_lines_that_are_not_objects():
+    lines = [
+        '{"outstanding_cbtc": 30000, "pool_btc": 0.2, "request_cbtc": 100}',
+        '[1, 2]',
+        '{"outstanding_cbtc": 30000,',
+        '{"outstanding_cbtc": 30000, "pool_btc": 0.2, "request_cbtc": 5}',
+    ]
+    proc = subprocess.run(
+        [sys.executable, str(COORDINATOR_DIR / "calc_redemption_rate.py"), "--json"],
+        input="\n".join(lines), capture_output=True, text=True, cwd=COORDINATOR_DIR,
+    )
+    results = [json.loads(line) for line in proc.stdout.splitlines()]
+
+    assert proc.returncode == 1
+    assert [(r["index"], r["ok"]) for r in results] == [(0, True), (1, False), (2, False), (3, True)]
+    assert "JSON object" in results[1]["error"]
+    assert "line 3" in results[2]["error"]
+
+
+def test_redeem_execute_continues_after_an_unexpected_error(monkeypatch):
+    import redeem_cbtc
+
+    paid = []
+
+    def redeem_with_retry(requested_mC, address):
+        if address == "fails":
+            raise OSError("fsync failed")
+        paid.append(address)
+        return {"type": "redeem", "burned_mC": requested_mC}
+
+    monkeypatch.setattr(redeem_cbtc, "redeem_with_retry", redeem_with_retry)
+
+    results = list(redeem_cbtc.execute_requests([
+        {"amount_cbtc": 1, "address": "a"},
+        {"amount_cbtc": 1, "address": "fails"},
+        {"amount_cbtc": 1, "address": "c"},
+    ]))
+
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert "fsync failed" in results[1]["error"]
+    assert paid == ["a", "c"]
@@ -0,0 +1,71 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import batch_quote
+from core import EXACT_MAX_MC, EXACT_MAX_SATS, quote_redemption
+
+
+def assert_matches_scalar(O, P, R):
+    batch = batch_quote.quote_redemption_batch(O, P, R)
+    for i, (o, p, r) in enumerate(zip(O, P, R)):
+        quote = quote_redemption(o, p, r)
+        row = (int(batch.tier[i]), int(batch.btc_paid_sats[i]), int(batch.rate_sats_per_cbtc[i]),
+               int(batch.pool_after_sats[i]), int(batch.liability_after_sats[i]))
+        assert row == (quote.tier, quote.btc_paid_sats, quote.rate_sats_per_cbtc,
+                       quote.pool_after_sats, quote.liability_after_sats), (o, p, r)
+
+
+def test_batch_matches_scalar_on_small_grid():
+    O, P, R = [], [], []
+    for o in range(1, 31):
+        for r in range(1, o + 1):
+            for p in range(0, 2 * o + 3):
+                O.append(o)
+                P.append(p)
+                R.append(r)
+    assert_matches_scalar(O, P, R)
+
+
+def test_batch_matches_scalar_on_random_sweep():
+    rng = random.Random(1)
+    O, P, R = [], [], []
+    for _ in range(20_000):
+        o = rng.randint(1, 10 ** rng.randint(1, 15))
+        O.append(o)
+        R.append(rng.randint(1, o))
+        P.append(rng.randint(0, 2 * o))
+    assert_matches_scalar(O, P, R)
+
+
+def test_scalar_fallback_rows_match(monkeypatch):
+    fallback = []
+
+    def counting_quote(O, P, R):
+        fallback.append((O, P, R))
+        return quote_redemption(O, P, R)
+
+    monkeypatch.setattr(batch_quote, "quote_redemption", counting_quote)
+
+    rows = [
+        (10, 3, 5),                                       # pro-rata payout on a half-sat tie
+        (EXACT_MAX_MC, 10**14, EXACT_MAX_MC - 1),         # P × R overflows int64
+        (EXACT_MAX_MC + 1, 10**14, 12345),                # outstanding outside the exact domain
+        (10**15 - 1, EXACT_MAX_SATS + 1, 10**14),         # pool outside the exact domain
+        (1000, 700, 10),                                  # vector path, for contrast
+    ]
+    O, P, R = (list(column) for column in zip(*rows))
+    assert_matches_scalar(O, P, R)
+    assert fallback[:4] == rows[:4]
+
+
+def test_invalid_row_raises_like_scalar():
+    with pytest.raises(ValueError, match="row 1: Redemption request cannot exceed outstanding cBTC."):
+        batch_quote.quote_redemption_batch([10, 10], [5, 5], [1, 11])
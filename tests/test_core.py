@@ -0,0 +1,99 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+from core import EXACT_MAX_MC, EXACT_MAX_SATS, parse_amount, quote_redemption, quote_redemption_decimal
+
+# Every stored field plus every derived view of a quote
+QUOTE_FIELDS = (
+    "tier", "outstanding_mC", "pool_sats", "request_mC", "btc_paid_sats", "rate_sats_per_cbtc",
+    "liability_before_sats", "liability_after_sats", "pool_after_sats",
+    "tier_label", "btc_paid", "redemption_rate", "liability_before", "liability_after",
+    "coverage_before", "coverage_after", "coverage_before_pct", "coverage_after_pct",
+)
+
+
+def field(quote, name):
+    try:
+        return getattr(quote, name)
+    except ArithmeticError as e:
+        # e.g. a percentage too large for 18 digits at absurd coverage
+        return type(e)
+
+
+def outcome(engine, O, P, R):
+    try:
+        quote = engine(O, P, R)
+    except ValueError as e:
+        return ("error", str(e))
+    return tuple((name, field(quote, name)) for name in QUOTE_FIELDS)
+
+
+def assert_engines_agree(O, P, R):
+    expected = outcome(quote_redemption_decimal, O, P, R)
+    assert outcome(quote_redemption, O, P, R) == expected, (O, P, R)
+
+
+def tier_boundary_pools(O):
+    """
+    Pools around the 60% / 50% tier thresholds and the 50% floor of
+    the post-redemption coverage.
+    """
+    pools = {0, 1, O, 2 * O}
+    for base in (3 * O // 5, O // 2):
+        pools.update(range(max(base - 2, 0), base + 3))
+    return sorted(pools)
+
+
+def test_integer_engine_matches_reference_on_small_grid():
+    for O in range(1, 41):
+        for R in range(1, O + 1):
+            for P in range(0, 2 * O + 3):
+                assert_engines_agree(O, P, R)
+
+
+def test_integer_engine_matches_reference_at_tier_boundaries():
+    outstanding = [10**k + d for k in range(2, 16) for d in (-1, 0, 1, 7)]
+    outstanding += [EXACT_MAX_MC, EXACT_MAX_MC + 1, 3 * 10**16]
+    for O in outstanding:
+        requests = sorted({1, 2, O // 3, O // 2, O - 1, O} - {0})
+        for P in tier_boundary_pools(O) + [EXACT_MAX_SATS, EXACT_MAX_SATS + 1]:
+            for R in requests:
+                assert_engines_agree(O, P, R)
+
+
+def test_integer_engine_matches_reference_on_random_sweep():
+    rng = random.Random(1)
+    for _ in range(20_000):
+        O = rng.randint(1, 10 ** rng.randint(1, 17))
+        R = rng.randint(1, O)
+        P = rng.randint(0, 2 * O)
+        assert_engines_agree(O, P, R)
+
+
+def test_integer_engine_matches_reference_near_pro_rata_ties():
+    # Tier 3 payouts P * R / O that land on or next to half a satoshi
+    rng = random.Random(2)
+    for _ in range(20_000):
+        O = 2 * rng.randint(1, 10**14)
+        R = rng.choice((O // 2, O // 2 + 1, O // 2 - 1, rng.randint(1, O)))
+        P = 2 * rng.randint(0, O // 4) + 1
+        assert_engines_agree(O, P, max(R, 1))
+
+
+def test_invalid_inputs_fail_alike():
+    for O, P, R in [(0, 1, 1), (10, -1, 1), (10, 1, 0), (10, 1, 11)]:
+        assert outcome(quote_redemption, O, P, R)[0] == "error"
+        assert_engines_agree(O, P, R)
+
+
+def test_parse_amount_bounds_amounts():
+    assert str(parse_amount(" 1.5 ", "cBTC amount", places=3)) == "1.5"
+    for raw in ("1e40", "inf", "nan", "abc", None, True):
+        with pytest.raises(ValueError, match="Invalid cBTC amount"):
+            parse_amount(raw, "cBTC amount", places=3)
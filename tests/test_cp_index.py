@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import cp_index
+import ledger
+from cp_index import cp_positions, fold_cp_event, update_cp_index
+from ledger import encode_event
+
+
+def mint(cp_wallet, i):
+    return {"type": "mint", "cp_wallet": cp_wallet, "deposit_btc": "0.10000000",
+            "principal_btc": "0.07000000", "redemption_btc": "0.02000000", "yield_btc": "0.01000000",
+            "minted_mC": 3000000, "timestamp": f"2026-01-24T17:{i // 60 % 60:02d}:{i % 60:02d}Z"}
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(ledger, "LEDGER_BACKEND", "jsonl")
+    monkeypatch.setattr(cp_index, "LEDGER_PATH", path)
+    monkeypatch.setattr(cp_index, "CP_INDEX_PATH", tmp_path / "ledger.cp_index.sqlite3")
+    return path
+
+
+def reference(events):
+    cps = {}
+    for event in events:
+        fold_cp_event(cps, event)
+    return cps
+
+
+def test_index_matches_a_full_fold_and_writes_only_changed_cps(log_path):
+    events = [mint(f"CP{i % 500}", i) for i in range(1000)] + [{"type": "redeem", "burned_mC": 5}]
+    log_path.write_bytes(b"".join(encode_event(event) for event in events))
+    assert cp_positions() == reference(events)
+
+    new = [mint("CP7", 2000), mint("CP7", 2001), mint("CP9", 2002)]
+    with log_path.open("ab") as f:
+        f.write(b"".join(encode_event(event) for event in new))
+
+    conn = update_cp_index()
+    before = conn.total_changes
+    conn = update_cp_index()
+    assert conn.total_changes == before   # nothing new: nothing written
+    assert cp_positions() == reference(events + new)
+
+
+def test_refresh_cost_is_the_changed_rows(log_path):
+    events = [mint(f"CP{i}", i) for i in range(2000)]
+    log_path.write_bytes(b"".join(encode_event(event) for event in events))
+    conn = update_cp_index()
+
+    with log_path.open("ab") as f:
+        f.write(encode_event(mint("CP3", 5000)))
+    before = conn.total_changes
+    update_cp_index()
+    # One CP row plus the log position
+    assert conn.total_changes - before == 2
+
+
+def test_rewritten_log_rebuilds_the_index(log_path):
+    log_path.write_bytes(b"".join(encode_event(mint("CP1", i)) for i in range(3)))
+    assert cp_positions()["CP1"]["channels"] == 3
+
+    events = [mint("CP2", 0)]
+    log_path.write_bytes(b"".join(encode_event(event) for event in events))
+    assert cp_positions() == reference(events)
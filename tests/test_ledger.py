@@ -0,0 +1,50 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import ledger
+from ledger import LedgerMigrationError, iter_legacy_events, migrate_legacy_ledger
+
+EVENTS = [
+    {"type": "mint", "minted_cbtc": "9000.000", "txid": "a"},
+    {"type": "redeem", "burned_cbtc": "100.000", "txid": "b"},
+]
+
+
+@pytest.fixture
+def legacy_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "LEDGER_PATH", tmp_path / "ledger.jsonl")
+    monkeypatch.setattr(ledger, "LEGACY_LEDGER_PATH", tmp_path / "ledger.json")
+    return tmp_path / "ledger.json", tmp_path / "ledger.jsonl"
+
+
+def test_migration_copies_every_legacy_event(legacy_paths):
+    legacy_path, log_path = legacy_paths
+    legacy_path.write_text(json.dumps({"events": EVENTS}, indent=2))
+
+    assert migrate_legacy_ledger() == 2
+    assert [json.loads(line)["txid"] for line in log_path.read_text().splitlines()] == ["a", "b"]
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps({"events": EVENTS})[:-20],           # truncated
+    json.dumps({"events": EVENTS}) + " garbage",    # trailing data
+    json.dumps({"events": EVENTS[:1] + [7] + EVENTS[1:]}),
+    '{"events": [{"txid": "a"} {"txid": "b"}]}',    # missing separator
+])
+def test_migration_refuses_a_malformed_legacy_ledger(legacy_paths, text):
+    legacy_path, log_path = legacy_paths
+    legacy_path.write_text(text)
+
+    with pytest.raises(LedgerMigrationError):
+        migrate_legacy_ledger()
+    assert not log_path.exists()
+    assert list(log_path.parent.glob("*.tmp")) == []
+
+    # Lenient reads still see the events before the damage
+    assert [event["txid"] for event in iter_legacy_events()][:1] == ["a"]
@@ -0,0 +1,101 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import ledger
+import ledger_binary
+from ledger import encode_event
+from ledger_binary import RECORD_DTYPE, decode_record, encode_record
+
+TXID = "ab" * 32
+
+EVENTS = [
+    # Events as the coordinator writes them today
+    {"type": "mint", "timestamp": "2026-01-24T17:28:14.433734Z", "cp_wallet": "CP1",
+     "deposit_btc": "0.3", "principal_btc": "0.21000000", "redemption_btc": "0.06000000",
+     "yield_btc": "0.03000000", "minted_cbtc": "9000.000", "minted_mC": 9000000, "txid": TXID, "seq": 1},
+    {"type": "redeem", "timestamp": "2026-01-24T18:00:00.000001Z", "burned_cbtc": "100.000",
+     "burned_mC": 100000, "btc_paid": "0.00033333", "redemption_rate": "0.00000333",
+     "tier": "Tier 3 – Protection mode (pro-rata)", "txid": "cd" * 32, "seq": 2,
+     "coverage_before": "33.3333%", "coverage_after": "33.3333%", "vout": 1, "queue_id": "q1"},
+    {"type": "mint", "timestamp": "2026-01-25T00:00:00Z", "cp_wallet": "CP2",
+     "deposit_btc": "1.0", "minted_mC": 30000000, "txid": TXID, "seq": 3},
+    # Legacy events: cBTC strings only, no seq
+    {"type": "mint", "timestamp": "2025-12-01T10:00:00.5Z", "cp_wallet": "CP1",
+     "deposit_btc": "0.10000000", "minted_cbtc": "3000.000", "txid": TXID},
+    {"type": "redeem", "timestamp": "2025-12-02T10:00:00", "burned_cbtc": "12.5", "btc_paid": 0.000125},
+    # Odd types and spellings the record columns cannot hold
+    {"type": "mint", "cp_wallet": 7, "minted_mC": "5", "seq": True, "txid": TXID.upper()},
+    {"type": "redeem", "burned_mC": 1, "seq": 2**70, "txid": "short", "btc_paid": "1e-8",
+     "timestamp": "2026-01-24T17:28:14+00:00Z", "note": None},
+    {"type": "audit", "cp_wallet": "CP3", "nested": {"a": [1, 2.5, "x"]}, "label": "cBTC – ünicode"},
+    {"type": None, "deposit_btc": "nan", "principal_btc": True, "yield_btc": "-0.00000001"},
+    {},
+]
+
+
+def canonical(event) -> bytes:
+    return encode_event(event)
+
+
+def round_trip(events):
+    cp_ids, cp_names = {}, []
+    extra_buffer = b""
+    records = np.zeros(len(events), dtype=RECORD_DTYPE)
+    for i, event in enumerate(events):
+        columns, extra = encode_record(event, cp_ids, cp_names)
+        columns["extra_offset"] = len(extra_buffer) if extra else 0
+        columns["extra_len"] = len(extra)
+        extra_buffer += extra
+        for name in RECORD_DTYPE.names:
+            if name in columns:
+                records[i][name] = columns[name]
+    return [decode_record(record, cp_names, extra_buffer) for record in records]
+
+
+def test_records_round_trip_every_event():
+    for event, decoded in zip(EVENTS, round_trip(EVENTS)):
+        assert canonical(decoded) == canonical(event)
+
+
+def test_columns_carry_canonical_fields():
+    cp_ids, cp_names = {}, []
+    columns, extra = encode_record(EVENTS[0], cp_ids, cp_names)
+    # Only the non-canonical "0.3" needs the extra JSON
+    assert json.loads(extra) == {"deposit_btc": "0.3"}
+    assert (columns["minted_mC"], columns["deposit_sats"], columns["cp_id"]) == (9000000, 30000000, 1)
+
+    columns, extra = encode_record(EVENTS[2], cp_ids, cp_names)
+    assert json.loads(extra) == {"deposit_btc": "1.0"}
+    assert columns["deposit_sats"] == 100000000
+    assert cp_names == ["CP1", "CP2"]
+
+
+def test_binary_log_round_trips_the_ledger_incrementally(tmp_path, monkeypatch):
+    log_path = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(ledger, "LEDGER_PATH", log_path)
+    monkeypatch.setattr(ledger, "LEGACY_LEDGER_PATH", tmp_path / "ledger.json")
+    monkeypatch.setattr(ledger, "LEDGER_BACKEND", "jsonl")
+    monkeypatch.setattr(ledger_binary, "LEDGER_PATH", log_path)
+    monkeypatch.setattr(ledger_binary, "BINARY_LOG_PATH", tmp_path / "ledger.bin")
+    monkeypatch.setattr(ledger_binary, "EXTRA_PATH", tmp_path / "ledger.bin.extra")
+    monkeypatch.setattr(ledger_binary, "META_PATH", tmp_path / "ledger.bin.meta.json")
+    monkeypatch.setattr(ledger_binary, "BINARY_LOCK_PATH", tmp_path / "ledger.bin.lock")
+
+    half = len(EVENTS) // 2
+    log_path.write_bytes(b"".join(canonical(event) for event in EVENTS[:half]))
+    assert [canonical(e) for e in ledger_binary.open_binary_log().iter_events()] == \
+        [canonical(e) for e in EVENTS[:half]]
+
+    with log_path.open("ab") as f:
+        f.write(b"".join(canonical(event) for event in EVENTS[half:]))
+    binary = ledger_binary.open_binary_log()
+    assert [canonical(e) for e in binary.iter_events()] == [canonical(e) for e in EVENTS]
+    assert ledger_binary.verify_binary_log() == (len(EVENTS), None)
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import ledger
+from ledger import LedgerLock, encode_event
+from ledger_sqlite import SQLiteLedgerStore, SQLiteSeedError
+
+EVENTS = [
+    {"type": "mint", "cp_wallet": "CP1", "minted_mC": 9000000, "seq": 1},
+    {"type": "redeem", "burned_mC": 100000, "seq": 2},
+]
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(ledger, "LEDGER_PATH", path)
+    monkeypatch.setattr(ledger, "LEGACY_LEDGER_PATH", tmp_path / "ledger.json")
+    monkeypatch.setattr(ledger, "LOCK_PATH", tmp_path / "ledger.lock")
+    path.write_bytes(b"".join(encode_event(event) for event in EVENTS))
+    return path
+
+
+WRITER = """
+import fcntl, sys
+with open(sys.argv[1], "a+b") as lock:
+    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+    print("locked", flush=True)
+    sys.stdin.readline()
+    with open(sys.argv[2], "ab") as log:
+        log.write(sys.argv[3].encode("ascii"))
+"""
+
+
+def test_seed_waits_for_a_writer_in_another_process(log_path, tmp_path):
+    late_event = encode_event({"type": "mint", "minted_mC": 5, "seq": 3}).decode("ascii")
+    writer = subprocess.Popen(
+        [sys.executable, "-c", WRITER, str(tmp_path / "ledger.lock"), str(log_path), late_event],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    assert writer.stdout.readline() == "locked\n"
+
+    store = SQLiteLedgerStore(tmp_path / "ledger.sqlite3")
+    heads = []
+    seeding = threading.Thread(target=lambda: heads.append(store.head()))
+    seeding.start()
+    seeding.join(0.3)
+    assert seeding.is_alive()
+
+    # The writer appends, then releases the lock; the seed must include it
+    writer.communicate("go\n")
+    seeding.join()
+    assert heads == [(3, 9000005, 100000)]
+
+
+def test_store_refuses_to_open_after_the_log_grew(log_path, tmp_path):
+    store = SQLiteLedgerStore(tmp_path / "ledger.sqlite3")
+    assert store.head() == (2, 9000000, 100000)
+    store.close()
+
+    # Reopening an unchanged log is fine
+    assert SQLiteLedgerStore(tmp_path / "ledger.sqlite3").head() == (2, 9000000, 100000)
+
+    with log_path.open("ab") as f:
+        f.write(encode_event({"type": "mint", "minted_mC": 5, "seq": 3}))
+    with pytest.raises(SQLiteSeedError, match="changed after"):
+        SQLiteLedgerStore(tmp_path / "ledger.sqlite3").head()
+
+
+def test_append_under_the_writer_lock_seeds_without_deadlock(log_path, tmp_path):
+    store = SQLiteLedgerStore(tmp_path / "ledger.sqlite3")
+    with LedgerLock():
+        assert store.append_events([{"type": "redeem", "burned_mC": 1}], expected_seq=2) == 3
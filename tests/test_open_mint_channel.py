@@ -0,0 +1,45 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+COORDINATOR_DIR = Path(__file__).resolve().parents[1] / "src" / "coordinator"
+sys.path.insert(0, str(COORDINATOR_DIR))
+
+import open_mint_channel
+import rpc
+from stub_node import start_stub_node
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, node = start_stub_node()
+    monkeypatch.setattr(rpc, "RPC_PORT", server.server_address[1])
+    monkeypatch.setattr(rpc, "_clients", {})
+    monkeypatch.setattr(rpc, "_regtest_nodes", set())
+    yield node
+    server.shutdown()
+    server.server_close()
+
+
+def test_prepare_mint_refuses_a_non_regtest_node_before_deriving_addresses(stub, monkeypatch):
+    monkeypatch.setattr(stub, "rpc_getblockchaininfo", lambda wallet_name: {"chain": "main"})
+
+    with pytest.raises(RuntimeError, match="regtest"):
+        open_mint_channel.prepare_mint(Decimal("1"), "CP1")
+
+    assert stub.address_count == 0
+
+
+def test_prepare_mint_checks_the_chain_once(stub, monkeypatch):
+    calls = []
+    chain_info = stub.rpc_getblockchaininfo
+    monkeypatch.setattr(stub, "rpc_getblockchaininfo", lambda wallet_name: calls.append(wallet_name) or chain_info(wallet_name))
+
+    first = open_mint_channel.prepare_mint(Decimal("1"), "CP1")
+    second = open_mint_channel.prepare_mint(Decimal("1"), "CP1")
+
+    assert calls == ["CP1"]
+    assert first["principal_address"] != second["principal_address"]
+    assert stub.address_count == 6